@@ -1,8 +1,9 @@
 import os
-import boto3
 from datetime import timedelta, timezone
 from dotenv import load_dotenv
 from zoneinfo import ZoneInfo
+from app.utils.lazy import LazyProxy, LazyResource
+from app.utils.request_tracing import instrument_client
 
 # Cargar variables del .env
 load_dotenv()
@@ -24,6 +25,14 @@ class Config:
     AWS_COGNITO_CLIENT_SECRET = os.getenv("AWS_COGNITO_CLIENT_SECRET", "<tu-client-secret>")
     AWS_COGNITO_DOMAIN = os.getenv("AWS_COGNITO_DOMAIN", "<tu-dominio-cognito>")
     AWS_COGNITO_USER_POOL_ID = os.getenv("AWS_COGNITO_USER_POOL_ID", "<tu-user-pool-id>")
+    AWS_COGNITO_ISSUER = f"https://cognito-idp.{AWS_REGION}.amazonaws.com/{AWS_COGNITO_USER_POOL_ID}"
+    # Llaves públicas del user pool; si AWS_COGNITO_JWKS_FILE está definido se leen de ese archivo
+    AWS_COGNITO_JWKS_URL = os.getenv("AWS_COGNITO_JWKS_URL", f"{AWS_COGNITO_ISSUER}/.well-known/jwks.json")
+    AWS_COGNITO_JWKS_FILE = os.getenv("AWS_COGNITO_JWKS_FILE", None)
+    JWKS_CACHE_SECONDS = int(os.getenv("JWKS_CACHE_SECONDS", 3600))
+
+    # Validación del access token: "cognito" (GetUser en cada request) o "jwt" (firma y expiración locales)
+    AUTH_MODE = os.getenv("AUTH_MODE", "cognito")
 
     SES_VERIFIED_EMAIL = os.getenv("SES_VERIFIED_EMAIL", "noreply@btgpactual.com")
     AWS_SMTP_USER = os.getenv("AWS_SMTP_USER", "TU_SMTP_USER")
@@ -31,6 +40,28 @@ class Config:
     AWS_SMTP_HOST = os.getenv("AWS_SMTP_HOST", "email-smtp.us-east-1.amazonaws.com")
     AWS_SMTP_PORT = os.getenv("AWS_SMTP_PORT", 587)
 
+    # Cola de salida de correos: "smtp" (AWS SES) o "local" (servidor en memoria para pruebas)
+    EMAIL_BACKEND = os.getenv("EMAIL_BACKEND", "smtp")
+    EMAIL_OUTBOX_MAXSIZE = int(os.getenv("EMAIL_OUTBOX_MAXSIZE", 1000))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", 20))
+    EMAIL_OUTBOX_MAX_RETRIES = int(os.getenv("EMAIL_OUTBOX_MAX_RETRIES", 3))
+    EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS", 0.5))
+    EMAIL_OUTBOX_FLUSH_TIMEOUT_SECONDS = float(os.getenv("EMAIL_OUTBOX_FLUSH_TIMEOUT_SECONDS", 5))
+    # En Lambda: cola SQS que consume la función `mailer` (entrega durable fuera de la respuesta).
+    # Sin cola, cada invocación espera a lo sumo EMAIL_LAMBDA_FLUSH_SECONDS y el resto queda para la siguiente
+    EMAIL_QUEUE_URL = os.getenv("EMAIL_QUEUE_URL", None)
+    EMAIL_LAMBDA_FLUSH_SECONDS = float(os.getenv("EMAIL_LAMBDA_FLUSH_SECONDS", 0.5))
+    # `mailer` deja de enviar cuando a la invocación le queda menos que esto (un envío completo
+    # con EMAIL_SMTP_TIMEOUT_SECONDS) y devuelve el resto como fallidos para que SQS los reintente
+    EMAIL_MAILER_RESERVE_SECONDS = float(os.getenv("EMAIL_MAILER_RESERVE_SECONDS", 12))
+    # En Lambda solo /tmp es escribible
+    EMAIL_OUTBOX_DEAD_LETTER_FILE = os.getenv(
+        "EMAIL_OUTBOX_DEAD_LETTER_FILE",
+        "/tmp/email_dead_letter.jsonl" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "email_dead_letter.jsonl"
+    )
+    EMAIL_SMTP_IDLE_SECONDS = float(os.getenv("EMAIL_SMTP_IDLE_SECONDS", 30))
+    EMAIL_SMTP_TIMEOUT_SECONDS = float(os.getenv("EMAIL_SMTP_TIMEOUT_SECONDS", 10))
+
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your_jwt_secret_key")
     JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", 30))
     JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
@@ -38,6 +69,51 @@ class Config:
     # Usando zoneinfo
     TIME_ZONE = ZoneInfo(os.getenv("TIME_ZONE", "UTC"))
 
+    # Hilos del pool dedicado para las llamadas bloqueantes de boto3 (ver utils/async_io.py)
+    IO_EXECUTOR_MAX_WORKERS = int(os.getenv("IO_EXECUTOR_MAX_WORKERS", 64))
+
+    # Header Server-Timing, log por request y ReturnConsumedCapacity en DynamoDB (ver utils/request_tracing.py)
+    REQUEST_TRACING = os.getenv("REQUEST_TRACING", "true").lower() in ("1", "true", "yes")
+
+    # Métricas: "prometheus" (agregadas en proceso, ruta /api/metrics), "emf" (log de CloudWatch en Lambda) u "off"
+    METRICS_MODE = os.getenv("METRICS_MODE", "emf" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "prometheus")
+    METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "BTGPactual")
+
+    # Decimales con los que se serializan los montos en las respuestas (ver utils/responses.py)
+    MONEY_DECIMAL_PLACES = int(os.getenv("MONEY_DECIMAL_PLACES", 2))
+
+    # Listados de solo lectura con el cliente de bajo nivel, sin pasar por Decimal (ver pagination.paginate_raw)
+    RAW_LIST_READS = os.getenv("RAW_LIST_READS", "true").lower() in ("1", "true", "yes")
+
+    # Scan paralelo por segmentos para lecturas de tabla completa (ver utils/parallel_scan.py)
+    SCAN_SEGMENTS = int(os.getenv("SCAN_SEGMENTS", 4))
+    SCAN_MAX_WORKERS = int(os.getenv("SCAN_MAX_WORKERS", 16))
+    SCAN_QUEUE_MAXSIZE = int(os.getenv("SCAN_QUEUE_MAXSIZE", 8))
+
+    # Idempotency-Key en suscribir/cancelar: vigencia de la respuesta guardada y del bloqueo de un request en curso
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 86400))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 30))
+
+    # Paginación de los listados
+    PAGINATION_DEFAULT_LIMIT = int(os.getenv("PAGINATION_DEFAULT_LIMIT", 50))
+    PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 100))
+
+    # Caché en memoria del catálogo (fondos y categorías)
+    CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", 300))
+    CATALOG_CACHE_MAXSIZE = int(os.getenv("CATALOG_CACHE_MAXSIZE", 1024))
+
+    # Exportaciones: con EXPORT_BUCKET el archivo se sube a S3 (multipart) y se responde una URL prefirmada
+    EXPORT_BUCKET = os.getenv("EXPORT_BUCKET", None)
+    EXPORT_URL_EXPIRES_SECONDS = int(os.getenv("EXPORT_URL_EXPIRES_SECONDS", 900))
+    # Tamaño de cada parte del multipart (S3 exige al menos 5 MiB salvo en la última)
+    EXPORT_PART_SIZE = int(os.getenv("EXPORT_PART_SIZE", 8 * 1024 * 1024))
+
+    # Importación masiva del catálogo: filas máximas por request
+    CATALOG_IMPORT_MAX_ROWS = int(os.getenv("CATALOG_IMPORT_MAX_ROWS", 5000))
+    # Reintentos con espera exponencial de los UnprocessedKeys/UnprocessedItems de batch_get_item y batch_write_item
+    BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", 5))
+    BATCH_BACKOFF_SECONDS = float(os.getenv("BATCH_BACKOFF_SECONDS", 0.05))
+
 boto3_kwargs = {"region_name": Config.AWS_REGION}
 if Config.ENVIRONMENT_MODE == "development":
     boto3_kwargs.update({
@@ -46,11 +122,49 @@ if Config.ENVIRONMENT_MODE == "development":
     })
 
 
-# Recurso para operaciones de datos (put_item, get_item, etc.)
-dynamodb = boto3.resource("dynamodb", **boto3_kwargs)
+def _instrument(client):
+    if Config.REQUEST_TRACING:
+        instrument_client(client)
+    return client
+
+
+def _build_dynamodb():
+    import boto3
+    resource = boto3.resource("dynamodb", **boto3_kwargs)
+    _instrument(resource.meta.client)
+    return resource
+
+
+def _build_dynamodb_client():
+    import boto3
+    return _instrument(boto3.client("dynamodb", **boto3_kwargs))
+
+
+def _build_cognito_client():
+    import boto3
+    return _instrument(boto3.client("cognito-idp", region_name=Config.AWS_REGION))
+
+
+def _build_s3_client():
+    import boto3
+    return _instrument(boto3.client("s3", **boto3_kwargs))
+
+
+def _build_sqs_client():
+    import boto3
+    return _instrument(boto3.client("sqs", **boto3_kwargs))
+
+
+# Los clientes se construyen en el primer uso (no al importar) para acortar el cold start en Lambda.
+# Recurso para operaciones de datos (put_item, get_item, etc.); dynamodb.Table(...) tampoco lo construye
+dynamodb = LazyResource(_build_dynamodb)
 # Cliente para administración de tablas (create_table, list_tables, etc.)
-dynamodb_client = boto3.client("dynamodb", **boto3_kwargs)
+dynamodb_client = LazyProxy(_build_dynamodb_client)
+
+cognito_client = LazyProxy(_build_cognito_client)
+
+sqs_client = LazyProxy(_build_sqs_client)
 
-cognito_client = boto3.client("cognito-idp", region_name=Config.AWS_REGION)
+s3_client = LazyProxy(_build_s3_client)
 
-__all__ = ["dynamodb", "dynamodb_client", "cognito_client"]
+__all__ = ["dynamodb", "dynamodb_client", "cognito_client", "sqs_client", "s3_client"]
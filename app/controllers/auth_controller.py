@@ -1,29 +1,69 @@
+import botocore
 from fastapi import HTTPException, status
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
-from app.config import Config, cognito_client
+from app.config import Config, cognito_client, dynamodb_client
 from app.documents.auth_models import LoginUserModel, RegisterUserModel
+from app.utils.async_io import aio
+from app.utils.responses import ORJSONResponse
 from app.utils.secret_hash import get_secret_hash
+from app.utils.transactions import cancellation_codes, transact_put, transact_update
 import logging
 
 import app.schemas.users as users
+import app.schemas.user_lookups as user_lookups
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def register_user(data: RegisterUserModel):
-    # Verifica si el NIT o Email ya existen
-    existing = users.users_db.scan(
-        FilterExpression="nit = :n OR email = :e",
-        ExpressionAttributeValues={":n": data.nit, ":e": data.email}
-    ).get("Items")
+async def reserve_user_lookups(data: RegisterUserModel):
+    """Reserva el email y el NIT con puts condicionales en una sola transacción"""
+    lookups_table = user_lookups.user_lookups_db.name
+    keys = [
+        user_lookups.UserLookupSchema.email_key(data.email),
+        user_lookups.UserLookupSchema.nit_key(data.nit),
+    ]
+    try:
+        await aio(dynamodb_client).transact_write_items(
+            TransactItems=[
+                transact_put(
+                    lookups_table,
+                    user_lookups.UserLookupSchema(id=key).to_dict(),
+                    condition="attribute_not_exists(id)",
+                )
+                for key in keys
+            ]
+        )
+    except botocore.exceptions.ClientError as e:
+        # Solo una condición fallida es un duplicado; throttling o conflictos se propagan
+        if "ConditionalCheckFailed" in cancellation_codes(e):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="NIT or Email already registered")
+        raise
+    return keys
 
-    if existing:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="NIT or Email already registered")
 
+async def release_user_lookups(keys):
+    """Libera las reservas de email y NIT si el registro no se completó"""
+    for key in keys:
+        try:
+            await aio(user_lookups.user_lookups_db).delete_item(Key={"id": key})
+        except Exception:
+            logger.warning("Release user lookup %s failed", key, exc_info=True)
+
+
+async def delete_cognito_user(email: str):
+    """Elimina el usuario recién creado en Cognito para que el email se pueda volver a registrar"""
     try:
-        response = cognito_client.sign_up(
+        await aio(cognito_client).admin_delete_user(UserPoolId=Config.AWS_COGNITO_USER_POOL_ID, Username=email)
+    except Exception:
+        logger.warning("Delete Cognito user %s failed", email, exc_info=True)
+
+
+async def register_user(data: RegisterUserModel):
+    # Reserva el NIT y el Email; falla si alguno ya existe
+    lookup_keys = await reserve_user_lookups(data)
+
+    try:
+        response = await aio(cognito_client).sign_up(
             ClientId=Config.AWS_COGNITO_CLIENT_ID,
             Username=data.email,
             Password=data.password,
@@ -37,8 +77,10 @@ def register_user(data: RegisterUserModel):
             ]
         )
     except cognito_client.exceptions.UsernameExistsException:
+        await release_user_lookups(lookup_keys)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     except Exception as e:
+        await release_user_lookups(lookup_keys)
         logger.error("Register user failed", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
@@ -52,32 +94,59 @@ def register_user(data: RegisterUserModel):
         role=data.role or users.UserSchema.RoleEnum.USER,
         id=response.get("UserSub")
     )
-    users.users_db.put_item(Item=jsonable_encoder(user))
 
-    return JSONResponse(
-        content=jsonable_encoder({
+    # Guardar el usuario y enlazar las reservas a su id en la misma transacción;
+    # si falla, se liberan las reservas y se elimina el usuario de Cognito
+    try:
+        await aio(dynamodb_client).transact_write_items(
+            TransactItems=[
+                transact_put(users.users_db.name, user.to_dict())
+            ] + [
+                transact_update(
+                    user_lookups.user_lookups_db.name,
+                    {"id": key},
+                    "SET user_id = :uid",
+                    {":uid": user.id},
+                )
+                for key in lookup_keys
+            ]
+        )
+    except Exception:
+        await release_user_lookups(lookup_keys)
+        await delete_cognito_user(data.email)
+        logger.error("Save registered user %s failed", user.id, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+
+    return ORJSONResponse(
+        content={
             "detail": "User registered successfully",
             "items": {"user_id": response.get("UserSub")}
-        }),
+        },
         status_code=status.HTTP_201_CREATED
     )
 
 
-def login_user(data: LoginUserModel):
-    user_items = users.users_db.scan(
-        FilterExpression="email = :e",
-        ExpressionAttributeValues={":e": data.email}
-    ).get("Items")
+async def get_user_by_email(email: str):
+    """Busca un usuario por email con dos lecturas por llave"""
+    lookup = (await aio(user_lookups.user_lookups_db).get_item(
+        Key={"id": user_lookups.UserLookupSchema.email_key(email)}
+    )).get("Item")
+    if not lookup or not lookup.get("user_id"):
+        return None
+    return (await aio(users.users_db).get_item(Key={"id": lookup["user_id"]})).get("Item")
+
+
+async def login_user(data: LoginUserModel):
+    user = await get_user_by_email(data.email)
 
-    if not user_items:
+    if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Email not registered")
 
-    user = user_items[0]
     if not user.get("verified", True):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not verified")
 
     try:
-        response = cognito_client.initiate_auth(
+        response = await aio(cognito_client).initiate_auth(
             ClientId=Config.AWS_COGNITO_CLIENT_ID,
             AuthFlow="USER_PASSWORD_AUTH",
             AuthParameters={
@@ -94,7 +163,7 @@ def login_user(data: LoginUserModel):
         if not access_token or not refresh_token:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Authentication failed")
 
-        user_info = cognito_client.get_user(AccessToken=access_token)
+        user_info = await aio(cognito_client).get_user(AccessToken=access_token)
         attributes = {attr["Name"]: attr["Value"] for attr in user_info.get("UserAttributes", [])}
 
         body = {
@@ -110,7 +179,7 @@ def login_user(data: LoginUserModel):
             "X-Refresh-Token": refresh_token
         }
 
-        return JSONResponse(content=jsonable_encoder(body), headers=headers, status_code=status.HTTP_200_OK)
+        return ORJSONResponse(content=body, headers=headers, status_code=status.HTTP_200_OK)
 
     except cognito_client.exceptions.NotAuthorizedException:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect username or password")
@@ -121,7 +190,7 @@ def login_user(data: LoginUserModel):
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
 
-def logout_user(authorization: str, refresh_token: str):
+async def logout_user(authorization: str, refresh_token: str):
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing access token")
     if not refresh_token:
@@ -130,7 +199,7 @@ def logout_user(authorization: str, refresh_token: str):
     access_token = authorization.split(" ")[1]
 
     try:
-        cognito_client.revoke_token(
+        await aio(cognito_client).revoke_token(
             Token=refresh_token,
             ClientId=Config.AWS_COGNITO_CLIENT_ID,
             ClientSecret=Config.AWS_COGNITO_CLIENT_SECRET
@@ -139,7 +208,7 @@ def logout_user(authorization: str, refresh_token: str):
         logger.warning("Token already revoked or invalid: %s", e)
         # Intenta cerrar sesión globalmente si revoke falla
         try:
-            cognito_client.global_sign_out(AccessToken=access_token)
+            await aio(cognito_client).global_sign_out(AccessToken=access_token)
         except Exception as e2:
             logger.warning("global_sign_out also failed: %s", e2)
 
@@ -148,4 +217,4 @@ def logout_user(authorization: str, refresh_token: str):
         "data": {}
     }
 
-    return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
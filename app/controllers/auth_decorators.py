@@ -1,7 +1,52 @@
 # app/controllers/auth_decorators.py
+import logging
 from fastapi import Request, HTTPException, status
 from app.config import Config, cognito_client
 from app.documents.auth_models import SessionUserModel
+from app.utils.async_io import run_io
+
+logger = logging.getLogger(__name__)
+
+# Atributos que necesita la sesión
+SESSION_ATTRIBUTES = ("sub", "custom:role")
+
+
+class _NeverRaised(Exception):
+    """Marcador para los errores de JWT en modo "cognito", donde no pueden ocurrir"""
+
+
+def jwt_errors():
+    """
+    (ExpiredSignatureError, InvalidTokenError) de PyJWT en modo "jwt".
+    PyJWT solo se importa en ese modo: su import pesa en el cold start.
+    """
+    if Config.AUTH_MODE != "jwt":
+        return _NeverRaised, _NeverRaised
+    import jwt
+    return jwt.ExpiredSignatureError, jwt.InvalidTokenError
+
+def get_user_attributes(access_token):
+    """
+    En modo "jwt" verifica el token localmente y toma los atributos de sus claims;
+    solo consulta GetUser si al token le falta alguno de SESSION_ATTRIBUTES.
+    En modo "cognito" siempre consulta GetUser.
+    """
+    if Config.AUTH_MODE == "jwt":
+        from app.utils.jwks import verify_access_token
+        _, invalid_token_error = jwt_errors()
+        try:
+            claims = verify_access_token(access_token)
+        except invalid_token_error:
+            raise
+        except Exception:
+            # JWKS no disponible: se valida contra Cognito
+            logger.warning("JWKS unavailable, falling back to GetUser", exc_info=True)
+        else:
+            if all(claims.get(name) for name in SESSION_ATTRIBUTES):
+                return claims
+
+    user_info = cognito_client.get_user(AccessToken=access_token)
+    return {attr["Name"]: attr["Value"] for attr in user_info["UserAttributes"]}
 
 def validate_tokens(access_header, refresh_token):
     if not access_header or not access_header.startswith("Bearer "):
@@ -10,11 +55,11 @@ def validate_tokens(access_header, refresh_token):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token requerido")
 
     access_token = access_header.split(" ")[1]
+    expired_signature_error, invalid_token_error = jwt_errors()
 
     try:
-        user_info = cognito_client.get_user(AccessToken=access_token)
-        attributes = {attr["Name"]: attr["Value"] for attr in user_info["UserAttributes"]}
-    except cognito_client.exceptions.NotAuthorizedException:
+        attributes = get_user_attributes(access_token)
+    except (cognito_client.exceptions.NotAuthorizedException, expired_signature_error):
         try:
             response = cognito_client.initiate_auth(
                 ClientId=Config.AWS_COGNITO_CLIENT_ID,
@@ -23,10 +68,11 @@ def validate_tokens(access_header, refresh_token):
             )
             access_token = response["AuthenticationResult"]["AccessToken"]
             refresh_token = response["AuthenticationResult"].get("RefreshToken", refresh_token)
-            user_info = cognito_client.get_user(AccessToken=access_token)
-            attributes = {attr["Name"]: attr["Value"] for attr in user_info["UserAttributes"]}
+            attributes = get_user_attributes(access_token)
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Token inválido o refresh token expirado: {str(e)}")
+    except invalid_token_error as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=f"Token inválido: {str(e)}")
 
     payload = {
         "user_id": attributes.get("sub"),
@@ -40,8 +86,9 @@ def get_auth_payload(request: Request):
     return validate_tokens(access_header, refresh_token)
 
 def auth_required(require_admin: bool = False):
-    def dependency(request: Request):
-        payload = get_auth_payload(request)
+    async def dependency(request: Request):
+        # La validación puede llamar a Cognito: se ejecuta en el pool de I/O
+        payload = await run_io(get_auth_payload, request)
         if require_admin and payload.get("role", "").lower() != "admin":
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Acceso denegado")
         return SessionUserModel(**payload)
@@ -1,27 +1,23 @@
 from decimal import Decimal
 from fastapi import HTTPException, status
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
-from boto3.dynamodb.types import TypeDeserializer
-from app.config import dynamodb_client
+from app.utils.responses import ORJSONResponse
+from app.config import Config, dynamodb_client
 from app.documents.auth_models import SessionUserModel
-from app.documents.bank_funds_models import CreateBankFundsModel, UpdateBankFundsModel
+from app.documents.bank_funds_models import CreateBankFundsModel, ImportBankFundsModel, UpdateBankFundsModel
+from app.utils import catalog_cache
+from app.utils.async_io import aio
+from app.utils.batch_get import batch_get_items
+from app.utils.catalog_import import INVALID, import_response, parse_rows, reject_existing, validate_rows, write_rows
+from app.utils.fieldsets import select
 from app.utils.time import get_current_time
 
-import app.schemas.category as category
 import app.schemas.bank_funds as bankFunds
-
-serializer = TypeDeserializer()
-
-def deserialize(item):
-    """Convierte un item de DynamoDB a dict normal"""
-    return {k: serializer.deserialize(v) for k, v in item.items()}
+import app.schemas.bank_funds_stats as bankFundsStats
 
 # CREATE
-def create_bank_funds_controller(user_session: SessionUserModel, data: CreateBankFundsModel):
+async def create_bank_funds_controller(user_session: SessionUserModel, data: CreateBankFundsModel):
     """Crea un nuevo fondo bancario."""
-    cat_response = category.categories_db.get_item(Key={"id": data.category_id})
-    if "Item" not in cat_response:
+    if not await catalog_cache.get_category(data.category_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category does not exist")
 
     bankfund_schema = bankFunds.BankFundsSchema(
@@ -32,33 +28,74 @@ def create_bank_funds_controller(user_session: SessionUserModel, data: CreateBan
         user_created=user_session.user_id
     )
 
-    bankFunds.bank_funds_db.put_item(Item=bankfund_schema.to_dict())
+    item = bankfund_schema.to_dict()
+    await aio(bankFunds.bank_funds_db).put_item(Item=item)
+    catalog_cache.refresh_bank_fund(item)
 
     body = {
         "detail": "Bank fund created successfully",
-        "data": bankfund_schema.to_dict(),
+        "data": item,
     }
-    return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_201_CREATED)
-
-def get_bank_funds_controller(id=None):
-    response = bankFunds.bank_funds_db.scan()
-    items = response.get("Items", [])
+    return ORJSONResponse(content=body, status_code=status.HTTP_201_CREATED)
+
+# IMPORT
+async def import_bank_funds_controller(user_session: SessionUserModel, body: bytes, content_type: str = None):
+    """
+    Crea varios fondos desde JSON o CSV con batch_write_item (bloques de 25; los de id
+    indicado, con put condicional) y devuelve el resultado por fila. Las categorías referenciadas se leen una sola vez, en lote.
+    No reemplaza fondos existentes.
+    """
+    valid, report = validate_rows(parse_rows(body, content_type), ImportBankFundsModel)
+    # Los ids indicados que ya existen se rechazan: reemplazarlos cambiaría fondos con posiciones abiertas
+    existing = await catalog_cache.get_bank_funds({data.id for _, data in valid if data.id})
+    valid, rejected = reject_existing(valid, existing)
+    report += rejected
+    categories = await catalog_cache.get_categories({data.category_id for _, data in valid})
+
+    rows = []
+    for number, data in valid:
+        if data.category_id not in categories:
+            report.append({"row": number, "status": INVALID, "errors": ["Category does not exist"]})
+            continue
+        bankfund_schema = bankFunds.BankFundsSchema(
+            name=data.name,
+            category_id=data.category_id,
+            min_amount=data.min_amount,
+            currency=data.currency or None,
+            user_created=user_session.user_id
+        )
+        if data.id:
+            bankfund_schema.id = data.id
+        rows.append((number, bankfund_schema.to_dict()))
+
+    explicit_ids = {data.id for _, data in valid if data.id}
+    report += await write_rows(bankFunds.bank_funds_db.name, rows, catalog_cache.refresh_bank_fund, explicit_ids)
+    return import_response("Bank funds import finished", report)
+
+async def get_bank_funds_controller(id=None, limit: int = Config.PAGINATION_DEFAULT_LIMIT, cursor: str = None, ids: list = None, fields: tuple = None, expand=frozenset()):
+    next_cursor = None
+    expand_category = "category" in expand
+    if fields and expand_category:
+        fields = tuple(dict.fromkeys(fields + ("category_id",)))
     if id:
-        items = [item for item in items if item.get("id") == id]
-        if not items:
+        # Lectura por llave (con caché)
+        item = await catalog_cache.get_bank_fund(id)
+        if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="BankFund not found")
-
-    # Obtener todos los category_ids únicos
-    category_ids = list({item["category_id"] for item in items if "category_id" in item})
+        items = [item]
+    elif ids:
+        # Varios ids con batch_get_item
+        found = await catalog_cache.get_bank_funds(ids)
+        items = sorted((found[fund_id] for fund_id in ids if fund_id in found), key=lambda x: x.get("created_at", ""), reverse=True)
+    else:
+        # Las páginas siguen el orden del scan: ordenar una sola página no daría un orden global
+        items, next_cursor = await catalog_cache.get_bank_funds_page(limit, cursor, fields)
+
+    # Obtener todos los category_ids únicos (solo con ?expand=category)
+    category_ids = list({item["category_id"] for item in items if "category_id" in item}) if expand_category else []
 
     if category_ids:
-        keys = [{"id": {"S": cid}} for cid in category_ids]
-        batch_response = dynamodb_client.batch_get_item(
-            RequestItems={category.categories_db.name: {"Keys": keys}}
-        )
-        categories_raw = batch_response.get("Responses", {}).get(category.categories_db.name, [])
-        categories = [deserialize(cat) for cat in categories_raw]
-        cat_map = {cat["id"]: cat for cat in categories}
+        cat_map = await catalog_cache.get_categories(category_ids)
 
         for item in items:
             cat_id = item.get("category_id")
@@ -67,12 +104,40 @@ def get_bank_funds_controller(id=None):
     
     body = {
         "detail": "Bank fund retrieved successfully",
-        "data":  sorted(items, key=lambda x: x.get("created_at", ""), reverse=True),
+        "data":  select(items, fields),
+        "next_cursor": next_cursor,
+    }
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
+
+# STATS
+async def get_bank_funds_stats_controller(limit: int = Config.PAGINATION_DEFAULT_LIMIT, cursor: str = None):
+    """
+    Suscripciones abiertas y capital por fondo: una página del catálogo (con caché)
+    y una lectura en bloque de los contadores, sin recorrer UserBankFunds.
+    """
+    funds, next_cursor = await catalog_cache.get_bank_funds_page(limit, cursor, ("name", "currency"))
+    # Los contadores no se cachean: cambian con cada suscripción
+    stats = await batch_get_items(bankFundsStats.bank_funds_stats_db.name, [fund["id"] for fund in funds], client=dynamodb_client) if funds else {}
+
+    data = [
+        {
+            "id": fund["id"],
+            "name": fund.get("name"),
+            "currency": fund.get("currency"),
+            bankFundsStats.OPEN_SUBSCRIPTIONS: stats.get(fund["id"], {}).get(bankFundsStats.OPEN_SUBSCRIPTIONS, 0),
+            bankFundsStats.ASSETS_UNDER_MANAGEMENT: stats.get(fund["id"], {}).get(bankFundsStats.ASSETS_UNDER_MANAGEMENT, 0),
+        }
+        for fund in funds
+    ]
+    body = {
+        "detail": "Bank funds stats retrieved successfully",
+        "data": data,
+        "next_cursor": next_cursor,
     }
-    return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
 
 # UPDATE
-def update_bank_fund_controller(user_session: SessionUserModel, id: str, data: UpdateBankFundsModel):
+async def update_bank_fund_controller(user_session: SessionUserModel, id: str, data: UpdateBankFundsModel):
     try:
         update_expr = []
         expr_values = {}
@@ -85,8 +150,7 @@ def update_bank_fund_controller(user_session: SessionUserModel, id: str, data: U
             expr_names["#n"] = "name"
             
         if data.category_id:
-            cat_response = category.categories_db.get_item(Key={"id": data.category_id})
-            if "Item" not in cat_response:
+            if not await catalog_cache.get_category(data.category_id):
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND, 
                     detail="Category does not exist"
@@ -112,19 +176,20 @@ def update_bank_fund_controller(user_session: SessionUserModel, id: str, data: U
         expr_values[":t"] = get_current_time()
 
         # Ejecutar update en DynamoDB
-        response = bankFunds.bank_funds_db.update_item(
+        response = await aio(bankFunds.bank_funds_db).update_item(
             Key={"id": id},
             UpdateExpression="SET " + ", ".join(update_expr),
             ExpressionAttributeValues=expr_values,
             ExpressionAttributeNames=expr_names if expr_names else None,
             ReturnValues="ALL_NEW"
         )
+        catalog_cache.refresh_bank_fund(response.get("Attributes"))
 
         body = {
             "detail": "Bank fund updated successfully",
             "data": response.get("Attributes"),
         }
-        return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_200_OK)
+        return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
         
     except HTTPException:
         raise
@@ -1,38 +1,77 @@
 from fastapi import HTTPException, status
-from fastapi.responses import JSONResponse
+from app.utils.responses import ORJSONResponse
+from app.config import Config
 from app.documents.auth_models import SessionUserModel
-from app.documents.category_models import CreateCategoryModel, UpdateCategoryModel
+from app.documents.category_models import CreateCategoryModel, ImportCategoryModel, UpdateCategoryModel
+from app.utils import catalog_cache
+from app.utils.async_io import aio
+from app.utils.catalog_import import import_response, parse_rows, reject_existing, validate_rows, write_rows
+from app.utils.fieldsets import select
 from app.utils.time import get_current_time
 import app.schemas.category as category
 
 # CREATE
-def create_category_controller(user_session: SessionUserModel, data: CreateCategoryModel):
+async def create_category_controller(user_session: SessionUserModel, data: CreateCategoryModel):
     category_schema = category.CategorySchema(user_session.user_id, data.name, data.description)
-    category.categories_db.put_item(Item=category_schema.to_dict())
+    item = category_schema.to_dict()
+    await aio(category.categories_db).put_item(Item=item)
+    catalog_cache.refresh_category(item)
 
 
     body = {
             "detail": "Category created successfully",
-            "data": category_schema.to_dict(),
+            "data": item,
         }
 
-    return JSONResponse(content=body, status_code=status.HTTP_201_CREATED)
+    return ORJSONResponse(content=body, status_code=status.HTTP_201_CREATED)
+
+# IMPORT
+async def import_categories_controller(user_session: SessionUserModel, body: bytes, content_type: str = None):
+    """
+    Crea varias categorías desde JSON o CSV con batch_write_item (bloques de 25; las de id
+    indicado, con put condicional) y devuelve el resultado por fila. No reemplaza categorías existentes.
+    """
+    valid, report = validate_rows(parse_rows(body, content_type), ImportCategoryModel)
+    # Los ids indicados que ya existen se rechazan (una lectura en lote con la caché)
+    existing = await catalog_cache.get_categories({data.id for _, data in valid if data.id})
+    valid, rejected = reject_existing(valid, existing)
+    report += rejected
+
+    rows = []
+    for number, data in valid:
+        category_schema = category.CategorySchema(user_session.user_id, data.name, data.description)
+        if data.id:
+            category_schema.id = data.id
+        rows.append((number, category_schema.to_dict()))
+
+    explicit_ids = {data.id for _, data in valid if data.id}
+    report += await write_rows(category.categories_db.name, rows, catalog_cache.refresh_category, explicit_ids)
+    return import_response("Categories import finished", report)
 
 # READ
-def get_categories_controller(id:str=None):
-    response = category.categories_db.scan()
-    items = response.get("Items", [])
+async def get_categories_controller(id:str=None, limit: int = Config.PAGINATION_DEFAULT_LIMIT, cursor: str = None, ids: list = None, fields: tuple = None):
+    next_cursor = None
     if id:
-        items = [item for item in items if item.get("id") == id]
-        if not items:
+        # Lectura por llave (con caché)
+        item = await catalog_cache.get_category(id)
+        if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+        items = [item]
+    elif ids:
+        # Varios ids con batch_get_item
+        found = await catalog_cache.get_categories(ids)
+        items = sorted((found[category_id] for category_id in ids if category_id in found), key=lambda x: x.get("created_at", ""), reverse=True)
+    else:
+        # Las páginas siguen el orden del scan: ordenar una sola página no daría un orden global
+        items, next_cursor = await catalog_cache.get_categories_page(limit, cursor, fields)
     body = {
             "detail": "Category retrieved successfully",
-            "data":  sorted(items, key=lambda x: x.get("created_at", ""), reverse=True),
+            "data":  select(items, fields),
+            "next_cursor": next_cursor,
         }
-    return JSONResponse(content=body, status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
 
-def update_category_controller(user_session: SessionUserModel, id: str, data: UpdateCategoryModel):
+async def update_category_controller(user_session: SessionUserModel, id: str, data: UpdateCategoryModel):
     update_expr = []
     expr_values = {}
     expr_names = {}  # <- aquí guardamos los alias
@@ -56,16 +95,17 @@ def update_category_controller(user_session: SessionUserModel, id: str, data: Up
     update_expr.append("updated_at = :t")
     expr_values[":t"] = get_current_time()
 
-    response = category.categories_db.update_item(
+    response = await aio(category.categories_db).update_item(
         Key={"id": id},
         UpdateExpression="SET " + ", ".join(update_expr),
         ExpressionAttributeValues=expr_values,
         ExpressionAttributeNames=expr_names if expr_names else None,  # <- agregamos aquí
         ReturnValues="ALL_NEW"
     )
+    catalog_cache.refresh_category(response.get("Attributes"))
 
     body = {
         "detail": "Category updated successfully",
         "data": response.get("Attributes"),
     }
-    return JSONResponse(content=body, status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
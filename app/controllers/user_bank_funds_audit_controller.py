@@ -1,28 +1,112 @@
+import asyncio
+import uuid
 from fastapi import HTTPException, status
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from app.utils.responses import ORJSONResponse
+from app.config import Config, dynamodb_client, s3_client
 from app.documents.auth_models import SessionUserModel
+from app.utils.async_io import aio
+from app.utils.export import EXPORT_MEDIA_TYPES, csv_chunks, date_range_key_condition, ndjson_chunks, upload_export
+from app.utils.fieldsets import projection, select
+from app.utils.pagination import iterate_raw, paginate, paginate_raw
 
 import app.schemas.user_bank_funds_audit as userBankFundsAudit
 
-# READ
-def get_user_bank_funds_audit_controller(user_session: SessionUserModel, user_bank_funds_audit_id: str = None):
 
-    # Buscar todos los items de un usuario con scan
-    response = userBankFundsAudit.user_bank_funds_audit_db.scan(
-        FilterExpression="user_id = :uid",
-        ExpressionAttributeValues={":uid": user_session.user_id},
+def _history_query(user_session: SessionUserModel, date_from: str = None, date_to: str = None):
+    """Query de la historia del usuario (más reciente primero), acotada por fechas sobre el sort key"""
+    condition, values = date_range_key_condition(date_from, date_to)
+    values[":uid"] = user_session.user_id
+    return {
+        "KeyConditionExpression": "user_id = :uid" + (f" AND {condition}" if condition else ""),
+        "ExpressionAttributeValues": values,
+        "ScanIndexForward": False,
+    }
+
+
+async def _get_by_id(audit_id: str, user_id: str):
+    """Lectura por id con el índice por id; None si no existe o es de otro usuario"""
+    response = await aio(userBankFundsAudit.user_bank_funds_audit_db).query(
+        IndexName=userBankFundsAudit.AUDIT_ID_INDEX,
+        KeyConditionExpression="id = :id",
+        ExpressionAttributeValues={":id": audit_id},
     )
-    items = response.get("Items", [])
-    
+    items = [item for item in response.get("Items", []) if item.get("user_id") == user_id]
+    return items[0] if items else None
+
+
+# READ
+async def get_user_bank_funds_audit_controller(user_session: SessionUserModel, user_bank_funds_audit_id: str = None, limit: int = Config.PAGINATION_DEFAULT_LIMIT, cursor: str = None, ids: list = None, fields: tuple = None, date_from: str = None, date_to: str = None):
+    next_cursor = None
     if user_bank_funds_audit_id:
-        items = [item for item in items if item.get("id") == user_bank_funds_audit_id]
-        if not items:
+        # Solo se devuelve si pertenece al usuario
+        item = await _get_by_id(user_bank_funds_audit_id, user_session.user_id)
+        if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User bank funds audit not found")
-    
-    
+        items = [item]
+    elif ids:
+        # Varios ids en paralelo, descartando los de otros usuarios
+        found = await asyncio.gather(*(_get_by_id(audit_id, user_session.user_id) for audit_id in ids))
+        items = [item for item in found if item]
+    else:
+        # Una página de la historia del usuario, ya ordenada por el sort key
+        query_kwargs = {
+            "limit": limit,
+            "cursor": cursor,
+            **_history_query(user_session, date_from, date_to),
+            **projection(fields),
+        }
+        if Config.RAW_LIST_READS:
+            items, next_cursor = await paginate_raw(userBankFundsAudit.user_bank_funds_audit_db.name, dynamodb_client, operation="query", **query_kwargs)
+        else:
+            items, next_cursor = await paginate(userBankFundsAudit.user_bank_funds_audit_db, operation="query", **query_kwargs)
+
     body = {
         "detail": "User bank funds audit retrieved successfully",
-        "data": sorted(items, key=lambda x: x.get("created_at", ""), reverse=True),
+        "data": select(items, fields),
+        "next_cursor": next_cursor,
     }
-    return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
+
+
+# EXPORT
+async def export_user_bank_funds_audit_controller(user_session: SessionUserModel, date_from: str = None, date_to: str = None, format: str = "ndjson"):
+    """
+    Exporta la auditoría del usuario en NDJSON o CSV sin armar la lista completa:
+    las páginas de la query se convierten una a una, así la memoria no depende del
+    largo del historial. Con EXPORT_BUCKET el archivo se sube a S3 y se responde una
+    URL prefirmada (API Gateway + Lambda no transmiten la respuesta en streaming y la
+    limitan a 6 MB); sin bucket, las páginas se escriben directo al cuerpo de la respuesta.
+    """
+    pages = iterate_raw(
+        userBankFundsAudit.user_bank_funds_audit_db.name,
+        dynamodb_client,
+        **_history_query(user_session, date_from, date_to),
+    )
+
+    if format == "csv":
+        chunks = csv_chunks(pages, userBankFundsAudit.UserBankFundsAuditSchema.field_names())
+    else:
+        chunks = ndjson_chunks(pages)
+
+    filename = f"user-bank-funds-audit.{format}"
+    if Config.EXPORT_BUCKET:
+        key = f"exports/{user_session.user_id}/{uuid.uuid4()}.{format}"
+        await upload_export(chunks, Config.EXPORT_BUCKET, key, EXPORT_MEDIA_TYPES[format], s3_client)
+        # La firma es local: no hay llamada a S3
+        url = s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": Config.EXPORT_BUCKET, "Key": key, "ResponseContentDisposition": f'attachment; filename="{filename}"'},
+            ExpiresIn=Config.EXPORT_URL_EXPIRES_SECONDS,
+        )
+        body = {
+            "detail": "User bank funds audit exported successfully",
+            "data": {"url": url, "expires_in": Config.EXPORT_URL_EXPIRES_SECONDS},
+        }
+        return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
+
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
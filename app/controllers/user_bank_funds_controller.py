@@ -1,65 +1,75 @@
+import botocore
 from decimal import Decimal
 from fastapi import status, HTTPException
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from app.utils.responses import ORJSONResponse
+from app.config import dynamodb_client
 from app.documents.auth_models import SessionUserModel
-from app.utils.send_email import send_insufficient_funds_email, send_retired_funds_email, send_subscription_funds_email
+from app.documents.user_bank_funds_models import BULK_MAX_FUNDS
+from app.utils import catalog_cache
+from app.utils.async_io import aio
+from app.utils.fieldsets import projection, select
+from app.utils.lazy import lazy_import
+from app.utils.send_email import (
+    send_bulk_insufficient_funds_email,
+    send_bulk_subscription_email,
+    send_insufficient_funds_email,
+    send_retired_funds_email,
+    send_subscription_funds_email,
+)
 from app.utils.time import get_current_time
+from app.utils.transactions import cancellation_codes, transact_put, transact_update
+from app.schemas.bank_funds import CURRENCIES
 
 import app.schemas.users as users
-import app.schemas.bank_funds as bankFunds
+import app.schemas.bank_funds_stats as bankFundsStats
 import app.schemas.user_bank_funds as userBankFunds
 import app.schemas.user_bank_funds_audit as userBankFundsAudit
 
+# boto3 se importa en el primer uso (cold start)
+conditions = lazy_import("boto3.dynamodb.conditions")
+
+
 # CREATE
-def create_user_bank_fund_controller(user_session:SessionUserModel, bank_funds_id:str):
+async def create_user_bank_fund_controller(user_session:SessionUserModel, bank_funds_id:str):
     # Buscar el usuario en la tabla de usuarios
-    user_response = users.users_db.get_item(Key={"id": user_session.user_id})
+    user_response = await aio(users.users_db).get_item(Key={"id": user_session.user_id})
     user = user_response.get("Item")
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Verificar que el BankFund existe
-    bf_response = bankFunds.bank_funds_db.get_item(Key={"id": bank_funds_id})
-    bank_fund = bf_response.get("Item")
+    bank_fund = await catalog_cache.get_bank_fund(bank_funds_id)
     if not bank_fund:
         raise HTTPException(status_code=404, detail="BankFund not found")
 
-    # Validar saldo disponible
+    # Validar saldo disponible (la validación definitiva es la condición de la transacción)
     user_amount = Decimal(user.get("amount", "0"))
     min_amount = Decimal(bank_fund["min_amount"])
 
     if user_amount < min_amount:
-        send_insufficient_funds_email(
-            to_email=user.get("email"),
-            user_name=user.get("name"),
-            bank_fund=bank_fund
-        )
-        raise HTTPException(status_code=400, detail=f"No tiene saldo disponible para vincularse al fondo {bank_fund['name']}")
-
-    # Actualizar saldo del usuario
-    new_amount = user_amount - min_amount
-    users.users_db.update_item(
-        Key={"id": user['id']},
-        UpdateExpression="SET amount = :a, updated_at = :u",
-        ExpressionAttributeValues={
-            ":a": new_amount,
-            ":u": get_current_time()
-        }
-    )
+        raise_insufficient_funds(user, bank_fund)
 
     # Crear relación user-bankfund y su auditoría
     user_bank_funds = userBankFunds.UserBankFundsSchema(
         user_id=user['id'],
-        bank_fund_id=bank_funds_id,
+        bank_funds_id=bank_funds_id,
         amount=min_amount,
         currency=bank_fund["currency"],
         status='OPEN'
     )
-    user_bank_funds_audit = userBankFundsAudit.UserBankFundsAuditSchema(parent=user_bank_funds)
+    item = user_bank_funds.to_dict()
 
-    userBankFunds.user_bank_funds_db.put_item(Item=user_bank_funds.to_dict())
-    userBankFundsAudit.user_bank_funds_audit_db.put_item(Item=user_bank_funds_audit.to_dict())
+    # Débito condicional del saldo (con los agregados del portafolio), relación, auditoría y contadores del fondo en una sola transacción
+    try:
+        await aio(dynamodb_client).transact_write_items(
+            TransactItems=subscription_items(user['id'], [user_bank_funds])
+        )
+    except botocore.exceptions.ClientError as e:
+        codes = cancellation_codes(e)
+        if codes and codes[0] == "ConditionalCheckFailed":
+            # Otro débito concurrente dejó el saldo por debajo del mínimo
+            raise_insufficient_funds(user, bank_fund)
+        raise
 
     # Enviar correo de confirmación
     send_subscription_funds_email(
@@ -70,99 +80,274 @@ def create_user_bank_fund_controller(user_session:SessionUserModel, bank_funds_i
     
     body = {
         "detail": "User bank funds created successfully",
-        "data": user_bank_funds.to_dict()
+        "data": item
 
     }
-    return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_201_CREATED)
+    return ORJSONResponse(content=body, status_code=status.HTTP_201_CREATED)
+
+# CREATE (BULK)
+async def create_user_bank_funds_bulk_controller(user_session:SessionUserModel, bank_funds_ids:list):
+    """
+    Suscribe al usuario a varios fondos: una lectura del usuario, los fondos en bloque
+    (caché + batch_get_item), una validación del mínimo total y todas las posiciones en
+    una sola transacción (hasta BULK_MAX_FUNDS fondos), con un solo correo de resumen.
+    """
+    bank_funds_ids = list(dict.fromkeys(bank_funds_ids))
+    if len(bank_funds_ids) > BULK_MAX_FUNDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Too many bank funds (max {BULK_MAX_FUNDS})")
+    user_response = await aio(users.users_db).get_item(Key={"id": user_session.user_id})
+    user = user_response.get("Item")
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    found = await catalog_cache.get_bank_funds(bank_funds_ids)
+    missing = [bank_funds_id for bank_funds_id in bank_funds_ids if bank_funds_id not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"BankFunds not found: {', '.join(missing)}")
+    bank_funds = [found[bank_funds_id] for bank_funds_id in bank_funds_ids]
+
+    # Validar el mínimo total contra el saldo (la validación definitiva es la condición de la transacción)
+    total = sum((Decimal(bank_fund["min_amount"]) for bank_fund in bank_funds), Decimal("0"))
+    if Decimal(user.get("amount", "0")) < total:
+        raise_insufficient_funds_bulk(user, bank_funds, total)
+
+    positions = [
+        userBankFunds.UserBankFundsSchema(
+            user_id=user['id'],
+            bank_funds_id=bank_fund["id"],
+            amount=Decimal(bank_fund["min_amount"]),
+            currency=bank_fund["currency"],
+            status='OPEN'
+        )
+        for bank_fund in bank_funds
+    ]
+
+    # Todo o nada: si falla la transacción no queda ninguna posición abierta
+    try:
+        await aio(dynamodb_client).transact_write_items(TransactItems=subscription_items(user['id'], positions))
+    except botocore.exceptions.ClientError as e:
+        codes = cancellation_codes(e)
+        if codes and codes[0] == "ConditionalCheckFailed":
+            # Otro débito concurrente dejó el saldo por debajo del total
+            raise_insufficient_funds_bulk(user, bank_funds, total)
+        raise
+
+    # Un solo correo con los fondos suscritos
+    send_bulk_subscription_email(
+        to_email=user.get("email"),
+        user_name=user.get("name"),
+        bank_funds=bank_funds
+    )
+
+    body = {
+        "detail": "User bank funds created successfully",
+        "data": [position.to_dict() for position in positions],
+    }
+    return ORJSONResponse(content=body, status_code=status.HTTP_201_CREATED)
+
+def subscription_items(user_id: str, positions):
+    """
+    Operaciones de la transacción que abre `positions`: el débito condicional del total
+    con los agregados del usuario y, por posición, la relación, su auditoría y los contadores del fondo.
+    """
+    total = sum((position.amount for position in positions), Decimal("0"))
+    invested = {}
+    for position in positions:
+        key = users.UserSchema.invested_key(position.currency)
+        invested[key] = invested.get(key, Decimal("0")) + position.amount
+
+    names = {"#pos": users.OPEN_POSITIONS}
+    values = {":neg": -total, ":min": total, ":count": len(positions), ":u": get_current_time()}
+    additions = ["amount :neg", "#pos :count"]
+    for index, (key, amount) in enumerate(invested.items()):
+        names[f"#inv{index}"] = key
+        values[f":inv{index}"] = amount
+        additions.append(f"#inv{index} :inv{index}")
+
+    items = [
+        transact_update(
+            users.users_db.name,
+            {"id": user_id},
+            "SET updated_at = :u ADD " + ", ".join(additions),
+            values,
+            condition="amount >= :min",
+            names=names,
+        )
+    ]
+    for position in positions:
+        items.append(transact_put(userBankFunds.user_bank_funds_db.name, position.to_dict()))
+        items.append(transact_put(
+            userBankFundsAudit.user_bank_funds_audit_db.name,
+            userBankFundsAudit.UserBankFundsAuditSchema(parent=position).to_dict(),
+        ))
+        items.append(fund_stats_update(position.bank_funds_id, position.amount, 1))
+    return items
+
+def portfolio_names(currency):
+    """Alias de los agregados del usuario que cambian con una posición en esa moneda"""
+    return {"#inv": users.UserSchema.invested_key(currency), "#pos": users.OPEN_POSITIONS}
+
+def fund_stats_update(bank_funds_id: str, amount: Decimal, subscriptions: int):
+    """Operación de la transacción que ajusta los contadores del fondo (crea el item si no existe)"""
+    return transact_update(
+        bankFundsStats.bank_funds_stats_db.name,
+        {"id": bank_funds_id},
+        "ADD #subs :subs, #aum :aum",
+        {":subs": subscriptions, ":aum": amount},
+        names={"#subs": bankFundsStats.OPEN_SUBSCRIPTIONS, "#aum": bankFundsStats.ASSETS_UNDER_MANAGEMENT},
+    )
+
+def raise_insufficient_funds(user, bank_fund):
+    send_insufficient_funds_email(
+        to_email=user.get("email"),
+        user_name=user.get("name"),
+        bank_fund=bank_fund
+    )
+    raise HTTPException(status_code=400, detail=f"No tiene saldo disponible para vincularse al fondo {bank_fund['name']}")
+
+def raise_insufficient_funds_bulk(user, bank_funds, total):
+    send_bulk_insufficient_funds_email(
+        to_email=user.get("email"),
+        user_name=user.get("name"),
+        bank_funds=bank_funds,
+        total=total
+    )
+    raise HTTPException(status_code=400, detail=f"No tiene saldo disponible para vincularse a los fondos (mínimo total {total})")
 
 # READ
-def get_user_bank_funds_controller(user_session:SessionUserModel, id:str=None):
+async def get_user_bank_funds_controller(user_session:SessionUserModel, id:str=None, fields: tuple = None):
     if id:
-        response = userBankFunds.user_bank_funds_db.get_item(Key={"id": id})
-        return {'item': response.get("Item")}, 200
+        response = await aio(userBankFunds.user_bank_funds_db).get_item(Key={"id": id})
+        item = response.get("Item")
+        if not item or item.get("user_id") != user_session.user_id:
+            raise HTTPException(status_code=404, detail="User bank fund not found")
+        body = {
+            "detail": "User bank fund retrieved successfully",
+            "data": item,
+        }
+        return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
 
-    # Buscar todos los items de un usuario con scan
-    response = userBankFunds.user_bank_funds_db.scan(
-        FilterExpression="user_id = :uid",
-        ExpressionAttributeValues={":uid": user_session.user_id},
-    )
-    items = response.get("Items", [])
+    # Consultar los items del usuario por el índice user_id, del más reciente al más antiguo
+    query_kwargs = {
+        "IndexName": userBankFunds.USER_ID_INDEX,
+        "KeyConditionExpression": conditions.Key("user_id").eq(user_session.user_id),
+        "ScanIndexForward": False,
+        **projection(fields),
+    }
+    items = []
+    while True:
+        response = await aio(userBankFunds.user_bank_funds_db).query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
 
     body = {
         "detail": "User bank funds retrieved successfully",
-        "data": sorted(items, key=lambda x: x.get("created_at", ""), reverse=True),
+        "data": select(items, fields),
+    }
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
+
+# SUMMARY
+async def get_user_bank_funds_summary_controller(user_session:SessionUserModel):
+    # Una lectura por llave: los agregados se mantienen en el item del usuario
+    response = await aio(users.users_db).get_item(
+        Key={"id": user_session.user_id},
+        **projection(("amount", "currency", users.OPEN_POSITIONS) + users.INVESTED_KEYS, required=()),
+    )
+    user = response.get("Item")
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
 
+    invested = {
+        currency.value: user[key]
+        for currency, key in zip(CURRENCIES, users.INVESTED_KEYS)
+        if user.get(key)
     }
-    return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_200_OK)
+    body = {
+        "detail": "User bank funds summary retrieved successfully",
+        "data": {
+            "available_balance": user.get("amount", 0),
+            "currency": user.get("currency"),
+            "open_positions": user.get(users.OPEN_POSITIONS, 0),
+            "invested": invested,
+        },
+    }
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
 
 # DELETE
-def delete_user_bank_fund_controller(user_session:SessionUserModel, user_bank_funds_id:str):
+async def delete_user_bank_fund_controller(user_session:SessionUserModel, user_bank_funds_id:str):
     # Buscar el usuario en la tabla de usuarios
-    user_response = users.users_db.get_item(Key={"id": user_session.user_id})
+    user_response = await aio(users.users_db).get_item(Key={"id": user_session.user_id})
     user = user_response.get("Item")
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    # Verificar que el UserBankFund existe
-    response = userBankFunds.user_bank_funds_db.get_item(Key={"id": user_bank_funds_id})
+    # Verificar que el UserBankFund existe y es del usuario
+    response = await aio(userBankFunds.user_bank_funds_db).get_item(Key={"id": user_bank_funds_id})
     user_bank_fund = response.get("Item")
-    if not user_bank_fund:
+    if not user_bank_fund or user_bank_fund.get("user_id") != user_session.user_id:
         raise HTTPException(status_code=404, detail="User bank fund not found")
+    if user_bank_fund.get("status") != userBankFunds.UserBankFundsSchema.StatusEnum.OPEN:
+        raise_already_closed()
 
     # Verificar que el BankFund existe
-    response = bankFunds.bank_funds_db.get_item(Key={"id": user_bank_fund.get("bank_funds_id")})
-    bank_fund = response.get("Item")
+    bank_fund = await catalog_cache.get_bank_fund(user_bank_fund.get("bank_funds_id"))
     if not bank_fund:
         raise HTTPException(status_code=404, detail="Bank fund not found")
 
-
-    # Actualizar saldo del usuario
-    user_amount = Decimal(user.get("amount", "0"))
-    refund_amount = Decimal(bank_fund["min_amount"])
-    new_amount = user_amount + refund_amount
-
-    users.users_db.update_item(
-        Key={"id": user['id']},
-        UpdateExpression="SET amount = :a, updated_at = :u",
-        ExpressionAttributeValues={
-            ":a": new_amount,
-            ":u": get_current_time()
-        }
+    # Se devuelve el monto de la posición (lo que se debitó al suscribirse)
+    refund_amount = Decimal(user_bank_fund.get("amount", "0"))
+    user_bank_funds_schema = userBankFunds.UserBankFundsSchema.from_dict(
+        dict(user_bank_fund, status="CLOSED")
     )
-
-    # Actualizar estado del UserBankFund
-    updated_at = get_current_time()
-    userBankFunds.user_bank_funds_db.update_item(
-        Key={"id": user_bank_funds_id},
-        UpdateExpression="SET #s = :s, updated_at = :u",
-        ExpressionAttributeNames={
-            "#s": "status"
-        },
-        ExpressionAttributeValues={
-            ":s": "CLOSED",
-            ":u": updated_at
-        }
-    )
-
-    # Obtener el UserBankFund actualizado
-    updated_response = userBankFunds.user_bank_funds_db.get_item(Key={"id": user_bank_funds_id})
-    updated_user_bank_fund = updated_response.get("Item")
-
-    # Registrar en auditoría
-    user_bank_funds_schema = userBankFunds.UserBankFundsSchema.from_dict(updated_user_bank_fund)
     user_bank_fund_audit = userBankFundsAudit.UserBankFundsAuditSchema(parent=user_bank_funds_schema)
-    userBankFundsAudit.user_bank_funds_audit_db.put_item(Item=user_bank_fund_audit.to_dict())
+
+    # Reintegro del saldo (con los agregados), cierre condicional de la posición, auditoría y contadores del fondo en una sola transacción
+    try:
+        await aio(dynamodb_client).transact_write_items(
+            TransactItems=[
+                transact_update(
+                    users.users_db.name,
+                    {"id": user['id']},
+                    "SET updated_at = :u ADD amount :refund, #inv :neg, #pos :minus_one",
+                    {":refund": refund_amount, ":neg": -refund_amount, ":minus_one": -1, ":u": user_bank_funds_schema.updated_at},
+                    condition="attribute_exists(id)",
+                    names=portfolio_names(user_bank_fund.get("currency")),
+                ),
+                transact_update(
+                    userBankFunds.user_bank_funds_db.name,
+                    {"id": user_bank_funds_id},
+                    "SET #s = :closed, updated_at = :u",
+                    {":closed": "CLOSED", ":open": "OPEN", ":u": user_bank_funds_schema.updated_at},
+                    condition="#s = :open",
+                    names={"#s": "status"},
+                ),
+                transact_put(userBankFundsAudit.user_bank_funds_audit_db.name, user_bank_fund_audit.to_dict()),
+                fund_stats_update(user_bank_fund["bank_funds_id"], -refund_amount, -1),
+            ]
+        )
+    except botocore.exceptions.ClientError as e:
+        codes = cancellation_codes(e)
+        if len(codes) > 1 and codes[1] == "ConditionalCheckFailed":
+            # Otra cancelación concurrente ya cerró la posición
+            raise_already_closed()
+        raise
 
     # Enviar correo de confirmación
     send_retired_funds_email(
         to_email=user.get("email"),
         user_name=user.get("name"),
-        bank_fund=bank_fund
+        bank_fund=bank_fund,
+        refund_amount=refund_amount,
+        currency=user_bank_fund.get("currency"),
     )
 
     body = {
         "detail": "User bank funds deleted successfully",
         "data": user_bank_funds_schema.to_dict()
     }
-    return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
 
+def raise_already_closed():
+    raise HTTPException(status_code=400, detail="User bank fund is already closed")
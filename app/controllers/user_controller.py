@@ -1,21 +1,28 @@
 from fastapi import HTTPException, status
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from app.utils.responses import ORJSONResponse
+from app.config import Config
 from app.documents.auth_models import SessionUserModel
+from app.utils.async_io import aio
+from app.utils.fieldsets import projection, select
+from app.utils.pagination import paginate
 
 import app.schemas.users as users
 
-def get_all_users_controller(user_session: SessionUserModel=None):
+async def get_all_users_controller(user_session: SessionUserModel=None, limit: int = Config.PAGINATION_DEFAULT_LIMIT, cursor: str = None, fields: tuple = None):
     """Obtener todos los usuarios (solo admin)"""
-    response = users.users_db.scan()
-    items = response.get("Items", [])
+    next_cursor = None
     if user_session:
-        items = [item for item in items if item.get("id") == user_session.user_id]
-        if not items:
+        # Solo el usuario autenticado: lectura por llave
+        item = (await aio(users.users_db).get_item(Key={"id": user_session.user_id})).get("Item")
+        if not item:
             raise HTTPException(status_code=404, detail="User not found")
+        items = [item]
+    else:
+        items, next_cursor = await paginate(users.users_db, limit=limit, cursor=cursor, **projection(fields))
 
     body = {
         "detail": "User retrieved successfully",
-        "data": items
+        "data": select(items, fields),
+        "next_cursor": next_cursor,
     }
-    return JSONResponse(content=jsonable_encoder(body), status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=body, status_code=status.HTTP_200_OK)
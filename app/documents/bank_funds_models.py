@@ -23,4 +23,7 @@ class UpdateBankFundsModel(BaseModel):
     def strip_strings(cls, v):
         if isinstance(v, str):
             return v.strip()
-        return v
\ No newline at end of file
+        return v
+
+class ImportBankFundsModel(CreateBankFundsModel):
+    id: Optional[str] = Field(None, title="ID (opcional; si ya existe la fila se rechaza)", json_schema_extra={"example": "fpv-btg-pactual-recaudadora"})
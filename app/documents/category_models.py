@@ -20,3 +20,7 @@ class UpdateCategoryModel(BaseModel):
         if isinstance(v, str):
             return v.strip()
         return v
+
+
+class ImportCategoryModel(CreateCategoryModel):
+    id: Optional[str] = Field(None, title="ID (opcional; si ya existe la fila se rechaza)", json_schema_extra={"example": "cat-inversiones"})
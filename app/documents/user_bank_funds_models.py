@@ -1,6 +1,10 @@
 from pydantic import BaseModel, Field
 from decimal import Decimal
-from typing import Optional
+from typing import List, Optional
+from app.utils.transactions import TRANSACT_MAX_ITEMS
+
+# Fondos por suscripción múltiple: una sola transacción con el débito más 3 operaciones por fondo
+BULK_MAX_FUNDS = (TRANSACT_MAX_ITEMS - 1) // 3
 
 class CreateUserBankFundsModel(BaseModel):
     name: str = Field(..., example="User Fund A")
@@ -14,3 +18,7 @@ class UpdateUserBankFundsModel(BaseModel):
     bank_fund_id: Optional[str] = None
     amount: Optional[Decimal] = None
     currency: Optional[str] = None
+
+
+class BulkUserBankFundsModel(BaseModel):
+    bank_funds_ids: List[str] = Field(..., min_length=1, max_length=BULK_MAX_FUNDS, example=["fund-1", "fund-2"])
@@ -1,11 +1,75 @@
-from app.utils.create_table import create_table
+from app.utils.create_table import create_table, enable_ttl
+from app.schemas.idempotency_keys import TTL_ATTRIBUTE as IDEMPOTENCY_TTL_ATTRIBUTE
+from app.schemas.user_bank_funds import USER_ID_INDEX
+from app.schemas.user_bank_funds_audit import AUDIT_ID_INDEX, USER_BANK_FUNDS_AUDIT_TABLE
 
-tables = ["Users","Categories","BankFunds","UserBankFunds","UserBankFundsAudit"]
+tables = ["Users","UserLookups","Categories","BankFunds","BankFundsStats","UserBankFunds",USER_BANK_FUNDS_AUDIT_TABLE,"IdempotencyKeys"]
+
+# Atributo TTL por tabla (los items vencidos se borran solos)
+ttl = {
+    "IdempotencyKeys": IDEMPOTENCY_TTL_ATTRIBUTE,
+}
+
+# Llaves por tabla (por defecto solo `id` como partición)
+keys = {
+    USER_BANK_FUNDS_AUDIT_TABLE: {
+        "key_schema": [
+            {"AttributeName": "user_id", "KeyType": "HASH"},
+            {"AttributeName": "sk", "KeyType": "RANGE"},
+        ],
+        "attribute_definitions": [
+            {"AttributeName": "user_id", "AttributeType": "S"},
+            {"AttributeName": "sk", "AttributeType": "S"},
+        ],
+    },
+}
+
+# Índices secundarios globales por tabla
+indexes = {
+    "UserBankFunds": {
+        "attribute_definitions": [
+            {"AttributeName": "user_id", "AttributeType": "S"},
+            {"AttributeName": "created_at", "AttributeType": "S"},
+        ],
+        "global_secondary_indexes": [
+            {
+                "IndexName": USER_ID_INDEX,
+                "KeySchema": [
+                    {"AttributeName": "user_id", "KeyType": "HASH"},
+                    {"AttributeName": "created_at", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+    },
+    USER_BANK_FUNDS_AUDIT_TABLE: {
+        "attribute_definitions": [
+            {"AttributeName": "id", "AttributeType": "S"},
+        ],
+        "global_secondary_indexes": [
+            {
+                "IndexName": AUDIT_ID_INDEX,
+                "KeySchema": [
+                    {"AttributeName": "id", "KeyType": "HASH"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+        ],
+    },
+}
 
 def dynamo_db():
     for table_name in tables:
+        table_keys = keys.get(table_name, {
+            "key_schema": [{"AttributeName": "id", "KeyType": "HASH"}],
+            "attribute_definitions": [{"AttributeName": "id", "AttributeType": "S"}],
+        })
+        table_indexes = indexes.get(table_name, {})
         create_table(
             table_name=table_name,
-            key_schema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            attribute_definitions=[{"AttributeName": "id", "AttributeType": "S"}],
-        )
\ No newline at end of file
+            key_schema=table_keys["key_schema"],
+            attribute_definitions=table_keys["attribute_definitions"] + table_indexes.get("attribute_definitions", []),
+            global_secondary_indexes=table_indexes.get("global_secondary_indexes"),
+        )
+        if table_name in ttl:
+            enable_ttl(table_name, ttl[table_name])
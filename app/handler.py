@@ -1,5 +1,38 @@
+import json
+
 from mangum import Mangum
+from app.config import Config, sqs_client
 from app.main import app as fastapi_app
+from app.utils.email_outbox import outbox
+
+mangum_handler = Mangum(fastapi_app)
 
-handler = Mangum(fastapi_app)
+def handler(event, context):
+    response = mangum_handler(event, context)
+    if Config.EMAIL_QUEUE_URL:
+        # Entrega durable: los correos de la invocación pasan a SQS (una llamada por cada 10) y los envía `mailer`
+        outbox.hand_off(Config.EMAIL_QUEUE_URL, sqs_client)
+    else:
+        # Lambda congela el contenedor al responder: espera acotada (nada si la cola está vacía);
+        # lo que no alcance a salir se envía cuando el contenedor atienda la siguiente invocación
+        outbox.flush(timeout=Config.EMAIL_LAMBDA_FLUSH_SECONDS)
+    return response
 
+def mailer(event, context):
+    """
+    Consumidor de la cola SQS de correos: envía cada mensaje por SMTP sobre la conexión
+    reutilizada, un solo intento por mensaje. Los que fallan se reportan en batchItemFailures
+    para que SQS los reintente (y los mueva a su dead-letter queue al agotar los intentos).
+    Si a la invocación le queda menos de EMAIL_MAILER_RESERVE_SECONDS, los mensajes restantes
+    se devuelven sin intentar: un timeout de Lambda reintentaría el lote completo, incluidos
+    los correos ya enviados.
+    """
+    failures = []
+    records = event.get("Records", [])
+    for index, record in enumerate(records):
+        if context is not None and context.get_remaining_time_in_millis() < Config.EMAIL_MAILER_RESERVE_SECONDS * 1000:
+            failures.extend({"itemIdentifier": pending["messageId"]} for pending in records[index:])
+            break
+        if not outbox.deliver(json.loads(record["body"]), dead_letter=False, retries=0):
+            failures.append({"itemIdentifier": record["messageId"]})
+    return {"batchItemFailures": failures}
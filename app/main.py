@@ -3,6 +3,10 @@ from fastapi import FastAPI
 from app.routes.routes import main_routes
 from app.config import Config
 from app.dynamo_db import dynamo_db
+from app.utils.email_outbox import outbox
+from app.utils.metrics import MetricsMiddleware
+from app.utils.request_tracing import RequestTracingMiddleware
+from app.utils.responses import ORJSONResponse
 
 def create_app() -> FastAPI:
     """
@@ -22,10 +26,19 @@ def create_app() -> FastAPI:
         },
         docs_url="/swagger",  # cambia la ruta de swagger (por defecto /docs)
         redoc_url="/redocs",  # cambia la ruta de redoc (por defecto /redoc)
+        default_response_class=ORJSONResponse,  # serializa con orjson (ver utils/responses.py)
     )
 
 
 
+    # Histogramas de latencia por ruta y contadores de llamadas (va dentro del tracing para ver sus llamadas)
+    if Config.METRICS_MODE != "off":
+        app.add_middleware(MetricsMiddleware)
+
+    # Server-Timing y log estructurado con las llamadas a DynamoDB, Cognito y SMTP de cada request
+    if Config.REQUEST_TRACING:
+        app.add_middleware(RequestTracingMiddleware)
+
     # Guardar configuración global en app.state
     app.state.config = Config
 
@@ -35,6 +48,11 @@ def create_app() -> FastAPI:
         async def startup_event():
             dynamo_db()  # Aquí inicializas tus tablas o conexiones
 
+    # Al apagar el servidor se envían los correos pendientes
+    @app.on_event("shutdown")
+    def shutdown_event():
+        outbox.flush(timeout=Config.EMAIL_OUTBOX_FLUSH_TIMEOUT_SECONDS)
+
     @app.get("/")
     def read_root():
         return {"message": "Hola desde FastAPI BTG_Pactual"}
@@ -1,44 +1,89 @@
-from fastapi import APIRouter, Depends, Request, Body, Path
+from typing import Optional
+from fastapi import APIRouter, Depends, Request, Body, Path, Query
+from app.config import Config
 from app.controllers.auth_decorators import auth_required
 from app.controllers.bank_funds_controller import (
     create_bank_funds_controller,
     get_bank_funds_controller,
+    get_bank_funds_stats_controller,
+    import_bank_funds_controller,
     update_bank_fund_controller
 )
 from app.documents.auth_models import SessionUserModel
-from app.documents.bank_funds_models import CreateBankFundsModel, UpdateBankFundsModel
+from app.utils.batch_get import parse_ids
+from app.utils.fieldsets import parse_expand, parse_fields
+from app.schemas.bank_funds import BankFundsSchema
+from app.documents.bank_funds_models import CreateBankFundsModel, ImportBankFundsModel, UpdateBankFundsModel
+from app.utils.catalog_import import import_openapi
 
 bank_funds_routes = APIRouter(prefix="/bank-funds", tags=["bank_funds"])
 
+# Relaciones que se pueden pedir con ?expand=
+EXPANDABLE = ("category",)
+
 # CREATE
 @bank_funds_routes.post("/", summary="Crear un fondo bancario")
-def create_bank_fund(
+async def create_bank_fund(
     request: Request,
     data: CreateBankFundsModel = Body(...),
     user_session: SessionUserModel = Depends(auth_required(require_admin=True))
 ):
     """Crear un fondo bancario"""
-    return create_bank_funds_controller(user_session, data)
+    return await create_bank_funds_controller(user_session, data)
+
+# IMPORT (solo administradores)
+@bank_funds_routes.post("/import", summary="Importar fondos bancarios (JSON o CSV)", openapi_extra=import_openapi(ImportBankFundsModel))
+async def import_bank_funds(
+    request: Request,
+    user_session: SessionUserModel = Depends(auth_required(require_admin=True))
+):
+    """Crear varios fondos bancarios desde una lista JSON o un CSV con encabezado"""
+    return await import_bank_funds_controller(user_session, await request.body(), request.headers.get("content-type"))
 
 # READ ALL
 @bank_funds_routes.get("/", summary="Obtener todos los fondos bancarios")
-def get_bank_funds():
+async def get_bank_funds(
+    limit: int = Query(Config.PAGINATION_DEFAULT_LIMIT, ge=1, le=Config.PAGINATION_MAX_LIMIT, description="Cantidad máxima de items por página"),
+    cursor: Optional[str] = Query(None, description="Cursor de la siguiente página (next_cursor)"),
+    ids: Optional[str] = Query(None, description="IDs separados por coma (?ids=a,b,c); ignora la paginación"),
+    fields: Optional[str] = Query(None, description="Atributos separados por coma (?fields=name,min_amount); el id siempre se incluye"),
+    expand: Optional[str] = Query(None, description="Relaciones a incluir (?expand=category reemplaza category_id por la categoría)"),
+):
     """Obtener todos los fondos bancarios"""
-    return get_bank_funds_controller()
+    return await get_bank_funds_controller(
+        limit=limit,
+        cursor=cursor,
+        ids=parse_ids(ids),
+        fields=parse_fields(fields, BankFundsSchema.field_names()),
+        expand=parse_expand(expand, EXPANDABLE),
+    )
+
+# STATS (solo administradores; antes de /{bank_funds_id} para que "stats" no se tome como id)
+@bank_funds_routes.get("/stats", summary="Suscripciones abiertas y capital administrado por fondo")
+async def get_bank_funds_stats(
+    limit: int = Query(Config.PAGINATION_DEFAULT_LIMIT, ge=1, le=Config.PAGINATION_MAX_LIMIT, description="Cantidad máxima de fondos por página"),
+    cursor: Optional[str] = Query(None, description="Cursor de la siguiente página (next_cursor)"),
+    user_session: SessionUserModel = Depends(auth_required(require_admin=True))
+):
+    """Contadores por fondo para el panel de administración"""
+    return await get_bank_funds_stats_controller(limit=limit, cursor=cursor)
 
 # READ ONE & UPDATE
 @bank_funds_routes.get("/{bank_funds_id}", summary="Obtener todos los fondos bancarios")
-def get_bank_fund(bank_funds_id: str = Path(...)):
+async def get_bank_fund(
+    bank_funds_id: str = Path(...),
+    expand: Optional[str] = Query(None, description="Relaciones a incluir (?expand=category reemplaza category_id por la categoría)"),
+):
     """Obtener un fondo bancario por ID"""
-    return get_bank_funds_controller(bank_funds_id)
+    return await get_bank_funds_controller(bank_funds_id, expand=parse_expand(expand, EXPANDABLE))
 
 # UPDATE
 @bank_funds_routes.put("/{bank_funds_id}", summary="Actualizar un fondo bancario")
-def update_bank_fund(
+async def update_bank_fund(
     request: Request,
     bank_funds_id: str = Path(...),
     data: UpdateBankFundsModel = Body(...),
     user_session: SessionUserModel = Depends(auth_required(require_admin=True))
 ):
     """Actualizar un fondo bancario"""
-    return update_bank_fund_controller(user_session, bank_funds_id, data)
+    return await update_bank_fund_controller(user_session, bank_funds_id, data)
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, Path, Request, Body
+from typing import Optional
+from fastapi import APIRouter, Depends, Path, Query, Request, Body
+from app.config import Config
 from app.controllers.auth_decorators import auth_required
 from app.documents.auth_models import SessionUserModel
-from app.documents.category_models import CreateCategoryModel, UpdateCategoryModel
+from app.utils.batch_get import parse_ids
+from app.utils.fieldsets import parse_fields
+from app.schemas.category import CategorySchema
+from app.documents.category_models import CreateCategoryModel, ImportCategoryModel, UpdateCategoryModel
+from app.utils.catalog_import import import_openapi
 from app.controllers.category_controller import (
     create_category_controller,
     get_categories_controller,
+    import_categories_controller,
     update_category_controller
 )
 
@@ -12,28 +19,42 @@ category_routes = APIRouter(prefix="/category", tags=["category"])
 
 # CREATE
 @category_routes.post("/", summary="Crear una categoría")
-def create_category(
+async def create_category(
     data: CreateCategoryModel = Body(...),
     user_session: SessionUserModel = Depends(auth_required(require_admin=True))
 ):
-    return create_category_controller(user_session, data)
+    return await create_category_controller(user_session, data)
+
+# IMPORT (solo administradores)
+@category_routes.post("/import", summary="Importar categorías (JSON o CSV)", openapi_extra=import_openapi(ImportCategoryModel))
+async def import_categories(
+    request: Request,
+    user_session: SessionUserModel = Depends(auth_required(require_admin=True))
+):
+    """Crear varias categorías desde una lista JSON o un CSV con encabezado"""
+    return await import_categories_controller(user_session, await request.body(), request.headers.get("content-type"))
 
 # READ ALL
 @category_routes.get("/", summary="Obtener todas las categorías")
-def get_categories():
-    return get_categories_controller()
+async def get_categories(
+    limit: int = Query(Config.PAGINATION_DEFAULT_LIMIT, ge=1, le=Config.PAGINATION_MAX_LIMIT, description="Cantidad máxima de items por página"),
+    cursor: Optional[str] = Query(None, description="Cursor de la siguiente página (next_cursor)"),
+    ids: Optional[str] = Query(None, description="IDs separados por coma (?ids=a,b,c); ignora la paginación"),
+    fields: Optional[str] = Query(None, description="Atributos separados por coma (?fields=name); el id siempre se incluye"),
+):
+    return await get_categories_controller(limit=limit, cursor=cursor, ids=parse_ids(ids), fields=parse_fields(fields, CategorySchema.field_names()))
 
 # READ ONE
 @category_routes.get("/{id}", summary="Obtener una categoría por ID")
-def get_category(id: str = Path(...)):
-    return get_categories_controller(id)
+async def get_category(id: str = Path(...)):
+    return await get_categories_controller(id)
 
 
 # UPDATE
 @category_routes.put("/{id}", summary="Actualizar una categoría")
-def update_category(
+async def update_category(
     id: str = Path(...),
     data: UpdateCategoryModel = Body(...),
     user_session: SessionUserModel = Depends(auth_required(require_admin=True))
 ):
-    return update_category_controller(user_session, id, data)
+    return await update_category_controller(user_session, id, data)
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from app.controllers.auth_decorators import auth_required
+from app.documents.auth_models import SessionUserModel
+from app.utils.metrics import render_prometheus
+
+metrics_routes = APIRouter(prefix="/metrics", tags=["metrics"])
+
+# READ
+@metrics_routes.get("/", summary="Métricas en formato Prometheus", response_class=PlainTextResponse)
+async def get_metrics(
+    user_session: SessionUserModel = Depends(auth_required(require_admin=True))
+):
+    """Latencia por ruta, requests en curso, llamadas a servicios y aciertos de caché"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -4,6 +4,7 @@ from app.routes.category_routes import category_routes
 from app.routes.user_bank_funds_routes import user_bank_funds_routes
 from app.routes.user_bank_funds_audit_routes import user_bank_funds_audit_routes
 from app.routes.user_routes import users_routes
+from app.routes.metrics_routes import metrics_routes
 
 # Lista de routers para incluir en FastAPI
 main_routes = [
@@ -12,5 +13,6 @@ main_routes = [
     category_routes,
     user_bank_funds_routes,
     user_bank_funds_audit_routes,
-    users_routes
+    users_routes,
+    metrics_routes
 ]
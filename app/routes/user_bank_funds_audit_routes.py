@@ -1,23 +1,53 @@
-from fastapi import APIRouter, Depends, Path
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Path, Query
+from app.config import Config
 from app.controllers.auth_decorators import auth_required
 from app.controllers.user_bank_funds_audit_controller import (
+    export_user_bank_funds_audit_controller,
     get_user_bank_funds_audit_controller,
 )
 from app.documents.auth_models import SessionUserModel
+from app.utils.batch_get import parse_ids
+from app.utils.fieldsets import parse_fields
+from app.schemas.user_bank_funds_audit import UserBankFundsAuditSchema
 
 user_bank_funds_audit_routes = APIRouter(prefix="/user-bank-funds-audit", tags=["user_bank_funds_audit"])
 
 # READ ALL
 @user_bank_funds_audit_routes.get("/", summary="Obtener todos los registros de auditoría de fondos bancarios por usuario")
-def get_user_bank_funds_audit_list(
+async def get_user_bank_funds_audit_list(
+    limit: int = Query(Config.PAGINATION_DEFAULT_LIMIT, ge=1, le=Config.PAGINATION_MAX_LIMIT, description="Cantidad máxima de items por página"),
+    cursor: Optional[str] = Query(None, description="Cursor de la siguiente página (next_cursor)"),
+    ids: Optional[str] = Query(None, description="IDs separados por coma (?ids=a,b,c); ignora la paginación"),
+    fields: Optional[str] = Query(None, description="Atributos separados por coma (?fields=status,amount); el id siempre se incluye"),
+    date_from: Optional[str] = Query(None, alias="from", description="Desde (fecha o datetime ISO, inclusive)"),
+    date_to: Optional[str] = Query(None, alias="to", description="Hasta (fecha o datetime ISO, inclusive)"),
     user_session: SessionUserModel = Depends(auth_required())
 ):
-    return get_user_bank_funds_audit_controller(user_session)
+    return await get_user_bank_funds_audit_controller(
+        user_session,
+        limit=limit,
+        cursor=cursor,
+        ids=parse_ids(ids),
+        fields=parse_fields(fields, UserBankFundsAuditSchema.field_names()),
+        date_from=date_from,
+        date_to=date_to,
+    )
+
+# EXPORT (antes de /{user_bank_funds_audit_id} para que "export" no se tome como id)
+@user_bank_funds_audit_routes.get("/export", summary="Exportar la auditoría del usuario en NDJSON o CSV")
+async def export_user_bank_funds_audit(
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Formato del archivo"),
+    date_from: Optional[str] = Query(None, alias="from", description="Desde (fecha o datetime ISO, inclusive)"),
+    date_to: Optional[str] = Query(None, alias="to", description="Hasta (fecha o datetime ISO, inclusive)"),
+    user_session: SessionUserModel = Depends(auth_required())
+):
+    return await export_user_bank_funds_audit_controller(user_session, date_from, date_to, format)
 
 # READ ONE
 @user_bank_funds_audit_routes.get("/{user_bank_funds_audit_id}", summary="Obtener un registro de auditoría por ID")
-def get_user_bank_fund_audit(
+async def get_user_bank_fund_audit(
     user_bank_funds_audit_id: str = Path(..., description="ID del registro de auditoría"),
     user_session: SessionUserModel = Depends(auth_required())
 ):
-    return get_user_bank_funds_audit_controller(user_session, user_bank_funds_audit_id)
+    return await get_user_bank_funds_audit_controller(user_session, user_bank_funds_audit_id)
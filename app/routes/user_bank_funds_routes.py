@@ -1,43 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, Header, Path, Query
 from app.controllers.auth_decorators import auth_required
 from app.controllers.user_bank_funds_controller import (
     create_user_bank_fund_controller,
+    create_user_bank_funds_bulk_controller,
     get_user_bank_funds_controller,
+    get_user_bank_funds_summary_controller,
     delete_user_bank_fund_controller
 )
 from app.documents.auth_models import SessionUserModel
+from app.documents.user_bank_funds_models import BulkUserBankFundsModel
+from app.schemas.user_bank_funds import UserBankFundsSchema
+from app.utils.fieldsets import parse_fields
+from app.utils.idempotency import idempotent
 
 user_bank_funds_routes = APIRouter(prefix="/user-bank-funds",tags=["user_bank_funds"])
 
+# CREATE (BULK) (antes de /{bank_funds_id} para que "bulk" no se tome como id)
+@user_bank_funds_routes.post("/bulk", summary="Asociar varios fondos bancarios a un usuario")
+async def create_user_bank_funds_bulk(
+    user_session: SessionUserModel = Depends(auth_required()),
+    data: BulkUserBankFundsModel = Body(...),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Llave única por intento lógico; los reintentos con la misma llave devuelven la primera respuesta"),
+):
+    return await idempotent(
+        idempotency_key,
+        user_session.user_id,
+        f"POST /user-bank-funds/bulk:{','.join(data.bank_funds_ids)}",
+        lambda: create_user_bank_funds_bulk_controller(user_session, data.bank_funds_ids),
+    )
+
 # CREATE
 @user_bank_funds_routes.post("/{bank_funds_id}", summary="Asociar un fondo bancario a un usuario")
-def create_user_bank_fund(
+async def create_user_bank_fund(
     user_session: SessionUserModel = Depends(auth_required()),
     bank_funds_id: str = Path(..., description="ID del fondo bancario"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Llave única por intento lógico; los reintentos con la misma llave devuelven la primera respuesta"),
 ):
-    return create_user_bank_fund_controller(user_session, bank_funds_id)
+    return await idempotent(
+        idempotency_key,
+        user_session.user_id,
+        f"POST /user-bank-funds/{bank_funds_id}",
+        lambda: create_user_bank_fund_controller(user_session, bank_funds_id),
+    )
 
 # READ ALL
 @user_bank_funds_routes.get("/", summary="Obtener todos los fondos bancarios de un usuario")
-def list_user_bank_funds(
+async def list_user_bank_funds(
+    fields: Optional[str] = Query(None, description="Atributos separados por coma (?fields=bank_funds_id,amount); el id siempre se incluye"),
     user_session: SessionUserModel = Depends(auth_required())
 ):
-    return get_user_bank_funds_controller(user_session)
+    return await get_user_bank_funds_controller(user_session, fields=parse_fields(fields, UserBankFundsSchema.field_names()))
+
+# SUMMARY (antes de /{id} para que "summary" no se tome como id)
+@user_bank_funds_routes.get("/summary", summary="Resumen del portafolio del usuario (totales invertidos por moneda, posiciones abiertas y saldo)")
+async def get_user_bank_funds_summary(
+    user_session: SessionUserModel = Depends(auth_required()),
+):
+    return await get_user_bank_funds_summary_controller(user_session)
 
 # READ ONE
 @user_bank_funds_routes.get("/{id}", summary="Obtener un fondo bancario de un usuario por ID")
-def get_user_bank_fund(
+async def get_user_bank_fund(
     user_session: SessionUserModel = Depends(auth_required()),
     id: str = Path(..., description="ID del fondo bancario"),
 ):
-    return get_user_bank_funds_controller(user_session, id)
+    return await get_user_bank_funds_controller(user_session, id)
 
 # DELETE
 @user_bank_funds_routes.delete("/{user_bank_funds_id}", summary="Eliminar un fondo bancario asociado a un usuario")
-def delete_user_bank_fund(
+async def delete_user_bank_fund(
     user_session: SessionUserModel = Depends(auth_required()),
     user_bank_funds_id: str = Path(..., description="ID de la relación usuario-fondo bancario"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Llave única por intento lógico; los reintentos con la misma llave devuelven la primera respuesta"),
 ):
-    response = delete_user_bank_fund_controller(user_session, user_bank_funds_id)
-    if [200, 201] not in response.get("status"):
-        raise HTTPException(status_code=response.get("status"), detail=response.get("error"))
+    return await idempotent(
+        idempotency_key,
+        user_session.user_id,
+        f"DELETE /user-bank-funds/{user_bank_funds_id}",
+        lambda: delete_user_bank_fund_controller(user_session, user_bank_funds_id),
+    )
@@ -1,24 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.config import dynamodb
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.config import Config, dynamodb
 from app.controllers.user_controller import get_all_users_controller
 from app.controllers.auth_decorators import auth_required
 from app.documents.auth_models import SessionUserModel
+from app.utils.async_io import aio
+from app.utils.fieldsets import parse_fields
+from app.schemas.users import UserSchema
 
 users_db = dynamodb.Table("Users")
 users_routes = APIRouter(prefix="/users",tags=["users"])
 
 @users_routes.get("/")
-def get_users(user_session: SessionUserModel = Depends(auth_required())):
+async def get_users(
+    limit: int = Query(Config.PAGINATION_DEFAULT_LIMIT, ge=1, le=Config.PAGINATION_MAX_LIMIT, description="Cantidad máxima de items por página"),
+    cursor: Optional[str] = Query(None, description="Cursor de la siguiente página (next_cursor)"),
+    fields: Optional[str] = Query(None, description="Atributos separados por coma (?fields=name,email); el id siempre se incluye"),
+    user_session: SessionUserModel = Depends(auth_required())
+):
     """
     Obtener todos los usuarios si el rol es ADMIN,
     de lo contrario devuelve solo la información del usuario autenticado
     """
-    user_response = users_db.get_item(Key={"id": user_session.user_id})
+    user_response = await aio(users_db).get_item(Key={"id": user_session.user_id})
 
     if not user_response.get("Item"):
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
     if user_session.role.lower() == "admin":
-        return get_all_users_controller()
+        return await get_all_users_controller(limit=limit, cursor=cursor, fields=parse_fields(fields, UserSchema.field_names()))
     else:
-        return get_all_users_controller(user_session)
\ No newline at end of file
+        return await get_all_users_controller(user_session)
\ No newline at end of file
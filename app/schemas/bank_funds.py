@@ -1,7 +1,9 @@
 import uuid
+from dataclasses import dataclass, field
 from decimal import Decimal
 from enum import Enum
 from app.config import dynamodb
+from app.schemas.entity import Entity
 from app.utils.time import get_current_time
 
 class CurrencyEnum(str, Enum):
@@ -12,37 +14,35 @@ class CurrencyEnum(str, Enum):
     COL = "COP"
     BRA = "BRL"
 
-class BankFundsSchema:
-    def __init__(self, name: str, category_id: str, min_amount: float, currency: CurrencyEnum = CurrencyEnum.COL, user_created: str = None, user_updated: str = None, created_at: str = None):
-        self.id = str(uuid.uuid4())
-        self.name = name
-        self.category_id = category_id
-        self.currency = currency
-        self.min_amount = Decimal(min_amount)
-        self.user_created = user_created
-        self.user_updated = user_updated or user_created
-        self.created_at = created_at or get_current_time()
-        self.updated_at = get_current_time()
-
-        if not currency or currency not in list(CurrencyEnum):
+CURRENCIES = tuple(CurrencyEnum)
+
+@dataclass(slots=True)
+class BankFundsSchema(Entity):
+    name: str
+    category_id: str
+    min_amount: Decimal
+    currency: CurrencyEnum = CurrencyEnum.COL
+    user_created: str = None
+    user_updated: str = None
+    created_at: str = None
+    updated_at: str = None
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+    def __post_init__(self):
+        self.min_amount = Decimal(self.min_amount)
+        self.user_updated = self.user_updated or self.user_created
+        # Una sola lectura del reloj por entidad
+        if self.created_at is None or self.updated_at is None:
+            now = get_current_time()
+            self.created_at = self.created_at or now
+            self.updated_at = self.updated_at or now
+
+        if not self.currency or self.currency not in CURRENCIES:
             self.currency = CurrencyEnum.COL
-        
-        if min_amount < 0:
+
+        if self.min_amount < 0:
             self.min_amount = Decimal("0.0")
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "category_id": self.category_id,
-            "min_amount": self.min_amount,
-            "currency": self.currency,
-            "user_created": self.user_created,
-            "user_updated": self.user_updated,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at
-        }
-        
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
@@ -53,8 +53,9 @@ class BankFundsSchema:
             currency=CurrencyEnum(data["currency"]),
             user_updated=data["user_updated"],
             created_at=data["created_at"],
-            updated_at=data["updated_at"]
+            updated_at=data["updated_at"],
+            id=data.get("id") or str(uuid.uuid4())
         )
 
 bank_funds_db = dynamodb.Table("BankFunds")
-__all__ = ["bank_funds_db", "BankFundsSchema"]
\ No newline at end of file
+__all__ = ["bank_funds_db", "BankFundsSchema"]
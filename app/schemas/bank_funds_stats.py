@@ -0,0 +1,10 @@
+from app.config import dynamodb
+
+# Contadores por fondo (llave `id` = id del fondo), mantenidos con ADD en las transacciones
+# de suscripción y cancelación. Van en una tabla aparte para no exponerlos en el catálogo
+# público ni servirlos desde su caché.
+OPEN_SUBSCRIPTIONS = "open_subscriptions"
+ASSETS_UNDER_MANAGEMENT = "assets_under_management"
+
+bank_funds_stats_db = dynamodb.Table("BankFundsStats")
+__all__ = ["bank_funds_stats_db", "OPEN_SUBSCRIPTIONS", "ASSETS_UNDER_MANAGEMENT"]
@@ -1,33 +1,32 @@
 import uuid
+from dataclasses import dataclass, field
 from app.config import dynamodb
+from app.schemas.entity import Entity
 from app.utils.time import get_current_time
 
-class CategorySchema:
+@dataclass(slots=True)
+class CategorySchema(Entity):
     """
     Schema para representar una categoría en DynamoDB.
     """
+    user_created: str
+    name: str
+    description: str = None
+    user_updated: str = None
+    created_at: str = None
+    updated_at: str = None
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
 
-    def __init__(self, user_created: str, name: str, description: str=None, user_updated: str=None, created_at: str=None):
-        self.id = str(uuid.uuid4())
-        self.name = name
-        self.description = description if description is not None else ""
-        self.user_created = user_created
-        self.user_updated = user_updated or user_created
-        self.created_at = created_at or get_current_time()
-        self.updated_at = get_current_time()
+    def __post_init__(self):
+        if self.description is None:
+            self.description = ""
+        self.user_updated = self.user_updated or self.user_created
+        # Una sola lectura del reloj por entidad
+        if self.created_at is None or self.updated_at is None:
+            now = get_current_time()
+            self.created_at = self.created_at or now
+            self.updated_at = self.updated_at or now
 
-
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "description": self.description,
-            "user_created": self.user_created,
-            "user_updated": self.user_updated,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at
-        }
-    
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
@@ -36,8 +35,9 @@ class CategorySchema:
             description=data["description"],
             user_updated=data["user_updated"],
             created_at=data["created_at"],
-            updated_at=data["updated_at"]
+            updated_at=data["updated_at"],
+            id=data.get("id") or str(uuid.uuid4())
         )
 
 categories_db = dynamodb.Table("Categories")
-__all__ = ["categories_db", "CategorySchema"]
\ No newline at end of file
+__all__ = ["categories_db", "CategorySchema"]
@@ -0,0 +1,50 @@
+## Base común de los esquemas schemas/entity.py
+from dataclasses import fields
+from operator import attrgetter
+from app.utils.dynamo_types import deserialize_items, serialize
+
+
+class Entity:
+    """
+    Base de los esquemas (dataclasses con slots). `to_dict` arma el item con
+    un solo attrgetter y `from_item` reconstruye la entidad desde un item ya
+    guardado, sin generar id ni fechas nuevas ni repetir las validaciones.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def _item_fields(cls):
+        # Se calcula una vez por clase (la dataclass se arma después de la clase base)
+        cached = cls.__dict__.get("_fields_cache")
+        if cached is None:
+            names = tuple(field.name for field in fields(cls))
+            cached = (names, attrgetter(*names))
+            type.__setattr__(cls, "_fields_cache", cached)
+        return cached
+
+    @classmethod
+    def field_names(cls):
+        """Atributos del item (los que se pueden pedir con ?fields=)"""
+        return cls._item_fields()[0]
+
+    def to_dict(self):
+        names, getter = self._item_fields()
+        return dict(zip(names, getter(self)))
+
+    @classmethod
+    def from_item(cls, item: dict):
+        names, _ = cls._item_fields()
+        entity = object.__new__(cls)
+        for name in names:
+            object.__setattr__(entity, name, item.get(name))
+        return entity
+
+    @classmethod
+    def from_raw_items(cls, raw_items):
+        """Mapeo en bloque: mapas de atributos de DynamoDB -> entidades"""
+        return [cls.from_item(item) for item in deserialize_items(raw_items)]
+
+    @staticmethod
+    def to_raw_items(entities):
+        """Mapeo en bloque: entidades -> mapas de atributos de DynamoDB"""
+        return [serialize(entity.to_dict()) for entity in entities]
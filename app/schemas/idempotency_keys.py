@@ -0,0 +1,8 @@
+from app.config import dynamodb
+
+# Respuestas guardadas por Idempotency-Key (llave `id` = usuario#llave). DynamoDB borra
+# los items vencidos por el atributo TTL `expires_at` (segundos epoch).
+TTL_ATTRIBUTE = "expires_at"
+
+idempotency_keys_db = dynamodb.Table("IdempotencyKeys")
+__all__ = ["idempotency_keys_db", "TTL_ATTRIBUTE"]
@@ -1,43 +1,40 @@
 import uuid
+from dataclasses import dataclass, field
 from enum import Enum
 from decimal import Decimal
 from app.config import dynamodb
-from app.schemas.bank_funds import CurrencyEnum
+from app.schemas.bank_funds import CURRENCIES, CurrencyEnum
+from app.schemas.entity import Entity
 from app.utils.time import get_current_time
 
-class UserBankFundsSchema:
+@dataclass(slots=True)
+class UserBankFundsSchema(Entity):
     class StatusEnum(str, Enum):
       OPEN = "OPEN"
       CLOSED = "CLOSED"
 
-    def __init__(self, user_id: str, bank_funds_id: str, amount: float, currency: CurrencyEnum = CurrencyEnum.COL, status: 'UserBankFundsSchema.StatusEnum' = StatusEnum.OPEN, created_at: str = None):
-      self.id = str(uuid.uuid4())
-      self.user_id = user_id
-      self.bank_funds_id = bank_funds_id
-      self.currency = currency
-      self.amount = amount
-      self.status = status
-      self.created_at = created_at or get_current_time()
-      self.updated_at = get_current_time()
+    user_id: str
+    bank_funds_id: str
+    amount: Decimal
+    currency: CurrencyEnum = CurrencyEnum.COL
+    status: 'UserBankFundsSchema.StatusEnum' = StatusEnum.OPEN
+    created_at: str = None
+    updated_at: str = None
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
 
-      if not self.currency or self.currency not in list(CurrencyEnum):
+    def __post_init__(self):
+      # Una sola lectura del reloj por entidad
+      if self.created_at is None or self.updated_at is None:
+          now = get_current_time()
+          self.created_at = self.created_at or now
+          self.updated_at = self.updated_at or now
+
+      if not self.currency or self.currency not in CURRENCIES:
           self.currency = CurrencyEnum.COL
 
       if self.amount < 0:
           self.amount = Decimal("0.0")
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "status": self.status,
-            "user_id": self.user_id,
-            "bank_funds_id": self.bank_funds_id,
-            "currency": self.currency,
-            "amount": self.amount,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at
-        }
-
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
@@ -45,8 +42,12 @@ class UserBankFundsSchema:
             bank_funds_id=data["bank_funds_id"],
             status=data.get("status", "OPEN"),
             amount=Decimal(data.get("amount", 0)),
-            created_at=data.get("created_at")
+            currency=data.get("currency", CurrencyEnum.COL),
+            created_at=data.get("created_at"),
+            id=data.get("id") or str(uuid.uuid4())
         )
 
 user_bank_funds_db = dynamodb.Table("UserBankFunds")
-__all__ = ["user_bank_funds_db", "UserBankFundsSchema"]
\ No newline at end of file
+# Índice global (user_id, created_at) para listar el portafolio de un usuario
+USER_ID_INDEX = "user_id-created_at-index"
+__all__ = ["user_bank_funds_db", "UserBankFundsSchema", "USER_ID_INDEX"]
@@ -1,32 +1,44 @@
 import uuid
+from dataclasses import dataclass
 from app.config import dynamodb
 from app.schemas.user_bank_funds import UserBankFundsSchema
 
 from app.utils.time import get_current_time
 
 
+@dataclass(slots=True, init=False)
 class UserBankFundsAuditSchema(UserBankFundsSchema):
-    # Llamamos al constructor padre con los campos que necesita
+    parent_id: str = None
+    # Llave de ordenamiento: los registros de un usuario quedan ordenados por fecha
+    sk: str = None
+
+    # Copia los campos de la posición; id y fechas son los del registro de auditoría
     def __init__(self, parent: UserBankFundsSchema):
-        super().__init__(user_id=parent.user_id, bank_funds_id=parent.bank_funds_id, status=parent.status, amount=parent.amount, created_at=parent.created_at)
+        now = get_current_time()
+        self.user_id = parent.user_id
+        self.bank_funds_id = parent.bank_funds_id
+        self.amount = parent.amount
+        self.currency = parent.currency
+        self.status = parent.status
+        self.created_at = now
+        self.updated_at = now
         self.id = str(uuid.uuid4())
         self.parent_id = parent.id
-        self.created_at = get_current_time()
-      
-    def to_dict(self):
-        base_dict = super().to_dict()
-        base_dict.update({
-            "id": self.id,
-            "parent_id": self.parent_id,
-            "created_at": self.created_at
-        })
-        return base_dict
-    
+        self.sk = self.sort_key(now, self.id)
+
+    @staticmethod
+    def sort_key(created_at: str, audit_id: str):
+        return f"{created_at}#{audit_id}"
+
     @classmethod
     def from_dict(cls, data: dict):
         return cls(
             parent=UserBankFundsSchema.from_dict(data["parent"])
         )
 
-user_bank_funds_audit_db = dynamodb.Table("UserBankFundsAudit")
-__all__ = ["user_bank_funds_audit_db", "UserBankFundsAuditSchema"]
\ No newline at end of file
+# Llave user_id (partición) + sk (created_at#id); el índice por id resuelve las lecturas por id
+USER_BANK_FUNDS_AUDIT_TABLE = "UserBankFundsHistory"
+AUDIT_ID_INDEX = "id-index"
+
+user_bank_funds_audit_db = dynamodb.Table(USER_BANK_FUNDS_AUDIT_TABLE)
+__all__ = ["user_bank_funds_audit_db", "UserBankFundsAuditSchema", "USER_BANK_FUNDS_AUDIT_TABLE", "AUDIT_ID_INDEX"]
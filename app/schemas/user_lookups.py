@@ -0,0 +1,42 @@
+from app.config import dynamodb
+from app.utils.time import get_current_time
+
+class UserLookupSchema:
+    """
+    Item guardián de unicidad para los usuarios.
+    Cada email y cada NIT registrado ocupa una llave propia (`email#...`, `nit#...`)
+    que apunta al id del usuario, de modo que buscarlos es una lectura por llave.
+    """
+
+    def __init__(self, id: str, user_id: str = None, created_at: str = None):
+        self.id = id
+        self.user_id = user_id
+        self.created_at = created_at or get_current_time()
+
+    @staticmethod
+    def email_key(email: str) -> str:
+        return f"email#{email.strip().lower()}"
+
+    @staticmethod
+    def nit_key(nit: str) -> str:
+        return f"nit#{nit.strip()}"
+
+    def to_dict(self):
+        item = {
+            "id": self.id,
+            "created_at": self.created_at,
+        }
+        if self.user_id:
+            item["user_id"] = self.user_id
+        return item
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            id=data["id"],
+            user_id=data.get("user_id"),
+            created_at=data.get("created_at")
+        )
+
+user_lookups_db = dynamodb.Table("UserLookups")
+__all__ = ["user_lookups_db", "UserLookupSchema"]
@@ -1,11 +1,14 @@
 import uuid
+from dataclasses import dataclass
 from enum import Enum
 from decimal import Decimal
 from app.config import dynamodb
-from app.schemas.bank_funds import CurrencyEnum
+from app.schemas.bank_funds import CURRENCIES, CurrencyEnum
+from app.schemas.entity import Entity
 from app.utils.time import get_current_time
 
-class UserSchema:
+@dataclass(slots=True)
+class UserSchema(Entity):
     """
     Schema para representar un usuario en DynamoDB.
     """
@@ -13,62 +16,57 @@ class UserSchema:
         USER = "USER"
         ADMIN = "ADMIN"
 
-    def __init__(self, nit: str, name: str, last_name: str, email: str, phone: str, role: RoleEnum=RoleEnum.USER, amount: float=0, currency: CurrencyEnum=CurrencyEnum.COL, id:str=None, created_at: str=None):
-        self.id = id or str(uuid.uuid4())
-        self.nit = nit
-        self.name = name
-        self.last_name = last_name
-        self.email = email
-        self.phone = phone
-        self.role = role
-        self.amount = amount
-        self.currency = currency
-        self.verified = False
-        self.created_at = created_at or get_current_time()
-        self.updated_at = get_current_time()
+    nit: str
+    name: str
+    last_name: str
+    email: str
+    phone: str
+    role: 'UserSchema.RoleEnum' = RoleEnum.USER
+    amount: Decimal = 0
+    currency: CurrencyEnum = CurrencyEnum.COL
+    id: str = None
+    created_at: str = None
+    verified: bool = False
+    updated_at: str = None
 
-        if self.currency not in list(CurrencyEnum):
+    def __post_init__(self):
+        self.id = self.id or str(uuid.uuid4())
+        # Una sola lectura del reloj por entidad
+        if self.created_at is None or self.updated_at is None:
+            now = get_current_time()
+            self.created_at = self.created_at or now
+            self.updated_at = self.updated_at or now
+
+        if self.currency not in CURRENCIES:
             self.currency = CurrencyEnum.COL
-            
-        if self.role not in list(UserSchema.RoleEnum):
+
+        if self.role not in _ROLES:
             self.role = UserSchema.RoleEnum.USER
-        
+
         if self.role.upper() == UserSchema.RoleEnum.USER:
             self.amount = Decimal("500000")
         elif self.role.upper() == UserSchema.RoleEnum.ADMIN:
             self.amount = Decimal("0")
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "nit": self.nit,
-            "name": self.name,
-            "last_name": self.last_name,
-            "email": self.email,
-            "phone": self.phone,
-            "role": self.role,
-            "amount": self.amount,
-            "currency": self.currency,
-            "verified": self.verified,
-            "created_at": self.created_at,
-            "updated_at": self.updated_at,
-        }
-    
+    @staticmethod
+    def invested_key(currency) -> str:
+        """Atributo agregado con el total invertido en posiciones abiertas en esa moneda"""
+        return f"invested_{getattr(currency, 'value', currency)}"
+
     @classmethod
     def from_dict(cls, data: dict):
-        return cls(
-            nit=data["nit"],
-            name=data["name"],
-            last_name=data["last_name"],
-            email=data["email"],
-            phone=data["phone"],
+        # Un usuario guardado conserva su saldo: no pasa por el saldo inicial por rol
+        return cls.from_item(dict(
+            data,
             role=UserSchema.RoleEnum(data["role"]),
-            amount=data["amount"],
             currency=CurrencyEnum(data["currency"]),
-            verified=data["verified"],
-            created_at=data["created_at"],
-            updated_at=data["updated_at"]
-        )
+        ))
+
+_ROLES = tuple(UserSchema.RoleEnum)
+
+# Agregados del portafolio en el item del usuario (se mantienen con ADD en las transacciones)
+OPEN_POSITIONS = "open_positions"
+INVESTED_KEYS = tuple(UserSchema.invested_key(currency) for currency in CURRENCIES)
 
 users_db = dynamodb.Table("Users")
-__all__ = ["users_db", "UserSchema"]
+__all__ = ["users_db", "UserSchema", "OPEN_POSITIONS", "INVESTED_KEYS"]
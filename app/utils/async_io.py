@@ -0,0 +1,48 @@
+## Acceso asíncrono a DynamoDB y Cognito utils/async_io.py
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from app.config import Config
+
+# Pool dedicado y acotado para las llamadas bloqueantes de boto3.
+# La concurrencia de I/O ya no depende del threadpool de Starlette.
+executor = ThreadPoolExecutor(max_workers=Config.IO_EXECUTOR_MAX_WORKERS, thread_name_prefix="aws-io")
+
+
+async def run_io(fn, /, *args, **kwargs):
+    """
+    Ejecuta una llamada bloqueante en el pool de I/O sin bloquear el event loop.
+    Copia el contexto actual para que el hilo vea las contextvars del request.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(context.run, fn, *args, **kwargs))
+
+
+class AsyncTable:
+    """
+    Repositorio asíncrono sobre una tabla (o cliente) de boto3.
+    Expone las mismas operaciones (get_item, query, scan, put_item, ...) como corrutinas.
+    """
+    __slots__ = ("_target",)
+
+    def __init__(self, target):
+        self._target = target
+
+    @property
+    def name(self):
+        return self._target.name
+
+    def __getattr__(self, operation):
+        method = getattr(self._target, operation)
+
+        async def call(*args, **kwargs):
+            return await run_io(method, *args, **kwargs)
+
+        return call
+
+
+def aio(target):
+    """Atajo: `await aio(users.users_db).get_item(Key=...)`"""
+    return AsyncTable(target)
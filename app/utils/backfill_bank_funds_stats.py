@@ -0,0 +1,47 @@
+## Migración: calcula los contadores por fondo (open_subscriptions, assets_under_management) de las posiciones existentes
+## Uso: python -m app.utils.backfill_bank_funds_stats
+import asyncio
+from collections import defaultdict
+from decimal import Decimal
+
+import app.schemas.bank_funds_stats as bankFundsStats
+import app.schemas.user_bank_funds as userBankFunds
+from app.utils.async_io import aio
+from app.utils.parallel_scan import parallel_scan
+
+
+async def backfill_bank_funds_stats():
+    """
+    Suma las posiciones abiertas de UserBankFunds por fondo y escribe los contadores
+    en BankFundsStats. Los valores se reemplazan (SET), así que debe correr sin
+    suscripciones ni cancelaciones en curso; desde ahí las transacciones los mantienen con ADD.
+    La tabla se lee con `parallel_scan` (segmentos en paralelo).
+    """
+    subscriptions = defaultdict(int)
+    assets = defaultdict(Decimal)
+    scan_kwargs = {
+        "FilterExpression": "#s = :open",
+        "ProjectionExpression": "bank_funds_id, amount",
+        "ExpressionAttributeNames": {"#s": "status"},
+        "ExpressionAttributeValues": {":open": "OPEN"},
+    }
+
+    async for page in parallel_scan(userBankFunds.user_bank_funds_db, **scan_kwargs):
+        for position in page:
+            subscriptions[position["bank_funds_id"]] += 1
+            assets[position["bank_funds_id"]] += Decimal(position.get("amount", 0))
+
+    for bank_funds_id, count in subscriptions.items():
+        await aio(bankFundsStats.bank_funds_stats_db).update_item(
+            Key={"id": bank_funds_id},
+            UpdateExpression="SET #subs = :subs, #aum = :aum",
+            ExpressionAttributeNames={"#subs": bankFundsStats.OPEN_SUBSCRIPTIONS, "#aum": bankFundsStats.ASSETS_UNDER_MANAGEMENT},
+            ExpressionAttributeValues={":subs": count, ":aum": assets[bank_funds_id]},
+        )
+
+    return {"updated": len(subscriptions)}
+
+
+if __name__ == "__main__":
+    result = asyncio.run(backfill_bank_funds_stats())
+    print(f"✅ {result['updated']} fondos actualizados")
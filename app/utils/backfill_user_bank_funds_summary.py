@@ -0,0 +1,63 @@
+## Migración: calcula los agregados del portafolio (invested_<moneda>, open_positions) de los usuarios existentes
+## Uso: python -m app.utils.backfill_user_bank_funds_summary
+import asyncio
+from collections import defaultdict
+from decimal import Decimal
+
+import botocore
+
+import app.schemas.users as users
+import app.schemas.user_bank_funds as userBankFunds
+from app.schemas.bank_funds import CURRENCIES
+from app.utils.async_io import aio
+from app.utils.parallel_scan import parallel_scan
+
+
+async def backfill_user_bank_funds_summary():
+    """
+    Suma las posiciones abiertas de UserBankFunds por usuario y escribe los totales
+    en el item del usuario. Los valores se reemplazan (SET), así que debe correr sin
+    suscripciones ni cancelaciones en curso; desde ahí las transacciones los mantienen con ADD.
+    La tabla se lee con `parallel_scan` (segmentos en paralelo).
+    """
+    invested = defaultdict(lambda: defaultdict(Decimal))
+    open_positions = defaultdict(int)
+    scan_kwargs = {
+        "FilterExpression": "#s = :open",
+        "ProjectionExpression": "user_id, amount, currency",
+        "ExpressionAttributeNames": {"#s": "status"},
+        "ExpressionAttributeValues": {":open": "OPEN"},
+    }
+
+    async for page in parallel_scan(userBankFunds.user_bank_funds_db, **scan_kwargs):
+        for position in page:
+            invested[position["user_id"]][position.get("currency") or "COP"] += Decimal(position.get("amount", 0))
+            open_positions[position["user_id"]] += 1
+
+    updated, missing = 0, []
+    for user_id, count in open_positions.items():
+        # Todas las monedas: las que no tienen posiciones quedan en 0
+        values = {f":inv{index}": invested[user_id][currency.value] for index, currency in enumerate(CURRENCIES)}
+        names = {f"#inv{index}": key for index, key in enumerate(users.INVESTED_KEYS)}
+        try:
+            await aio(users.users_db).update_item(
+                Key={"id": user_id},
+                UpdateExpression="SET #pos = :pos, " + ", ".join(f"#inv{index} = :inv{index}" for index in range(len(CURRENCIES))),
+                ConditionExpression="attribute_exists(id)",
+                ExpressionAttributeNames=dict(names, **{"#pos": users.OPEN_POSITIONS}),
+                ExpressionAttributeValues=dict(values, **{":pos": count}),
+            )
+            updated += 1
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            missing.append(user_id)
+
+    return {"updated": updated, "missing": missing}
+
+
+if __name__ == "__main__":
+    result = asyncio.run(backfill_user_bank_funds_summary())
+    print(f"✅ {result['updated']} usuarios actualizados, {len(result['missing'])} sin item de usuario")
+    for user_id in result["missing"]:
+        print(f"⚠️  {user_id} tiene posiciones abiertas pero no existe en Users")
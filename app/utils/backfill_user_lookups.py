@@ -0,0 +1,49 @@
+## Migración: crea los items guardianes de email y NIT para los usuarios existentes
+## Uso: python -m app.utils.backfill_user_lookups
+import asyncio
+
+import botocore
+
+import app.schemas.users as users
+import app.schemas.user_lookups as user_lookups
+from app.utils.async_io import aio
+from app.utils.parallel_scan import parallel_scan
+
+
+async def backfill_user_lookups():
+    """
+    Recorre la tabla Users y crea los items `email#...` y `nit#...` que falten.
+    Si una llave ya está ocupada por otro usuario se reporta como conflicto.
+    La tabla se lee con `parallel_scan` (segmentos en paralelo).
+    """
+    created, conflicts = 0, []
+
+    async for page in parallel_scan(users.users_db, ProjectionExpression="id, email, nit"):
+        for user in page:
+            keys = []
+            if user.get("email"):
+                keys.append(user_lookups.UserLookupSchema.email_key(user["email"]))
+            if user.get("nit"):
+                keys.append(user_lookups.UserLookupSchema.nit_key(user["nit"]))
+
+            for key in keys:
+                try:
+                    await aio(user_lookups.user_lookups_db).put_item(
+                        Item=user_lookups.UserLookupSchema(id=key, user_id=user["id"]).to_dict(),
+                        ConditionExpression="attribute_not_exists(id) OR user_id = :uid",
+                        ExpressionAttributeValues={":uid": user["id"]},
+                    )
+                    created += 1
+                except botocore.exceptions.ClientError as e:
+                    if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise
+                    conflicts.append({"key": key, "user_id": user["id"]})
+
+    return {"created": created, "conflicts": conflicts}
+
+
+if __name__ == "__main__":
+    result = asyncio.run(backfill_user_lookups())
+    print(f"✅ {result['created']} llaves creadas, {len(result['conflicts'])} conflictos")
+    for conflict in result["conflicts"]:
+        print(f"⚠️  {conflict['key']} ya pertenece a otro usuario (usuario {conflict['user_id']})")
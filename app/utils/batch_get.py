@@ -0,0 +1,55 @@
+## Lectura por lotes de items por id utils/batch_get.py
+import asyncio
+import logging
+
+from fastapi import HTTPException, status
+from app.config import Config, dynamodb_client
+from app.utils.async_io import aio
+from app.utils.dynamo_types import deserialize
+
+logger = logging.getLogger(__name__)
+
+# Límite de llaves por llamada a batch_get_item
+BATCH_GET_LIMIT = 100
+
+
+def parse_ids(ids: str):
+    """Convierte el query param `?ids=a,b,c` en una lista sin vacíos ni repetidos, conservando el orden"""
+    if not ids:
+        return []
+    parsed = list(dict.fromkeys(id.strip() for id in ids.split(",") if id.strip()))
+    if len(parsed) > Config.PAGINATION_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many ids (max {Config.PAGINATION_MAX_LIMIT})"
+        )
+    return parsed
+
+
+async def batch_get_items(table_name: str, ids, client=None):
+    """
+    Lee varios items por su llave `id` con batch_get_item en bloques de 100 llaves,
+    reintentando las UnprocessedKeys con espera exponencial (`BATCH_BACKOFF_SECONDS`,
+    hasta `BATCH_MAX_RETRIES` reintentos por bloque). Devuelve un dict id -> item.
+    Si quedan llaves sin leer responde 503: no se confunden con ids inexistentes.
+    """
+    client = client or dynamodb_client
+    ids = list(dict.fromkeys(ids))
+    found = {}
+    for start in range(0, len(ids), BATCH_GET_LIMIT):
+        request = {table_name: {"Keys": [{"id": {"S": id}} for id in ids[start:start + BATCH_GET_LIMIT]]}}
+        attempt = 0
+        while True:
+            response = await aio(client).batch_get_item(RequestItems=request)
+            for raw in response.get("Responses", {}).get(table_name, []):
+                item = deserialize(raw)
+                found[item["id"]] = item
+            request = response.get("UnprocessedKeys")
+            if not request:
+                break
+            if attempt >= Config.BATCH_MAX_RETRIES:
+                logger.warning("batch_get_item left %d unprocessed keys in %s", len(request[table_name]["Keys"]), table_name)
+                raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, try again")
+            await asyncio.sleep(Config.BATCH_BACKOFF_SECONDS * 2 ** attempt)
+            attempt += 1
+    return found
@@ -0,0 +1,76 @@
+## Escritura por lotes de items utils/batch_write.py
+import asyncio
+import logging
+
+import botocore
+
+from app.config import Config, dynamodb_client
+from app.utils.async_io import aio
+from app.utils.dynamo_types import serialize
+
+logger = logging.getLogger(__name__)
+
+# Límite de operaciones por llamada a batch_write_item
+BATCH_WRITE_LIMIT = 25
+
+
+async def batch_write_items(table_name: str, items, client=None):
+    """
+    Escribe varios items (put) con batch_write_item en bloques de 25, reintentando los
+    UnprocessedItems con espera exponencial (`BATCH_BACKOFF_SECONDS`, hasta
+    `BATCH_MAX_RETRIES` reintentos por bloque). Devuelve los ids que no se pudieron escribir.
+    Un error de la llamada (throttling tras los reintentos del SDK, validación) marca como
+    fallidos los items pendientes de ese bloque y se sigue con el siguiente.
+    """
+    client = client or dynamodb_client
+    items = list(items)
+    failed = []
+    for start in range(0, len(items), BATCH_WRITE_LIMIT):
+        requests = [{"PutRequest": {"Item": serialize(item)}} for item in items[start:start + BATCH_WRITE_LIMIT]]
+        attempt = 0
+        while requests:
+            try:
+                response = await aio(client).batch_write_item(RequestItems={table_name: requests})
+            except botocore.exceptions.ClientError:
+                logger.warning("batch_write_item failed for %d items in %s", len(requests), table_name, exc_info=True)
+                failed.extend(request["PutRequest"]["Item"]["id"]["S"] for request in requests)
+                break
+            requests = response.get("UnprocessedItems", {}).get(table_name, [])
+            if not requests:
+                break
+            if attempt >= Config.BATCH_MAX_RETRIES:
+                failed.extend(request["PutRequest"]["Item"]["id"]["S"] for request in requests)
+                logger.warning("batch_write_item left %d unprocessed items in %s", len(requests), table_name)
+                break
+            await asyncio.sleep(Config.BATCH_BACKOFF_SECONDS * 2 ** attempt)
+            attempt += 1
+    return failed
+
+
+async def put_items_if_absent(table_name: str, items, client=None):
+    """
+    Escribe cada item con un put condicional (`attribute_not_exists(id)`): batch_write_item
+    no admite condiciones, así que es para los items con id indicado por el cliente, que no
+    deben reemplazar uno existente (ni uno creado en paralelo). Las llamadas corren en paralelo
+    sobre el pool de I/O. Devuelve los ids que ya existían y los que no se pudieron escribir.
+    """
+    client = client or dynamodb_client
+
+    async def put(item):
+        try:
+            await aio(client).put_item(
+                TableName=table_name,
+                Item=serialize(item),
+                ConditionExpression="attribute_not_exists(id)",
+            )
+        except botocore.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                return "existing"
+            logger.warning("Conditional put of %s in %s failed", item["id"], table_name, exc_info=True)
+            return "failed"
+        return None
+
+    results = await asyncio.gather(*(put(item) for item in items))
+    existing = [item["id"] for item, result in zip(items, results) if result == "existing"]
+    failed = [item["id"] for item, result in zip(items, results) if result == "failed"]
+    return existing, failed
@@ -0,0 +1,122 @@
+## Caché del catálogo de fondos y categorías utils/catalog_cache.py
+from app.config import Config, dynamodb_client
+from app.utils.async_io import aio
+from app.utils.batch_get import batch_get_items
+from app.utils.cache import TTLCache
+from app.utils.fieldsets import projection
+from app.utils.pagination import paginate, paginate_raw
+
+import app.schemas.category as category
+import app.schemas.bank_funds as bankFunds
+
+# Items individuales por id y páginas de los listados por (limit, cursor)
+bank_funds_cache = TTLCache("bank_funds", Config.CATALOG_CACHE_MAXSIZE, Config.CATALOG_CACHE_TTL_SECONDS)
+bank_funds_pages_cache = TTLCache("bank_funds_pages", Config.CATALOG_CACHE_MAXSIZE, Config.CATALOG_CACHE_TTL_SECONDS)
+categories_cache = TTLCache("categories", Config.CATALOG_CACHE_MAXSIZE, Config.CATALOG_CACHE_TTL_SECONDS)
+categories_pages_cache = TTLCache("categories_pages", Config.CATALOG_CACHE_MAXSIZE, Config.CATALOG_CACHE_TTL_SECONDS)
+
+caches = [bank_funds_cache, bank_funds_pages_cache, categories_cache, categories_pages_cache]
+
+
+async def get_bank_fund(id: str):
+    """Devuelve un fondo por id, leyendo DynamoDB solo si no está en caché"""
+    item = bank_funds_cache.get(id)
+    if item is None:
+        item = (await aio(bankFunds.bank_funds_db).get_item(Key={"id": id})).get("Item")
+        if item:
+            bank_funds_cache.set(id, item)
+    return dict(item) if item else None
+
+
+async def _get_page(table, pages_cache: TTLCache, items_cache: TTLCache, limit: int, cursor: str = None, fields=None):
+    # Cada combinación de atributos leídos es una página distinta en caché
+    key = (limit, cursor, fields)
+    page = pages_cache.get(key)
+    if page is None:
+        if Config.RAW_LIST_READS:
+            # Items listos para JSON: no se guardan en la caché por id, que conserva los Decimal
+            page = await paginate_raw(table.name, dynamodb_client, limit=limit, cursor=cursor, **projection(fields))
+        else:
+            page = await paginate(table, limit=limit, cursor=cursor, **projection(fields))
+            # Los items parciales no sirven para la caché por id
+            if not fields:
+                for item in page[0]:
+                    items_cache.set(item["id"], item)
+        pages_cache.set(key, page)
+    items, next_cursor = page
+    return [dict(item) for item in items], next_cursor
+
+
+async def get_bank_funds_page(limit: int, cursor: str = None, fields=None):
+    """Devuelve una página del listado de fondos (solo `fields` si se indican) y el cursor siguiente"""
+    return await _get_page(bankFunds.bank_funds_db, bank_funds_pages_cache, bank_funds_cache, limit, cursor, fields)
+
+
+async def get_category(id: str):
+    """Devuelve una categoría por id, leyendo DynamoDB solo si no está en caché"""
+    item = categories_cache.get(id)
+    if item is None:
+        item = (await aio(category.categories_db).get_item(Key={"id": id})).get("Item")
+        if item:
+            categories_cache.set(id, item)
+    return dict(item) if item else None
+
+
+async def _get_many(cache: TTLCache, table_name: str, ids):
+    """
+    Devuelve un dict id -> item. Los que no están en caché se leen
+    con batch_get_item en bloques de 100 llaves.
+    """
+    found = {}
+    missing = []
+    for id in set(ids):
+        item = cache.get(id)
+        if item is None:
+            missing.append(id)
+        else:
+            found[id] = item
+
+    if missing:
+        for id, item in (await batch_get_items(table_name, missing, client=dynamodb_client)).items():
+            cache.set(id, item)
+            found[id] = item
+
+    return {id: dict(item) for id, item in found.items()}
+
+
+async def get_bank_funds(ids):
+    """Devuelve un dict id -> fondo para varios ids"""
+    return await _get_many(bank_funds_cache, bankFunds.bank_funds_db.name, ids)
+
+
+async def get_categories(ids):
+    """Devuelve un dict id -> categoría para varios ids"""
+    return await _get_many(categories_cache, category.categories_db.name, ids)
+
+
+async def get_categories_page(limit: int, cursor: str = None, fields=None):
+    """Devuelve una página del listado de categorías (solo `fields` si se indican) y el cursor siguiente"""
+    return await _get_page(category.categories_db, categories_pages_cache, categories_cache, limit, cursor, fields)
+
+
+def refresh_bank_fund(item: dict):
+    """Escritura en caché tras crear/actualizar un fondo: guarda el item y descarta las páginas"""
+    if item:
+        bank_funds_cache.set(item["id"], item)
+    bank_funds_pages_cache.clear()
+
+
+def refresh_category(item: dict):
+    """Escritura en caché tras crear/actualizar una categoría: guarda el item y descarta las páginas"""
+    if item:
+        categories_cache.set(item["id"], item)
+    categories_pages_cache.clear()
+
+
+def clear_catalog_cache():
+    for cache in caches:
+        cache.clear()
+
+
+def catalog_cache_stats():
+    return {cache.name: cache.stats() for cache in caches}
@@ -0,0 +1,140 @@
+## Importación masiva del catálogo (fondos y categorías) desde JSON o CSV utils/catalog_import.py
+import csv
+import io
+
+import orjson
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from app.config import Config
+from app.utils.batch_write import batch_write_items, put_items_if_absent
+from app.utils.responses import ORJSONResponse
+
+CREATED = "created"
+INVALID = "invalid"
+FAILED = "failed"
+
+
+def parse_rows(body: bytes, content_type: str = None):
+    """
+    Convierte el cuerpo del request en una lista de filas (dicts).
+    JSON: una lista de objetos o {"items": [...]}. CSV (`text/csv`): la primera línea es
+    el encabezado y las celdas vacías se omiten.
+    """
+    media_type = (content_type or "application/json").split(";")[0].strip().lower()
+    try:
+        if media_type in ("text/csv", "application/csv"):
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            rows = [{k.strip(): v.strip() for k, v in row.items() if k and v and v.strip()} for row in reader]
+        elif media_type == "application/json":
+            rows = orjson.loads(body)
+            if isinstance(rows, dict):
+                rows = rows.get("items")
+        else:
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Use application/json or text/csv")
+    except (ValueError, UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed import body")
+
+    if not isinstance(rows, list) or not rows:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nothing to import")
+    if len(rows) > Config.CATALOG_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many rows (max {Config.CATALOG_IMPORT_MAX_ROWS})"
+        )
+    return rows
+
+
+def import_openapi(model):
+    """Cuerpo documentado en OpenAPI para las rutas de importación (el request se lee crudo)"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": model.model_json_schema()}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    }
+
+
+def validate_rows(rows, model):
+    """
+    Valida cada fila con el modelo. Devuelve las filas válidas como (número de fila, modelo)
+    y el reporte de las inválidas. Las filas se numeran desde 1 (en CSV, sin contar el encabezado).
+    Un id repetido dentro de la misma importación invalida las apariciones siguientes.
+    """
+    valid, report, ids = [], [], set()
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            report.append({"row": number, "status": INVALID, "errors": ["Row must be an object"]})
+            continue
+        try:
+            data = model.model_validate(row)
+        except ValidationError as e:
+            errors = [f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()]
+            report.append({"row": number, "status": INVALID, "errors": errors})
+            continue
+        if data.id:
+            if data.id in ids:
+                report.append({"row": number, "status": INVALID, "id": data.id, "errors": ["Duplicate id in import"]})
+                continue
+            ids.add(data.id)
+        valid.append((number, data))
+    return valid, report
+
+
+def reject_existing(valid, existing):
+    """
+    Separa las filas válidas cuyo id ya está en la tabla (`existing`, ids leídos en lote):
+    la importación solo crea, no reemplaza fondos ni categorías existentes.
+    Devuelve las filas restantes y el reporte de las rechazadas. Es un filtro previo:
+    lo que garantiza no reemplazar es el put condicional de `write_rows`.
+    """
+    rows, report = [], []
+    for number, data in valid:
+        if data.id and data.id in existing:
+            report.append({"row": number, "status": INVALID, "id": data.id, "errors": ["Id already exists"]})
+        else:
+            rows.append((number, data))
+    return rows, report
+
+
+async def write_rows(table_name: str, rows, refresh, explicit_ids=frozenset()):
+    """
+    Escribe las filas (número de fila, item) y devuelve su reporte. Los items con id generado
+    van con batch_write_items; los de `explicit_ids` (id indicado en la importación) con un put
+    condicional cada uno, para no reemplazar un item creado entre la validación y la escritura.
+    Los items escritos pasan a la caché del catálogo con `refresh`.
+    """
+    conditional = [item for _, item in rows if item["id"] in explicit_ids]
+    failed = set(await batch_write_items(table_name, [item for _, item in rows if item["id"] not in explicit_ids]))
+    existing, conditional_failed = await put_items_if_absent(table_name, conditional) if conditional else ([], [])
+    failed.update(conditional_failed)
+    existing = set(existing)
+    report = []
+    for number, item in rows:
+        if item["id"] in existing:
+            report.append({"row": number, "status": INVALID, "id": item["id"], "errors": ["Id already exists"]})
+        elif item["id"] in failed:
+            report.append({"row": number, "status": FAILED, "id": item["id"], "errors": ["Not written (unprocessed after retries or DynamoDB error)"]})
+        else:
+            refresh(item)
+            report.append({"row": number, "status": CREATED, "id": item["id"]})
+    return report
+
+
+def import_response(detail: str, report):
+    """
+    Respuesta con el resultado por fila (ordenado por número de fila) y los totales.
+    201 si se escribió al menos una fila; si ninguna, 400 con el mismo reporte.
+    """
+    report = sorted(report, key=lambda entry: entry["row"])
+    summary = {CREATED: 0, INVALID: 0, FAILED: 0}
+    for entry in report:
+        summary[entry["status"]] += 1
+    body = {
+        "detail": detail,
+        "data": report,
+        "summary": summary,
+    }
+    return ORJSONResponse(content=body, status_code=status.HTTP_201_CREATED if summary[CREATED] else status.HTTP_400_BAD_REQUEST)
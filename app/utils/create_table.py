@@ -1,7 +1,7 @@
 import botocore
 from app.config import dynamodb_client
 
-def create_table(table_name, key_schema, attribute_definitions, provisioned_throughput=None):
+def create_table(table_name, key_schema, attribute_definitions, provisioned_throughput=None, global_secondary_indexes=None):
     """
     Crea una tabla en DynamoDB si no existe.
     Si ya existe, ignora el error.
@@ -16,6 +16,9 @@ def create_table(table_name, key_schema, attribute_definitions, provisioned_thro
     if provisioned_throughput:
         params["ProvisionedThroughput"] = provisioned_throughput
 
+    if global_secondary_indexes:
+        params["GlobalSecondaryIndexes"] = global_secondary_indexes
+
     try:
         dynamodb_client.create_table(**params)
         print(f"🚀 Tabla '{table_name}' creada con éxito")
@@ -23,5 +26,38 @@ def create_table(table_name, key_schema, attribute_definitions, provisioned_thro
         if e.response["Error"]["Code"] == "ResourceInUseException":
             # Esto significa que la tabla ya existe
             print(f"✅ Tabla '{table_name}' ya existe")
+            if global_secondary_indexes:
+                create_missing_indexes(table_name, attribute_definitions, global_secondary_indexes)
         else:
             raise
+
+
+def create_missing_indexes(table_name, attribute_definitions, global_secondary_indexes):
+    """
+    Agrega a una tabla existente los índices secundarios globales que aún no tiene.
+    DynamoDB solo permite crear un índice por llamada a update_table.
+    """
+    table = dynamodb_client.describe_table(TableName=table_name)["Table"]
+    existing = {index["IndexName"] for index in table.get("GlobalSecondaryIndexes", [])}
+
+    for index in global_secondary_indexes:
+        if index["IndexName"] in existing:
+            continue
+        dynamodb_client.update_table(
+            TableName=table_name,
+            AttributeDefinitions=attribute_definitions,
+            GlobalSecondaryIndexUpdates=[{"Create": index}],
+        )
+        print(f"🚀 Índice '{index['IndexName']}' creado en '{table_name}'")
+
+
+def enable_ttl(table_name, attribute_name):
+    """Activa el borrado automático por TTL (segundos epoch en `attribute_name`) si aún no está activo"""
+    description = dynamodb_client.describe_time_to_live(TableName=table_name)["TimeToLiveDescription"]
+    if description.get("TimeToLiveStatus") in ("ENABLED", "ENABLING"):
+        return
+    dynamodb_client.update_time_to_live(
+        TableName=table_name,
+        TimeToLiveSpecification={"Enabled": True, "AttributeName": attribute_name},
+    )
+    print(f"🚀 TTL '{attribute_name}' activado en '{table_name}'")
@@ -0,0 +1,86 @@
+from decimal import Decimal
+from enum import Enum
+from functools import cache
+from app.utils.responses import money
+
+
+@cache
+def _serializer():
+    # boto3 se importa en el primer uso: su import pesa en el cold start
+    from boto3.dynamodb.types import TypeSerializer
+    return TypeSerializer()
+
+
+@cache
+def _deserializer():
+    from boto3.dynamodb.types import TypeDeserializer
+    return TypeDeserializer()
+
+
+def serialize(item):
+    """Convierte un dict normal al formato de atributos de DynamoDB"""
+    serializer = _serializer()
+    return {k: serializer.serialize(v.value if isinstance(v, Enum) else v) for k, v in item.items()}
+
+
+def _deserialize_value(value: dict):
+    # Camino rápido para los tipos que usan las tablas; el resto (B, BS, NS, SS) va a TypeDeserializer
+    if "S" in value:
+        return value["S"]
+    if "N" in value:
+        return Decimal(value["N"])
+    if "BOOL" in value:
+        return value["BOOL"]
+    if "NULL" in value:
+        return None
+    if "M" in value:
+        return {k: _deserialize_value(v) for k, v in value["M"].items()}
+    if "L" in value:
+        return [_deserialize_value(v) for v in value["L"]]
+    return _deserializer().deserialize(value)
+
+
+def deserialize(item):
+    """Convierte un item de DynamoDB a dict normal"""
+    return {k: _deserialize_value(v) for k, v in item.items()}
+
+
+def deserialize_items(items):
+    """Convierte una lista de items de DynamoDB (p.ej. los Items de un scan) a dicts normales"""
+    return [{k: _deserialize_value(v) for k, v in item.items()} for item in items]
+
+
+def _json_number(text: str):
+    # Los enteros no pasan por Decimal; el resto sigue la política de montos de las respuestas
+    if "." in text or "e" in text or "E" in text:
+        return money(Decimal(text))
+    return int(text)
+
+
+def _json_value(value: dict):
+    if "S" in value:
+        return value["S"]
+    if "N" in value:
+        return _json_number(value["N"])
+    if "BOOL" in value:
+        return value["BOOL"]
+    if "NULL" in value:
+        return None
+    if "M" in value:
+        return {k: _json_value(v) for k, v in value["M"].items()}
+    if "L" in value:
+        return [_json_value(v) for v in value["L"]]
+    if "SS" in value:
+        return value["SS"]
+    if "NS" in value:
+        return [_json_number(n) for n in value["NS"]]
+    return _deserializer().deserialize(value)
+
+
+def json_items(items):
+    """
+    Convierte items en formato de DynamoDB directamente a valores listos para
+    la respuesta JSON (str, int, float, bool, None), sin Decimal intermedios.
+    Los montos quedan igual que al serializar los Decimal con ORJSONResponse.
+    """
+    return [{k: _json_value(v) for k, v in item.items()} for item in items]
@@ -0,0 +1,284 @@
+## Cola de salida de correos utils/email_outbox.py
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSMTPServer:
+    """
+    Servidor SMTP en memoria para pruebas y desarrollo (EMAIL_BACKEND=local).
+    Se usa como smtp_factory: cada llamada abre una conexión simulada.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.logins = 0
+        self.fail_next = 0
+
+    def __call__(self, host=None, port=None, timeout=None):
+        self.connections += 1
+        return LocalSMTPConnection(self)
+
+
+def _disconnected(message):
+    # smtplib (y ssl) se importan solo al enviar o fallar: pesan en el cold start
+    import smtplib
+    return smtplib.SMTPServerDisconnected(message)
+
+
+class LocalSMTPConnection:
+    """Conexión simulada con la misma interfaz que smtplib.SMTP"""
+
+    def __init__(self, server: LocalSMTPServer):
+        self.server = server
+        self.closed = False
+
+    def starttls(self):
+        return (220, b"Ready to start TLS")
+
+    def login(self, user, password):
+        self.server.logins += 1
+        return (235, b"Authentication successful")
+
+    def noop(self):
+        if self.closed:
+            raise _disconnected("Connection closed")
+        return (250, b"OK")
+
+    def send_message(self, msg):
+        if self.closed:
+            raise _disconnected("Connection closed")
+        if self.server.fail_next > 0:
+            self.server.fail_next -= 1
+            self.closed = True
+            raise _disconnected("Simulated failure")
+        self.server.messages.append(msg)
+        return {}
+
+    def quit(self):
+        self.closed = True
+        return (221, b"Bye")
+
+
+def build_message(recipient, subject, body):
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    msg = MIMEMultipart()
+    msg['From'] = Config.SES_VERIFIED_EMAIL
+    msg['To'] = recipient
+    msg['Subject'] = subject
+
+    if "Text" in body:
+        msg.attach(MIMEText(body["Text"], 'plain'))
+    if "Html" in body:
+        msg.attach(MIMEText(body["Html"], 'html'))
+    return msg
+
+
+class EmailOutbox:
+    """
+    Cola de correos con un hilo de envío en segundo plano.
+    El hilo reutiliza una conexión SMTP autenticada, envía en lotes,
+    reintenta con backoff exponencial y escribe en un archivo de dead letters
+    los correos que agotan los reintentos.
+
+    Con `background=False` no hay hilo: los correos esperan en la cola hasta que
+    `hand_off` los pasa a SQS (Lambda con EMAIL_QUEUE_URL).
+    """
+
+    def __init__(self, smtp_factory=None, batch_size: int = None, max_retries: int = None, retry_backoff: float = None,
+                 dead_letter_file: str = None, idle_timeout: float = None, maxsize: int = None, background: bool = True):
+        self.smtp_factory = smtp_factory
+        self.background = background
+        self.batch_size = batch_size or Config.EMAIL_OUTBOX_BATCH_SIZE
+        self.max_retries = Config.EMAIL_OUTBOX_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_backoff = Config.EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS if retry_backoff is None else retry_backoff
+        self.dead_letter_file = dead_letter_file or Config.EMAIL_OUTBOX_DEAD_LETTER_FILE
+        self.idle_timeout = idle_timeout or Config.EMAIL_SMTP_IDLE_SECONDS
+        self.queue = queue.Queue(maxsize=maxsize or Config.EMAIL_OUTBOX_MAXSIZE)
+
+        self._connection = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=1000)
+        self.enqueued = 0
+        self.sent = 0
+        self.retries = 0
+        self.dead_lettered = 0
+        self.connections_opened = 0
+        self.handed_off = 0
+
+    # --- Productor ---
+    def enqueue(self, recipient, subject, body):
+        """Encola un correo y retorna de inmediato. Si la cola está llena va a dead letters."""
+        message = {"recipient": recipient, "subject": subject, "body": body, "enqueued_at": time.time()}
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self._dead_letter(message, "Outbox queue full", attempts=0)
+            return False
+        self.enqueued += 1
+        return True
+
+    def flush(self, timeout: float = None):
+        """Espera a que se procesen los correos encolados. Retorna False si vence el timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def drain(self):
+        """Saca de la cola los correos pendientes y los devuelve (sin enviarlos)"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.queue.get_nowait())
+            except queue.Empty:
+                return messages
+            self.queue.task_done()
+
+    def hand_off(self, queue_url: str, client):
+        """
+        Pasa los correos pendientes a la cola SQS en lotes de 10 (send_message_batch).
+        Los que SQS rechaza se entregan por SMTP en el momento (camino de respaldo).
+        """
+        messages = self.drain()
+        for start in range(0, len(messages), 10):
+            batch = messages[start:start + 10]
+            entries = [{"Id": str(index), "MessageBody": json.dumps(message)} for index, message in enumerate(batch)]
+            try:
+                failed = [int(entry["Id"]) for entry in client.send_message_batch(QueueUrl=queue_url, Entries=entries).get("Failed", [])]
+            except Exception:
+                logger.error("Could not hand off emails to SQS", exc_info=True)
+                failed = list(range(len(batch)))
+            self.handed_off += len(batch) - len(failed)
+            for index in failed:
+                self.deliver(batch[index])
+        return len(messages)
+
+    def stats(self):
+        latencies = sorted(self._latencies)
+        return {
+            "queue_depth": self.queue.qsize(),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+            "connections_opened": self.connections_opened,
+            "handed_off": self.handed_off,
+            "send_latency_avg": sum(latencies) / len(latencies) if latencies else 0.0,
+            "send_latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else 0.0,
+        }
+
+    # --- Hilo de envío ---
+    def _ensure_worker(self):
+        if not self.background:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # Sin correos: se libera la conexión inactiva
+                self._disconnect()
+                continue
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for message in batch:
+                try:
+                    self.deliver(message)
+                except Exception:
+                    logger.error("Email outbox delivery crashed", exc_info=True)
+                finally:
+                    self.queue.task_done()
+
+    def deliver(self, message, dead_letter: bool = True, retries: int = None):
+        """
+        Envía un correo en el hilo actual sobre la conexión reutilizada, con hasta `retries`
+        reintentos (por defecto `max_retries`). Si se agotan, va a dead letters
+        (o solo retorna False con `dead_letter=False`).
+        """
+        retries = self.max_retries if retries is None else retries
+        msg = build_message(message["recipient"], message["subject"], message["body"])
+        last_error = None
+        for attempt in range(retries + 1):
+            if attempt:
+                self.retries += 1
+                time.sleep(self.retry_backoff * (2 ** (attempt - 1)))
+            try:
+                start = time.perf_counter()
+                self._get_connection().send_message(msg)
+                self._latencies.append(time.perf_counter() - start)
+                self.sent += 1
+                return True
+            except Exception as e:
+                last_error = e
+                logger.warning("Error al enviar correo (intento %s): %s", attempt + 1, e)
+                self._disconnect()
+        if dead_letter:
+            self._dead_letter(message, str(last_error), attempts=retries + 1)
+        return False
+
+    def _get_connection(self):
+        if self._connection is None:
+            if self.smtp_factory is None:
+                import smtplib
+                self.smtp_factory = smtplib.SMTP
+            connection = self.smtp_factory(Config.AWS_SMTP_HOST, Config.AWS_SMTP_PORT, timeout=Config.EMAIL_SMTP_TIMEOUT_SECONDS)
+            connection.starttls()
+            connection.login(Config.AWS_SMTP_USER, Config.AWS_SMTP_PASS)
+            self._connection = connection
+            self.connections_opened += 1
+        return self._connection
+
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except Exception:
+                pass
+            self._connection = None
+
+    def _dead_letter(self, message, error, attempts):
+        self.dead_lettered += 1
+        record = dict(message, error=error, attempts=attempts, failed_at=datetime.now(tz=timezone.utc).isoformat())
+        try:
+            with open(self.dead_letter_file, "a", encoding="utf-8") as dead_letter:
+                dead_letter.write(json.dumps(record) + "\n")
+        except OSError:
+            logger.error("Could not write email dead letter: %s", record, exc_info=True)
+
+
+local_smtp_server = LocalSMTPServer()
+outbox = EmailOutbox(
+    smtp_factory=local_smtp_server if Config.EMAIL_BACKEND == "local" else None,
+    # Con la cola SQS los correos se entregan en la función `mailer`, no en este proceso
+    background=not Config.EMAIL_QUEUE_URL,
+)
+
+__all__ = ["outbox", "EmailOutbox", "LocalSMTPServer", "local_smtp_server"]
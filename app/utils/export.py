@@ -0,0 +1,108 @@
+## Exportación en streaming (NDJSON / CSV) utils/export.py
+import csv
+import io
+from datetime import date, datetime, time, timedelta
+from fastapi import HTTPException, status
+from app.config import Config
+from app.utils.async_io import aio
+from app.utils.responses import dumps
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _parse_bound(value: str, name: str, end: bool):
+    try:
+        if len(value) == 10:
+            # Solo fecha: el límite superior incluye el día completo
+            day = date.fromisoformat(value)
+            moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+        else:
+            moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid date in '{name}': {value}")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=Config.TIME_ZONE)
+    # created_at se guarda en isoformat con Config.TIME_ZONE: los límites van en la misma zona
+    return moment.astimezone(Config.TIME_ZONE).isoformat()
+
+
+def date_range_key_condition(date_from: str = None, date_to: str = None, attribute: str = "sk"):
+    """
+    Condición de llave sobre un sort key que empieza con la fecha (`created_at#id`)
+    para el rango [date_from, date_to] (fechas o datetimes ISO; una fecha sola en
+    `date_to` incluye todo ese día). Devuelve (expresión, valores), o (None, {}) si
+    no hay límites.
+    """
+    values = {}
+    if date_from:
+        values[":date_from"] = _parse_bound(date_from, "from", end=False)
+    if date_to:
+        bound = _parse_bound(date_to, "to", end=True)
+        # Fecha sola: el límite es el inicio del día siguiente y ninguna llave "<límite>#id" lo alcanza.
+        # Datetime: "<límite>$" queda después de todas las llaves "<límite>#id" ('$' sigue a '#')
+        values[":date_to"] = bound if len(date_to) == 10 else bound + "$"
+    if date_from and date_to:
+        if values[":date_from"] > values[":date_to"]:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="'from' must be before 'to'")
+        return f"{attribute} BETWEEN :date_from AND :date_to", values
+    if date_from:
+        return f"{attribute} >= :date_from", values
+    if date_to:
+        return f"{attribute} <= :date_to", values
+    return None, {}
+
+
+async def ndjson_chunks(pages):
+    """Una línea JSON por item; un chunk por página leída"""
+    async for items in pages:
+        yield b"".join(dumps(item) + b"\n" for item in items)
+
+
+async def csv_chunks(pages, columns):
+    """CSV con encabezado y las `columns` indicadas; un chunk por página leída"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for items in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(items)
+        yield buffer.getvalue().encode()
+
+
+async def upload_export(chunks, bucket: str, key: str, content_type: str, client):
+    """
+    Sube los chunks a S3 sin armar el archivo completo: se acumulan hasta
+    `EXPORT_PART_SIZE` bytes y cada bloque va como una parte del multipart upload.
+    Un archivo que no llega a una parte se sube con un solo put_object.
+    Si algo falla, el multipart se aborta para no dejar partes huérfanas.
+    """
+    buffer = bytearray()
+    upload_id = None
+    parts = []
+    try:
+        async for chunk in chunks:
+            buffer += chunk
+            if len(buffer) >= Config.EXPORT_PART_SIZE:
+                if upload_id is None:
+                    upload = await aio(client).create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)
+                    upload_id = upload["UploadId"]
+                part = await aio(client).upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=len(parts) + 1, Body=bytes(buffer))
+                parts.append({"ETag": part["ETag"], "PartNumber": len(parts) + 1})
+                buffer.clear()
+
+        if upload_id is None:
+            await aio(client).put_object(Bucket=bucket, Key=key, Body=bytes(buffer), ContentType=content_type)
+            return
+        if buffer:
+            part = await aio(client).upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=len(parts) + 1, Body=bytes(buffer))
+            parts.append({"ETag": part["ETag"], "PartNumber": len(parts) + 1})
+        await aio(client).complete_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts})
+    except BaseException:
+        if upload_id is not None:
+            await aio(client).abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
@@ -0,0 +1,57 @@
+## Campos parciales (?fields=) y expansión de relaciones (?expand=) utils/fieldsets.py
+from fastapi import HTTPException, status
+
+
+def _parse_list(value: str):
+    return tuple(dict.fromkeys(part.strip() for part in value.split(",") if part.strip()))
+
+
+def parse_fields(fields: str, allowed):
+    """
+    Convierte `?fields=name,min_amount` en una tupla sin repetidos (None = item completo).
+    Responde 400 si se pide un atributo que el esquema no tiene.
+    """
+    if not fields:
+        return None
+    parsed = _parse_list(fields)
+    unknown = [field for field in parsed if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)} (allowed: {', '.join(allowed)})"
+        )
+    return parsed or None
+
+
+def parse_expand(expand: str, allowed):
+    """Convierte `?expand=category` en un conjunto de relaciones; 400 si alguna no existe"""
+    if not expand:
+        return frozenset()
+    parsed = _parse_list(expand)
+    unknown = [relation for relation in parsed if relation not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown expand: {', '.join(unknown)} (allowed: {', '.join(allowed)})"
+        )
+    return frozenset(parsed)
+
+
+def projection(fields, required=("id",)):
+    """
+    ProjectionExpression (con alias, para no chocar con palabras reservadas como `name`
+    o `status`) que lee solo `fields` más los atributos `required` que usa el controlador.
+    """
+    if not fields:
+        return {}
+    names = dict.fromkeys(required + tuple(fields))
+    aliases = {f"#p{index}": name for index, name in enumerate(names)}
+    return {"ProjectionExpression": ", ".join(aliases), "ExpressionAttributeNames": aliases}
+
+
+def select(items, fields):
+    """Deja en cada item solo el id y los `fields` pedidos (los items no se modifican)"""
+    if not fields:
+        return items
+    keep = tuple(dict.fromkeys(("id",) + tuple(fields)))
+    return [{key: item[key] for key in keep if key in item} for item in items]
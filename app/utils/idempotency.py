@@ -0,0 +1,120 @@
+## Idempotency-Key para las operaciones con efectos (suscribir / cancelar) utils/idempotency.py
+import logging
+import time
+
+import botocore
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from app.config import Config
+from app.utils.async_io import aio
+from app.utils.dynamo_types import deserialize
+from app.utils.responses import dumps
+from app.utils.time import get_current_time
+
+import app.schemas.idempotency_keys as idempotencyKeys
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+async def _acquire(record_id: str, scope: str, now: int):
+    """
+    Reserva la llave con un put condicional. Devuelve None si quedó reservada
+    o el registro existente si otro request ya la usó.
+    """
+    try:
+        await aio(idempotencyKeys.idempotency_keys_db).put_item(
+            Item={
+                "id": record_id,
+                "state": IN_PROGRESS,
+                "scope": scope,
+                "locked_until": now + Config.IDEMPOTENCY_LOCK_SECONDS,
+                idempotencyKeys.TTL_ATTRIBUTE: now + Config.IDEMPOTENCY_TTL_SECONDS,
+                "created_at": get_current_time(),
+            },
+            # Libre si no existe, si venció (el TTL de DynamoDB borra con demora) o si el request anterior quedó colgado
+            ConditionExpression="attribute_not_exists(id) OR #exp < :now OR (#state = :in_progress AND locked_until < :now)",
+            ExpressionAttributeNames={"#state": "state", "#exp": idempotencyKeys.TTL_ATTRIBUTE},
+            ExpressionAttributeValues={":now": now, ":in_progress": IN_PROGRESS},
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+        return None
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        if e.response.get("Item"):
+            return deserialize(e.response["Item"])
+    response = await aio(idempotencyKeys.idempotency_keys_db).get_item(Key={"id": record_id}, ConsistentRead=True)
+    return response.get("Item") or {"state": IN_PROGRESS, "scope": scope}
+
+
+async def _complete(record_id: str, status_code: int, body: bytes, media_type: str):
+    try:
+        await aio(idempotencyKeys.idempotency_keys_db).update_item(
+            Key={"id": record_id},
+            UpdateExpression="SET #state = :completed, status_code = :code, body = :body, media_type = :media REMOVE locked_until",
+            ExpressionAttributeNames={"#state": "state"},
+            ExpressionAttributeValues={":completed": COMPLETED, ":code": status_code, ":body": body.decode(), ":media": media_type},
+        )
+    except Exception:
+        # La operación ya se hizo: se responde igual y la llave se libera al vencer el bloqueo
+        logger.exception("Could not store the idempotent response %s", record_id)
+
+
+async def _release(record_id: str):
+    try:
+        await aio(idempotencyKeys.idempotency_keys_db).delete_item(Key={"id": record_id})
+    except Exception:
+        logger.exception("Could not release the idempotency key %s", record_id)
+
+
+def _replay(record: dict, scope: str):
+    if record.get("scope") != scope:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Idempotency-Key already used for a different request")
+    if record.get("state") != COMPLETED:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A request with this Idempotency-Key is still in progress")
+    return Response(
+        content=record["body"],
+        status_code=int(record["status_code"]),
+        media_type=record.get("media_type") or "application/json",
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+async def idempotent(key: str, user_id: str, scope: str, operation):
+    """
+    Ejecuta `operation` (función async sin argumentos que devuelve la respuesta) una sola
+    vez por `Idempotency-Key` y usuario. La primera respuesta (éxito o error 4xx) se guarda
+    con TTL y los reintentos la reciben tal cual, sin volver a escribir ni enviar correos.
+    `scope` identifica el request (método y ruta): la misma llave en otra ruta responde 422.
+    Sin llave, la operación se ejecuta directamente.
+    """
+    if not key:
+        return await operation()
+    if len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Idempotency-Key too long (max {MAX_KEY_LENGTH})")
+
+    record_id = f"{user_id}#{key}"
+    existing = await _acquire(record_id, scope, int(time.time()))
+    if existing is not None:
+        return _replay(existing, scope)
+
+    try:
+        response = await operation()
+    except HTTPException as e:
+        if e.status_code < 500:
+            # Error del cliente: es el resultado de la operación y también se repite
+            await _complete(record_id, e.status_code, dumps({"detail": e.detail}), "application/json")
+        else:
+            await _release(record_id)
+        raise
+    except BaseException:
+        await _release(record_id)
+        raise
+
+    await _complete(record_id, response.status_code, response.body, response.media_type)
+    return response
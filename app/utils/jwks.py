@@ -0,0 +1,99 @@
+## Verificación local de los access tokens de Cognito utils/jwks.py
+import json
+import logging
+import threading
+import time
+import urllib.request
+import jwt
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Tiempo mínimo entre recargas forzadas por un `kid` desconocido, y entre intentos tras una descarga fallida
+JWKS_MIN_REFRESH_SECONDS = 60
+
+_lock = threading.Lock()
+_keys = {}
+_loaded_at = 0.0
+_failed_at = None
+
+
+class JWKSUnavailable(Exception):
+    """No hay llaves: la descarga del JWKS falló (o está en espera tras un fallo reciente)"""
+
+
+def load_jwks():
+    """Lee el JWKS del archivo local configurado o del endpoint del user pool"""
+    if Config.AWS_COGNITO_JWKS_FILE:
+        with open(Config.AWS_COGNITO_JWKS_FILE, encoding="utf-8") as jwks_file:
+            return json.load(jwks_file)
+    with urllib.request.urlopen(Config.AWS_COGNITO_JWKS_URL, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def _refresh_keys():
+    """
+    Recarga el JWKS. Si falla, se conservan las llaves anteriores y se anota la hora:
+    durante JWKS_MIN_REFRESH_SECONDS no se vuelve a intentar (caché negativa), así una
+    caída de Cognito no encola cada request detrás del timeout de la descarga.
+    """
+    global _keys, _loaded_at, _failed_at
+    try:
+        jwks = load_jwks()
+        keys = {key["kid"]: jwt.PyJWK(key).key for key in jwks.get("keys", [])}
+    except Exception:
+        _failed_at = time.monotonic()
+        logger.warning("Could not load the JWKS, keeping %d cached keys", len(_keys), exc_info=True)
+        return
+    _keys = keys
+    _loaded_at = time.monotonic()
+    _failed_at = None
+
+
+def get_signing_key(kid: str):
+    """
+    Devuelve la llave pública del `kid`. El JWKS se mantiene en memoria
+    JWKS_CACHE_SECONDS y se recarga antes si aparece un `kid` nuevo (rotación).
+    Si la recarga falla se siguen usando las llaves anteriores; sin ninguna llave
+    lanza JWKSUnavailable (la sesión se valida entonces contra Cognito).
+    """
+    with _lock:
+        now = time.monotonic()
+        age = now - _loaded_at
+        backing_off = _failed_at is not None and now - _failed_at < JWKS_MIN_REFRESH_SECONDS
+        if not backing_off and (not _keys or age > Config.JWKS_CACHE_SECONDS or (kid not in _keys and age > JWKS_MIN_REFRESH_SECONDS)):
+            _refresh_keys()
+        if not _keys:
+            raise JWKSUnavailable("JWKS unavailable")
+        key = _keys.get(kid)
+    if key is None:
+        raise jwt.InvalidTokenError(f"Unknown signing key: {kid}")
+    return key
+
+
+def clear_jwks_cache():
+    global _keys, _loaded_at, _failed_at
+    with _lock:
+        _keys = {}
+        _loaded_at = 0.0
+        _failed_at = None
+
+
+def verify_access_token(token: str):
+    """
+    Verifica firma, expiración, emisor y cliente de un access token de Cognito.
+    Devuelve los claims; lanza jwt.ExpiredSignatureError o jwt.InvalidTokenError.
+    """
+    header = jwt.get_unverified_header(token)
+    claims = jwt.decode(
+        token,
+        get_signing_key(header.get("kid")),
+        algorithms=["RS256"],
+        issuer=Config.AWS_COGNITO_ISSUER,
+        options={"require": ["exp", "iss", "sub"]},
+    )
+    if claims.get("token_use") != "access":
+        raise jwt.InvalidTokenError("Not an access token")
+    if claims.get("client_id") != Config.AWS_COGNITO_CLIENT_ID:
+        raise jwt.InvalidTokenError("Token issued for another client")
+    return claims
@@ -0,0 +1,55 @@
+## Clientes y tablas de AWS creados en el primer uso utils/lazy.py
+import importlib
+import threading
+
+
+class LazyProxy:
+    """
+    Proxy que construye el objeto real (cliente, recurso o tabla de boto3)
+    la primera vez que se usa un atributo y luego delega todo en él.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def _get_instance(self):
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._instance = self._factory()
+        return instance
+
+    @property
+    def initialized(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        # Solo se llama para atributos que no están en el proxy: los asignados
+        # sobre el proxy (p.ej. con mock.patch) tienen prioridad
+        if name in ("_factory", "_instance", "_lock"):
+            raise AttributeError(name)
+        return getattr(self._get_instance(), name)
+
+
+class LazyTable(LazyProxy):
+    """Tabla perezosa: `.name` se responde sin construir el recurso de DynamoDB"""
+
+    def __init__(self, resource: "LazyResource", name: str):
+        super().__init__(lambda: resource._get_instance().Table(name))
+        self.name = name
+
+
+class LazyResource(LazyProxy):
+    """Recurso perezoso: `Table(name)` devuelve una LazyTable sin construir el recurso"""
+
+    def Table(self, name: str):
+        return LazyTable(self, name)
+
+
+def lazy_import(module: str):
+    """Módulo que se importa en el primer uso (p.ej. `boto3.dynamodb.conditions`)"""
+    return LazyProxy(lambda: importlib.import_module(module))
@@ -0,0 +1,237 @@
+## Métricas operacionales de la API utils/metrics.py
+import json
+import threading
+import time
+from app.config import Config
+from app.utils.request_tracing import current_calls
+
+# Límites (en segundos) de los buckets de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), value: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def value(self, labels=()):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, labels=(), value: float = 1):
+        self.inc(labels, -value)
+
+    def set(self, labels=(), value: float = 0):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def count(self, labels):
+        series = self._series.get(labels)
+        return series["count"] if series else 0
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    bucket_labels = _format_labels(self.labels + ("le",), labels + (f"{bound:g}",))
+                    lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels + ("le",), labels + ("+Inf",))} {series["count"]}')
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {series['sum']:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {series['count']}")
+        return lines
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Latencia de los requests por ruta, método y status",
+    labels=("route", "method", "status"),
+)
+# La ruta se conoce recién después del routing: los requests en curso se agrupan por método
+requests_in_flight = Gauge("http_requests_in_flight", "Requests en curso por método", labels=("method",))
+backend_calls = Counter(
+    "backend_calls_total", "Llamadas a servicios externos por servicio y operación", labels=("service", "operation"),
+)
+backend_call_seconds = Counter(
+    "backend_call_duration_seconds_total", "Tiempo acumulado en servicios externos", labels=("service", "operation"),
+)
+consumed_capacity = Counter(
+    "dynamodb_consumed_capacity_total", "Capacidad consumida de DynamoDB por operación", labels=("operation",),
+)
+
+metrics = [request_latency, requests_in_flight, backend_calls, backend_call_seconds, consumed_capacity]
+
+
+def _cache_lines():
+    from app.utils.catalog_cache import catalog_cache_stats
+
+    stats = catalog_cache_stats().values()
+    lines = []
+    for name, kind, help, key in (
+        ("cache_hits_total", "counter", "Aciertos de las cachés en memoria", "hits"),
+        ("cache_misses_total", "counter", "Fallos de las cachés en memoria", "misses"),
+        ("cache_evictions_total", "counter", "Desalojos de las cachés en memoria", "evictions"),
+        ("cache_size", "gauge", "Entradas en las cachés en memoria", "size"),
+        ("cache_hit_ratio", "gauge", "Proporción de aciertos de las cachés en memoria", "hit_ratio"),
+    ):
+        lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{cache="{cache["name"]}"}} {cache[key]:g}' for cache in stats]
+    return lines
+
+
+def _outbox_lines():
+    from app.utils.email_outbox import outbox
+
+    stats = outbox.stats()
+    return [
+        "# HELP email_outbox_queue_depth Correos pendientes en la cola de salida",
+        "# TYPE email_outbox_queue_depth gauge",
+        f"email_outbox_queue_depth {stats['queue_depth']}",
+        "# HELP email_outbox_sent_total Correos entregados",
+        "# TYPE email_outbox_sent_total counter",
+        f"email_outbox_sent_total {stats['sent']}",
+        "# HELP email_outbox_dead_lettered_total Correos enviados a dead letters",
+        "# TYPE email_outbox_dead_lettered_total counter",
+        f"email_outbox_dead_lettered_total {stats['dead_lettered']}",
+    ]
+
+
+def render_prometheus():
+    """Todas las métricas en el formato de texto de Prometheus"""
+    lines = []
+    for metric in metrics:
+        lines += metric.render()
+    lines += _cache_lines()
+    lines += _outbox_lines()
+    return "\n".join(lines) + "\n"
+
+
+def record_request(route: str, method: str, status: int, duration: float, calls=None):
+    """Agrega un request terminado a las métricas en proceso"""
+    request_latency.observe((route, method, str(status)), duration)
+    if calls is None:
+        return
+    for (service, operation), stats in calls.operations.items():
+        backend_calls.inc((service, operation), stats["count"])
+        backend_call_seconds.inc((service, operation), stats["duration"])
+        if stats["capacity"]:
+            consumed_capacity.inc((operation,), stats["capacity"])
+
+
+def emf_record(route: str, method: str, status: int, duration: float, calls=None):
+    """
+    Línea en formato Embedded Metric Format de CloudWatch: en Lambda cada
+    invocación escribe sus métricas en el log y CloudWatch las agrega.
+    """
+    totals = calls.totals() if calls is not None else {}
+    values = {"Latency": round(duration * 1000, 3)}
+    units = {"Latency": "Milliseconds"}
+    for service, total in totals.items():
+        name = f"{service.capitalize()}Calls"
+        values[name] = total["count"]
+        units[name] = "Count"
+        if total["capacity"]:
+            values["ConsumedCapacity"] = total["capacity"]
+            units["ConsumedCapacity"] = "Count"
+
+    return dict(
+        {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": Config.METRICS_NAMESPACE,
+                    "Dimensions": [["Route", "Method"], ["Route", "Method", "Status"]],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, unit in units.items()],
+                }],
+            },
+            "Route": route,
+            "Method": method,
+            "Status": str(status),
+        },
+        **values,
+    )
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: mide cada request con la plantilla de la ruta (no el path
+    concreto, para acotar la cardinalidad). En modo "prometheus" agrega en proceso;
+    en modo "emf" (Lambda) escribe una línea EMF por request.
+    """
+
+    def __init__(self, app, mode: str = None):
+        self.app = app
+        self.mode = mode or Config.METRICS_MODE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        requests_in_flight.inc((method,))
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_flight.dec((method,))
+            duration = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            if self.mode == "emf":
+                print(json.dumps(emf_record(route, method, status_code, duration, current_calls.get())), flush=True)
+            else:
+                record_request(route, method, status_code, duration, current_calls.get())
@@ -0,0 +1,43 @@
+## Migración: copia la auditoría de UserBankFundsAudit (llave id) a la tabla con llave user_id + created_at#id
+## Uso: python -m app.utils.migrate_user_bank_funds_audit
+import asyncio
+
+from app.config import dynamodb
+from app.utils.parallel_scan import parallel_scan
+
+import app.schemas.user_bank_funds_audit as userBankFundsAudit
+
+LEGACY_TABLE = "UserBankFundsAudit"
+
+
+async def migrate_user_bank_funds_audit(source_table_name: str = LEGACY_TABLE):
+    """
+    Recorre la tabla anterior y escribe cada registro en la nueva con su `sk`.
+    Se puede correr varias veces: la llave de destino sale de user_id, created_at e id,
+    así que repetir la copia sobreescribe el mismo item.
+
+    Orden de despliegue: crear las tablas (dynamo_db), desplegar (las escrituras nuevas
+    ya van a la tabla nueva), correr esta migración y después retirar la tabla anterior.
+    La tabla anterior se lee con `parallel_scan` (segmentos en paralelo).
+    """
+    source = dynamodb.Table(source_table_name)
+    copied, skipped = 0, []
+
+    with userBankFundsAudit.user_bank_funds_audit_db.batch_writer() as batch:
+        async for page in parallel_scan(source):
+            for item in page:
+                if not item.get("user_id") or not item.get("created_at"):
+                    skipped.append(item["id"])
+                    continue
+                item["sk"] = userBankFundsAudit.UserBankFundsAuditSchema.sort_key(item["created_at"], item["id"])
+                batch.put_item(Item=item)
+                copied += 1
+
+    return {"copied": copied, "skipped": skipped}
+
+
+if __name__ == "__main__":
+    result = asyncio.run(migrate_user_bank_funds_audit())
+    print(f"✅ {result['copied']} registros copiados, {len(result['skipped'])} omitidos")
+    for audit_id in result["skipped"]:
+        print(f"⚠️  {audit_id} no tiene user_id o created_at")
@@ -0,0 +1,99 @@
+## Paginación por cursor utils/pagination.py
+import base64
+import hashlib
+import hmac
+import json
+from fastapi import HTTPException, status
+from app.config import Config
+from app.utils.async_io import run_io
+from app.utils.dynamo_types import deserialize, json_items, serialize
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _signature(scope: str, payload: str) -> str:
+    digest = hmac.new(
+        str.encode(Config.SECRET_KEY),
+        msg=str.encode(f"{scope}.{payload}"),
+        digestmod=hashlib.sha256
+    ).digest()
+    return _b64encode(digest)
+
+
+def encode_cursor(last_evaluated_key: dict, scope: str):
+    """
+    Convierte el LastEvaluatedKey de DynamoDB en un cursor opaco y firmado.
+    El scope (normalmente el nombre de la tabla) evita reutilizar un cursor en otro endpoint.
+    """
+    if not last_evaluated_key:
+        return None
+    payload = _b64encode(json.dumps(serialize(last_evaluated_key), separators=(",", ":")).encode())
+    return f"{payload}.{_signature(scope, payload)}"
+
+
+def decode_cursor(cursor: str, scope: str):
+    """Valida la firma del cursor y devuelve el ExclusiveStartKey correspondiente"""
+    if not cursor:
+        return None
+    try:
+        payload, signature = cursor.split(".", 1)
+        if not hmac.compare_digest(signature, _signature(scope, payload)):
+            raise ValueError("invalid signature")
+        return deserialize(json.loads(_b64decode(payload)))
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+async def paginate(table, operation: str = "scan", limit: int = Config.PAGINATION_DEFAULT_LIMIT, cursor: str = None, **kwargs):
+    """
+    Ejecuta una sola página de scan/query sobre la tabla.
+    Devuelve los items y el cursor de la siguiente página (None si no hay más).
+    """
+    scope = table.name
+    params = dict(kwargs, Limit=min(limit, Config.PAGINATION_MAX_LIMIT))
+    start_key = decode_cursor(cursor, scope)
+    if start_key:
+        params["ExclusiveStartKey"] = start_key
+
+    response = await run_io(getattr(table, operation), **params)
+    return response.get("Items", []), encode_cursor(response.get("LastEvaluatedKey"), scope)
+
+
+async def paginate_raw(table_name: str, client, operation: str = "scan", limit: int = Config.PAGINATION_DEFAULT_LIMIT, cursor: str = None, **kwargs):
+    """
+    Igual que `paginate` pero con el cliente de bajo nivel: los items llegan en
+    formato de DynamoDB y se devuelven listos para la respuesta JSON (ver dynamo_types.json_items).
+    Los valores de ExpressionAttributeValues se pasan en formato Python y los cursores
+    son compatibles con los de `paginate` sobre la misma tabla.
+    """
+    params = dict(kwargs, TableName=table_name, Limit=min(limit, Config.PAGINATION_MAX_LIMIT))
+    if "ExpressionAttributeValues" in params:
+        params["ExpressionAttributeValues"] = serialize(params["ExpressionAttributeValues"])
+    start_key = decode_cursor(cursor, table_name)
+    if start_key:
+        params["ExclusiveStartKey"] = serialize(start_key)
+
+    response = await run_io(getattr(client, operation), **params)
+    last_evaluated_key = response.get("LastEvaluatedKey")
+    next_cursor = encode_cursor(deserialize(last_evaluated_key), table_name) if last_evaluated_key else None
+    return json_items(response.get("Items", [])), next_cursor
+
+
+async def iterate_raw(table_name: str, client, operation: str = "query", **kwargs):
+    """
+    Recorre todas las páginas de scan/query con el cliente de bajo nivel y entrega
+    cada página ya convertida a valores JSON, sin acumularlas.
+    """
+    params = dict(kwargs, TableName=table_name)
+    if "ExpressionAttributeValues" in params:
+        params["ExpressionAttributeValues"] = serialize(params["ExpressionAttributeValues"])
+    while True:
+        response = await run_io(getattr(client, operation), **params)
+        yield json_items(response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
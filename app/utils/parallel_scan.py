@@ -0,0 +1,73 @@
+## Scan paralelo por segmentos utils/parallel_scan.py
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.config import Config
+
+# Pool propio para los segmentos: un scan largo no ocupa los hilos de I/O de los requests
+scan_executor = ThreadPoolExecutor(max_workers=Config.SCAN_MAX_WORKERS, thread_name_prefix="scan")
+
+
+async def parallel_scan(table, segments: int = None, queue_size: int = None, **scan_kwargs):
+    """
+    Recorre la tabla completa dividiendo el scan en `segments` workers
+    (Segment/TotalSegments) sobre el pool de scans y entrega las páginas
+    a medida que llegan, mezcladas sin orden entre segmentos.
+
+    La cola entre los workers y el consumidor es acotada (`queue_size` páginas):
+    si el consumidor se atrasa, los workers esperan antes de leer la página
+    siguiente. Si el consumidor deja de iterar, los workers se detienen.
+
+    `table` puede ser una tabla del recurso o el cliente (con TableName en scan_kwargs).
+
+        async for items in parallel_scan(users.users_db, segments=8):
+            ...
+    """
+    segments = max(1, segments or Config.SCAN_SEGMENTS)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=queue_size or Config.SCAN_QUEUE_MAXSIZE)
+    stop = threading.Event()
+
+    def put(message):
+        # Bloquea el hilo del worker mientras la cola esté llena (backpressure)
+        asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+    def worker(segment: int):
+        params = dict(scan_kwargs, Segment=segment, TotalSegments=segments)
+        try:
+            while not stop.is_set():
+                response = table.scan(**params)
+                put(("items", response.get("Items", [])))
+                if "LastEvaluatedKey" not in response:
+                    break
+                params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        except Exception as e:
+            put(("error", e))
+        finally:
+            put(("done", segment))
+
+    # Cada worker corre con una copia del contexto (request en curso, tracing)
+    futures = [
+        loop.run_in_executor(scan_executor, functools.partial(contextvars.copy_context().run, worker, segment))
+        for segment in range(segments)
+    ]
+    pending = segments
+    try:
+        while pending:
+            kind, value = await queue.get()
+            if kind == "items":
+                if value:
+                    yield value
+            elif kind == "error":
+                raise value
+            else:
+                pending -= 1
+    finally:
+        stop.set()
+        # Vaciar la cola para liberar a los workers que esperan espacio
+        while not all(future.done() for future in futures):
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.sleep(0.005)
@@ -0,0 +1,167 @@
+## Contabilidad de llamadas a servicios por request utils/request_tracing.py
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("app.requests")
+
+# Operaciones de DynamoDB que aceptan ReturnConsumedCapacity
+CAPACITY_OPERATIONS = {
+    "GetItem", "PutItem", "UpdateItem", "DeleteItem", "Query", "Scan",
+    "BatchGetItem", "BatchWriteItem", "TransactGetItems", "TransactWriteItems",
+}
+
+# Nombre corto de cada servicio en los headers y el log
+SERVICE_NAMES = {"dynamodb": "dynamodb", "cognito-idp": "cognito"}
+
+# Llamadas del request en curso (None fuera de un request)
+current_calls = contextvars.ContextVar("current_calls", default=None)
+
+
+class RequestCalls:
+    """Llamadas, latencia y capacidad consumida por servicio y operación durante un request"""
+
+    def __init__(self):
+        self.operations = {}
+        self._lock = threading.Lock()
+
+    def record(self, service: str, operation: str, duration: float, capacity: float = 0.0):
+        with self._lock:
+            stats = self.operations.setdefault((service, operation), {"count": 0, "duration": 0.0, "capacity": 0.0})
+            stats["count"] += 1
+            stats["duration"] += duration
+            stats["capacity"] += capacity
+
+    def totals(self):
+        """Totales por servicio: {servicio: {count, duration, capacity}}"""
+        totals = {}
+        with self._lock:
+            for (service, _), stats in self.operations.items():
+                total = totals.setdefault(service, {"count": 0, "duration": 0.0, "capacity": 0.0})
+                for key in total:
+                    total[key] += stats[key]
+        return totals
+
+    def server_timing(self, total_duration: float):
+        """Valor del header Server-Timing (duraciones en ms)"""
+        entries = [f"app;dur={total_duration * 1000:.2f}"]
+        for service, total in sorted(self.totals().items()):
+            entries.append(f'{service};dur={total["duration"] * 1000:.2f};desc="{_describe(total)}"')
+        with self._lock:
+            for (service, operation), stats in sorted(self.operations.items()):
+                entries.append(f'{service}.{operation};dur={stats["duration"] * 1000:.2f};desc="{_describe(stats)}"')
+        return ", ".join(entries)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                f"{service}.{operation}": {
+                    "count": stats["count"],
+                    "duration_ms": round(stats["duration"] * 1000, 3),
+                    "consumed_capacity": stats["capacity"],
+                }
+                for (service, operation), stats in sorted(self.operations.items())
+            }
+
+
+def _describe(stats):
+    desc = f'{stats["count"]} calls'
+    if stats["capacity"]:
+        desc += f', {stats["capacity"]:g} CU'
+    return desc
+
+
+def _consumed_capacity(parsed):
+    consumed = (parsed or {}).get("ConsumedCapacity")
+    if not consumed:
+        return 0.0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return float(sum(entry.get("CapacityUnits", 0) for entry in consumed))
+
+
+def instrument_client(client, consumed_capacity: bool = True):
+    """
+    Registra hooks de botocore en el cliente: cuenta y cronometra cada operación
+    en el request en curso y, para DynamoDB, pide ReturnConsumedCapacity=TOTAL.
+    """
+    service = client.meta.service_model.service_name
+    name = SERVICE_NAMES.get(service, service)
+    events = client.meta.events
+
+    def add_capacity(params, model, **kwargs):
+        if model.name in CAPACITY_OPERATIONS and current_calls.get() is not None:
+            params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+    def before_call(context, **kwargs):
+        context["tracing_start"] = time.perf_counter()
+
+    def after_call(parsed, model, context, **kwargs):
+        calls = current_calls.get()
+        start = context.pop("tracing_start", None)
+        if calls is None or start is None:
+            return
+        calls.record(name, model.name, time.perf_counter() - start, _consumed_capacity(parsed))
+
+    if service == "dynamodb" and consumed_capacity:
+        events.register(f"provide-client-params.{service}", add_capacity)
+    # Primero en la cadena: un handler de before-call que responde (p.ej. Stubber) corta la emisión
+    events.register_first("before-call.*.*", before_call)
+    events.register("after-call", after_call)
+    return client
+
+
+@contextmanager
+def track(service: str, operation: str):
+    """Registra en el request en curso una llamada que no pasa por boto3 (p.ej. SMTP)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        calls = current_calls.get()
+        if calls is not None:
+            calls.record(service, operation, time.perf_counter() - start)
+
+
+class RequestTracingMiddleware:
+    """
+    Middleware ASGI: abre un RequestCalls por request, agrega el header
+    Server-Timing a la respuesta y escribe una línea de log JSON al terminar.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        calls = RequestCalls()
+        token = current_calls.set(calls)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", calls.server_timing(time.perf_counter() - start).encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_calls.reset(token)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(json.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    "calls": calls.to_dict(),
+                }))
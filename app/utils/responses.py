@@ -0,0 +1,46 @@
+## Respuesta JSON con orjson utils/responses.py
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from app.config import Config
+
+_MONEY_QUANTUM = Decimal(1).scaleb(-Config.MONEY_DECIMAL_PLACES)
+
+
+def money(value: Decimal):
+    """
+    Política de montos: los Decimal enteros salen como int y el resto se
+    redondea (ROUND_HALF_UP) a Config.MONEY_DECIMAL_PLACES decimales.
+    """
+    if value == value.to_integral_value():
+        return int(value)
+    return float(value.quantize(_MONEY_QUANTUM, rounding=ROUND_HALF_UP))
+
+
+def _default(value):
+    # orjson serializa de forma nativa str, int, float, dict, list, Enum (str) y datetime
+    if isinstance(value, Decimal):
+        return money(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa con orjson: recibe directamente los ítems de
+    DynamoDB (Decimal, Enum, datetime) sin pasar por jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,12 +1,11 @@
 ## Envío de correos electrónicos utils/send_email.py
-import jwt
-import smtplib
 from datetime import datetime, timedelta, timezone
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from app.config import Config
+from app.utils.email_outbox import outbox
+from app.utils.request_tracing import track
 
 def generate_verification_token(user_id):
+    import jwt  # PyJWT solo se carga si se generan tokens de verificación
     payload = {
         "user_id": user_id,
         "exp": datetime.now(tz=timezone.utc) + timedelta(hours=24)
@@ -15,28 +14,12 @@ def generate_verification_token(user_id):
     return token
 
 def send_email(recipient, subject, body):
-    msg = MIMEMultipart()
-    msg['From'] = Config.SES_VERIFIED_EMAIL
-    msg['To'] = recipient
-    msg['Subject'] = subject
-
-    if "Text" in body:
-        msg.attach(MIMEText(body["Text"], 'plain'))
-    if "Html" in body:
-        msg.attach(MIMEText(body["Html"], 'html'))
-
-    server = None
-    try:
-        server = smtplib.SMTP(Config.AWS_SMTP_HOST, Config.AWS_SMTP_PORT)
-        server.starttls()
-        server.login(Config.AWS_SMTP_USER, Config.AWS_SMTP_PASS)
-        server.send_message(msg)
-        print("Correo enviado correctamente")
-    except Exception as e:
-        print(f"Error al enviar correo: {e}")
-    finally:
-        if server:
-            server.quit()
+    """
+    Encola el correo en la cola de salida y retorna de inmediato;
+    el envío SMTP ocurre en el hilo de la cola (ver utils/email_outbox.py).
+    """
+    with track("smtp", "Enqueue"):
+        return outbox.enqueue(recipient, subject, body)
 
 def send_subscription_funds_email(to_email, user_name, bank_fund):
     subject = "Fondo de Inversión Registrado"
@@ -44,25 +27,16 @@ def send_subscription_funds_email(to_email, user_name, bank_fund):
         "Html": f"Hola {user_name}, usted se ha registrado al fondo de inversión {bank_fund['name']} con un monto de {bank_fund['currency']} {bank_fund['min_amount']}."
     }
 
-    try:
-        send_email(to_email, subject, body)
-        return True
-    except Exception as e:
-        print(f"Error al enviar correo: {e}")
-        return False
+    return send_email(to_email, subject, body)
    
-def send_retired_funds_email(to_email, user_name, bank_fund):
+def send_retired_funds_email(to_email, user_name, bank_fund, refund_amount, currency=None):
+    # El reintegro es el monto de la posición, no el mínimo actual del fondo
     subject = "Fondo de Inversión Retirado"
     body = {
-        "Html": f"Hola {user_name}, se ha retirado del fondo de inversión {bank_fund['name']}, le ha sido retornado el capital invertido por valor de {bank_fund['currency']} {bank_fund['min_amount']}."
+        "Html": f"Hola {user_name}, se ha retirado del fondo de inversión {bank_fund['name']}, le ha sido retornado el capital invertido por valor de {currency or bank_fund['currency']} {refund_amount}."
     }
 
-    try:
-        send_email(to_email, subject, body)
-        return True
-    except Exception as e:
-        print(f"Error al enviar correo: {e}")
-        return False
+    return send_email(to_email, subject, body)
 
 def send_insufficient_funds_email(to_email, user_name, bank_fund):
     subject = "Fondo de Inversión Insuficiente"
@@ -70,9 +44,22 @@ def send_insufficient_funds_email(to_email, user_name, bank_fund):
         "Html": f"Hola {user_name}, usted no cuenta con saldo disponible para subscribirse al fondo de inversión {bank_fund['name']}. Para ello necesita disponer de un monto mínimo de {bank_fund['currency']} {bank_fund['min_amount']}."
     }
 
-    try:
-        send_email(to_email, subject, body)
-        return True
-    except Exception as e:
-        print(f"Error al enviar correo: {e}")
-        return False
\ No newline at end of file
+    return send_email(to_email, subject, body)
+
+def send_bulk_subscription_email(to_email, user_name, bank_funds):
+    subject = "Fondos de Inversión Registrados"
+    funds = "".join(f"<li>{bank_fund['name']}: {bank_fund['currency']} {bank_fund['min_amount']}</li>" for bank_fund in bank_funds)
+    body = {
+        "Html": f"Hola {user_name}, usted se ha registrado a {len(bank_funds)} fondos de inversión:<ul>{funds}</ul>"
+    }
+
+    return send_email(to_email, subject, body)
+
+def send_bulk_insufficient_funds_email(to_email, user_name, bank_funds, total):
+    subject = "Fondos de Inversión Insuficientes"
+    funds = "".join(f"<li>{bank_fund['name']}: {bank_fund['currency']} {bank_fund['min_amount']}</li>" for bank_fund in bank_funds)
+    body = {
+        "Html": f"Hola {user_name}, usted no cuenta con saldo disponible para subscribirse a estos fondos de inversión:<ul>{funds}</ul>Para ello necesita disponer de un monto mínimo total de {total}."
+    }
+
+    return send_email(to_email, subject, body)
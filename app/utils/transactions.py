@@ -0,0 +1,43 @@
+## Construcción de operaciones para TransactWriteItems utils/transactions.py
+from app.utils.dynamo_types import serialize
+
+# Límite de operaciones por llamada a TransactWriteItems
+TRANSACT_MAX_ITEMS = 100
+
+
+def transact_put(table_name: str, item: dict, condition: str = None, values: dict = None, names: dict = None):
+    """Operación Put de una transacción (item en formato Python)"""
+    operation = {"TableName": table_name, "Item": serialize(item)}
+    if condition:
+        operation["ConditionExpression"] = condition
+    if values:
+        operation["ExpressionAttributeValues"] = serialize(values)
+    if names:
+        operation["ExpressionAttributeNames"] = names
+    return {"Put": operation}
+
+
+def transact_update(table_name: str, key: dict, update_expression: str, values: dict = None, condition: str = None, names: dict = None):
+    """Operación Update de una transacción (llave y valores en formato Python)"""
+    operation = {
+        "TableName": table_name,
+        "Key": serialize(key),
+        "UpdateExpression": update_expression,
+    }
+    if values:
+        operation["ExpressionAttributeValues"] = serialize(values)
+    if condition:
+        operation["ConditionExpression"] = condition
+    if names:
+        operation["ExpressionAttributeNames"] = names
+    return {"Update": operation}
+
+
+def cancellation_codes(error):
+    """
+    Códigos de cancelación por operación de un TransactionCanceledException,
+    en el mismo orden de TransactItems ("None" para las que no fallaron).
+    """
+    if error.response.get("Error", {}).get("Code") != "TransactionCanceledException":
+        return []
+    return [reason.get("Code", "None") for reason in error.response.get("CancellationReasons", [])]
@@ -0,0 +1,105 @@
+## Benchmark de concurrencia por worker benchmarks/async_concurrency.py
+"""
+Compara una ruta síncrona (`def`, threadpool de Starlette) contra una ruta
+`async def` que usa la capa app.utils.async_io, ambas sobre una tabla falsa
+que simula la latencia de DynamoDB. Reporta req/s y la cantidad máxima de
+llamadas a DynamoDB en vuelo al mismo tiempo (concurrencia efectiva del worker).
+
+Uso:
+    python -m benchmarks.async_concurrency --latency 0.05 --requests 400 --concurrency 10 50 100 200
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.utils.async_io import aio
+
+
+class SlowTable:
+    """Tabla falsa: cada llamada bloquea el hilo `latency` segundos, como boto3"""
+
+    def __init__(self, latency: float):
+        self.name = "BenchmarkTable"
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def get_item(self, Key):
+        with self._lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            return {"Item": {"id": Key["id"], "name": "Fund"}}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def build_sync_app(table: SlowTable) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{id}")
+    def get_item(id: str):
+        return table.get_item(Key={"id": id}).get("Item")
+
+    return app
+
+
+def build_async_app(table: SlowTable) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{id}")
+    async def get_item(id: str):
+        return (await aio(table).get_item(Key={"id": id})).get("Item")
+
+    return app
+
+
+async def run_load(app: FastAPI, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def one(i):
+            async with semaphore:
+                response = await client.get(f"/items/{i}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrencia por worker: rutas sync vs async")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latencia simulada por llamada (s)")
+    parser.add_argument("--requests", type=int, default=400, help="Requests por escenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100, 200])
+    args = parser.parse_args()
+
+    results = []
+    for concurrency in args.concurrency:
+        for mode, builder in (("sync", build_sync_app), ("async", build_async_app)):
+            table = SlowTable(args.latency)
+            elapsed = asyncio.run(run_load(builder(table), args.requests, concurrency))
+            results.append({
+                "mode": mode,
+                "concurrency": concurrency,
+                "requests": args.requests,
+                "seconds": round(elapsed, 3),
+                "req_per_s": round(args.requests / elapsed, 1),
+                "peak_in_flight": table.peak,
+            })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+## Benchmark de cold start benchmarks/cold_start.py
+"""
+Mide el cold start del handler de Lambda en procesos nuevos de Python:
+tiempo de import de app.handler, tiempo hasta la primera respuesta (un evento
+de API Gateway HTTP API que pasa por Mangum) y el import de cada módulo
+(`python -X importtime`). También indica qué clientes de AWS quedaron construidos.
+
+Uso:
+    python -m benchmarks.cold_start --runs 5 --top 25
+    python -m benchmarks.cold_start --path /api/category/ --output cold_start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Se ejecuta en un proceso nuevo por corrida para que nada esté importado ni construido
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import app.handler as handler_module
+imported = time.perf_counter()
+
+path = sys.argv[1]
+event = {
+    "version": "2.0",
+    "routeKey": "$default",
+    "rawPath": path,
+    "rawQueryString": "",
+    "headers": {"host": "localhost", "accept": "application/json"},
+    "requestContext": {
+        "accountId": "000000000000",
+        "apiId": "benchmark",
+        "domainName": "localhost",
+        "http": {"method": "GET", "path": path, "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1", "userAgent": "benchmark"},
+        "requestId": "benchmark",
+        "routeKey": "$default",
+        "stage": "$default",
+        "time": "01/Jan/2025:00:00:00 +0000",
+        "timeEpoch": 0,
+    },
+    "isBase64Encoded": False,
+}
+
+class Context:
+    function_name = "benchmark"
+    aws_request_id = "benchmark"
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+response = handler_module.handler(event, Context())
+responded = time.perf_counter()
+
+from app import config
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (responded - imported) * 1000,
+    "total_ms": (responded - start) * 1000,
+    "status": response.get("statusCode"),
+    "initialized": {
+        "dynamodb": config.dynamodb.initialized,
+        "dynamodb_client": config.dynamodb_client.initialized,
+        "cognito_client": config.cognito_client.initialized,
+    },
+    "loaded": {name: name in sys.modules for name in ("boto3", "botocore.session", "jwt", "smtplib")},
+}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """Devuelve {módulo: (self_us, cumulative_us)} a partir de la salida de -X importtime"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(path: str, importtime: bool):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", PROBE, path]
+    # Como en Lambda: sin el startup de desarrollo que crea las tablas
+    env = dict(os.environ)
+    env.setdefault("ENVIRONMENT_MODE", "production")
+    env.setdefault("AWS_LAMBDA_FUNCTION_NAME", "benchmark")
+    result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=os.getcwd())
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start del handler de Lambda")
+    parser.add_argument("--runs", type=int, default=5, help="Procesos nuevos a medir")
+    parser.add_argument("--path", default="/", help="Ruta del primer request")
+    parser.add_argument("--top", type=int, default=25, help="Módulos más costosos a reportar")
+    parser.add_argument("--output", help="Archivo donde escribir el JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    # Las corridas medidas van sin -X importtime, que agrega su propio costo
+    runs = [run_once(args.path, importtime=False)[0] for _ in range(args.runs)]
+    probe, stderr = run_once(args.path, importtime=True)
+    modules = parse_importtime(stderr)
+
+    top = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+    app_modules = sorted(
+        ((name, times) for name, times in modules.items() if name == "app" or name.startswith("app.")),
+        key=lambda item: item[1][0], reverse=True,
+    )
+
+    report = {
+        "python": sys.version.split()[0],
+        "path": args.path,
+        "runs": args.runs,
+        "status": runs[-1]["status"],
+        "import_ms": {
+            "median": round(statistics.median(run["import_ms"] for run in runs), 2),
+            "min": round(min(run["import_ms"] for run in runs), 2),
+        },
+        "first_response_ms": {
+            "median": round(statistics.median(run["first_response_ms"] for run in runs), 2),
+            "min": round(min(run["first_response_ms"] for run in runs), 2),
+        },
+        "total_ms": {
+            "median": round(statistics.median(run["total_ms"] for run in runs), 2),
+            "min": round(min(run["total_ms"] for run in runs), 2),
+        },
+        "initialized_after_first_response": probe["initialized"],
+        "modules_loaded": probe["loaded"],
+        "top_modules_cumulative_ms": {name: round(cumulative / 1000, 2) for name, (_, cumulative) in top},
+        "app_modules_self_ms": {name: round(self_us / 1000, 2) for name, (self_us, _) in app_modules},
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
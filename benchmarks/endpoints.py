@@ -0,0 +1,415 @@
+## Benchmark de latencia y throughput por endpoint benchmarks/endpoints.py
+"""
+Recorre todos los routers de app.routes.routes.main_routes contra la app ASGI,
+con DynamoDB simulado por moto (sembrado con volúmenes configurables), Cognito
+reemplazado por un stub en memoria y el SMTP local de la cola de correos.
+
+Por escenario reporta p50/p95/p99, req/s y llamadas a DynamoDB por request,
+en JSON, para poder comparar corridas en el tiempo. Las latencias miden la app
+más moto (en proceso y serializado), no la red: sirven para comparar cambios
+entre corridas, no como valores absolutos de producción.
+
+Uso:
+    python -m benchmarks.endpoints --requests 200 --concurrency 10 --funds 200 --output bench.json
+    python -m benchmarks.endpoints --only bank_funds.list bank_funds.detail
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+# La configuración se lee al importar app.config: el entorno va antes de cualquier import de app
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+os.environ.setdefault("EMAIL_BACKEND", "local")
+os.environ.setdefault("AUTH_MODE", "cognito")
+
+import httpx
+from moto import mock_aws
+from moto.core.botocore_stubber import BotocoreStubber
+
+# El backend de moto no es thread-safe (p.ej. transact_write_items) y la app llama
+# a DynamoDB desde el pool de I/O: se serializa el procesamiento de moto
+_moto_lock = threading.Lock()
+_process_request = BotocoreStubber.process_request
+
+
+def _locked_process_request(self, request):
+    with _moto_lock:
+        return _process_request(self, request)
+
+
+BotocoreStubber.process_request = _locked_process_request
+
+# Una línea de log por request distorsiona las latencias
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+class StubCognito:
+    """Cognito en memoria: sign_up, initiate_auth, get_user, revoke_token y global_sign_out"""
+
+    class exceptions:
+        class NotAuthorizedException(Exception):
+            pass
+
+        class UsernameExistsException(Exception):
+            pass
+
+        class UserNotConfirmedException(Exception):
+            pass
+
+    def __init__(self):
+        self.users = {}     # email -> atributos
+        self.tokens = {}    # access token -> atributos
+        self._lock = threading.Lock()
+
+    def add_user(self, email, sub, role):
+        attributes = {"sub": sub, "email": email, "custom:role": role}
+        token = f"access-{sub}"
+        with self._lock:
+            self.users[email] = attributes
+            self.tokens[token] = attributes
+        return token
+
+    def sign_up(self, Username, UserAttributes, **kwargs):
+        with self._lock:
+            if Username in self.users:
+                raise self.exceptions.UsernameExistsException(Username)
+        attributes = {attr["Name"]: attr["Value"] for attr in UserAttributes}
+        sub = str(uuid.uuid4())
+        self.add_user(Username, sub, attributes.get("custom:role", "USER"))
+        return {"UserSub": sub}
+
+    def initiate_auth(self, AuthParameters, **kwargs):
+        attributes = self.users.get(AuthParameters.get("USERNAME"))
+        if not attributes:
+            raise self.exceptions.NotAuthorizedException("Incorrect username or password")
+        return {"AuthenticationResult": {"AccessToken": f"access-{attributes['sub']}", "RefreshToken": "refresh"}}
+
+    def get_user(self, AccessToken):
+        attributes = self.tokens.get(AccessToken)
+        if not attributes:
+            raise self.exceptions.NotAuthorizedException("Invalid access token")
+        return {"UserAttributes": [{"Name": name, "Value": value} for name, value in attributes.items()]}
+
+    def revoke_token(self, **kwargs):
+        return {}
+
+    def global_sign_out(self, **kwargs):
+        return {}
+
+
+class DynamoCallCounter:
+    """Cuenta las llamadas a DynamoDB de todos los clientes boto3 de la app"""
+
+    def __init__(self, *clients):
+        self.calls = 0
+        self._lock = threading.Lock()
+        for client in clients:
+            client.meta.events.register("before-call.dynamodb", self._count)
+
+    def _count(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def seed(args, cognito):
+    """Crea las tablas en moto y siembra usuarios, categorías, fondos y posiciones"""
+    from app.dynamo_db import dynamo_db
+    import app.schemas.users as users
+    import app.schemas.user_lookups as user_lookups
+    import app.schemas.category as category
+    import app.schemas.bank_funds as bankFunds
+    import app.schemas.user_bank_funds as userBankFunds
+    import app.schemas.user_bank_funds_audit as userBankFundsAudit
+
+    dynamo_db()
+    now = "2025-01-01T00:00:00+00:00"
+
+    sessions = {
+        "user": cognito.add_user("bench-user@example.com", "bench-user", "USER"),
+        "admin": cognito.add_user("bench-admin@example.com", "bench-admin", "ADMIN"),
+    }
+
+    with users.users_db.batch_writer() as batch:
+        for sub, role in (("bench-user", "USER"), ("bench-admin", "ADMIN")):
+            batch.put_item(Item={
+                "id": sub, "nit": sub, "name": sub, "last_name": "bench", "email": f"{sub}@example.com",
+                "phone": "+570000000", "role": role, "amount": Decimal("1000000000000"), "currency": "COP",
+                "verified": True, "created_at": now, "updated_at": now,
+                # Agregados del portafolio consistentes con las posiciones sembradas abajo
+                "open_positions": args.positions if sub == "bench-user" else 0,
+                "invested_COP": Decimal("1000") * args.positions if sub == "bench-user" else Decimal("0"),
+            })
+        for i in range(args.users):
+            batch.put_item(Item={
+                "id": f"user-{i}", "nit": f"nit-{i}", "name": f"User {i}", "last_name": "bench",
+                "email": f"user-{i}@example.com", "phone": "+570000000", "role": "USER",
+                "amount": Decimal("500000"), "currency": "COP", "verified": True, "created_at": now, "updated_at": now,
+            })
+
+    with user_lookups.user_lookups_db.batch_writer() as batch:
+        for sub in ("bench-user", "bench-admin"):
+            batch.put_item(Item={"id": user_lookups.UserLookupSchema.email_key(f"{sub}@example.com"), "user_id": sub})
+
+    category_ids = [f"category-{i}" for i in range(args.categories)]
+    with category.categories_db.batch_writer() as batch:
+        for i, category_id in enumerate(category_ids):
+            batch.put_item(Item={"id": category_id, "name": f"Category {i}", "description": "benchmark", "created_at": now})
+
+    fund_ids = [f"fund-{i}" for i in range(args.funds)]
+    with bankFunds.bank_funds_db.batch_writer() as batch:
+        for i, fund_id in enumerate(fund_ids):
+            batch.put_item(Item={
+                "id": fund_id, "name": f"Fund {i}", "category_id": category_ids[i % len(category_ids)],
+                "min_amount": Decimal("1000"), "currency": "COP", "created_at": now, "updated_at": now,
+            })
+
+    position_ids = [f"position-{i}" for i in range(args.positions)]
+    with userBankFunds.user_bank_funds_db.batch_writer() as batch:
+        for i, position_id in enumerate(position_ids):
+            batch.put_item(Item={
+                "id": position_id, "user_id": "bench-user", "bank_funds_id": fund_ids[i % len(fund_ids)],
+                "amount": Decimal("1000"), "currency": "COP", "status": "OPEN", "created_at": f"{now}#{i:08d}",
+                "updated_at": now,
+            })
+
+    audit_ids = [f"audit-{i}" for i in range(args.positions)]
+    with userBankFundsAudit.user_bank_funds_audit_db.batch_writer() as batch:
+        for i, audit_id in enumerate(audit_ids):
+            batch.put_item(Item={
+                "id": audit_id, "parent_id": position_ids[i], "user_id": "bench-user",
+                "bank_funds_id": fund_ids[i % len(fund_ids)], "amount": Decimal("1000"), "currency": "COP",
+                "status": "OPEN", "created_at": now, "sk": f"{now}#{audit_id}",
+            })
+
+    return {"sessions": sessions, "funds": fund_ids, "categories": category_ids, "positions": position_ids, "audits": audit_ids}
+
+
+def build_scenarios(data):
+    """
+    Cada escenario: (nombre, método, plantilla de ruta, sesión, constructor del request).
+    El constructor recibe el número de request y devuelve (path, json) o (path, json, headers extra).
+    """
+    funds = itertools.cycle(data["funds"])
+    categories = itertools.cycle(data["categories"])
+    audits = itertools.cycle(data["audits"])
+    positions = iter(data["positions"])
+    open_positions = itertools.cycle(data["positions"])
+    registrations = itertools.count()
+
+    def register(i):
+        n = next(registrations)
+        return "/api/auth/register", {
+            "nit": f"bench-nit-{n}", "name": "Bench", "last_name": "User", "email": f"bench-{n}@example.com",
+            "phone": "+570000000", "role": "USER", "password": "Benchmark123!",
+        }
+
+    return [
+        ("auth.register", "POST", "/api/auth/register", None, register),
+        ("auth.login", "POST", "/api/auth/login", None,
+            lambda i: ("/api/auth/login", {"email": "bench-user@example.com", "password": "Benchmark123!"})),
+        ("auth.logout", "POST", "/api/auth/logout", "user", lambda i: ("/api/auth/logout", None)),
+        ("bank_funds.list", "GET", "/api/bank-funds/", None, lambda i: ("/api/bank-funds/", None)),
+        ("bank_funds.list_fields", "GET", "/api/bank-funds/", None,
+            lambda i: ("/api/bank-funds/?fields=name,min_amount,currency", None)),
+        ("bank_funds.list_expand", "GET", "/api/bank-funds/", None, lambda i: ("/api/bank-funds/?expand=category", None)),
+        ("bank_funds.stats", "GET", "/api/bank-funds/stats", "admin", lambda i: ("/api/bank-funds/stats", None)),
+        ("bank_funds.detail", "GET", "/api/bank-funds/{bank_funds_id}", None,
+            lambda i: (f"/api/bank-funds/{next(funds)}", None)),
+        ("bank_funds.create", "POST", "/api/bank-funds/", "admin",
+            lambda i: ("/api/bank-funds/", {"name": f"Bench fund {i}", "category_id": next(categories), "min_amount": 1000, "currency": "COP"})),
+        # 25 filas por request (un batch_write_item): comparar con 25 × bank_funds.create
+        ("bank_funds.import", "POST", "/api/bank-funds/import", "admin",
+            lambda i: ("/api/bank-funds/import", [
+                {"name": f"Imported fund {i}-{row}", "category_id": next(categories), "min_amount": 1000, "currency": "COP"} for row in range(25)
+            ])),
+        ("bank_funds.update", "PUT", "/api/bank-funds/{bank_funds_id}", "admin",
+            lambda i: (f"/api/bank-funds/{next(funds)}", {"name": f"Updated fund {i}"})),
+        ("category.list", "GET", "/api/category/", None, lambda i: ("/api/category/", None)),
+        ("category.detail", "GET", "/api/category/{id}", None, lambda i: (f"/api/category/{next(categories)}", None)),
+        ("category.create", "POST", "/api/category/", "admin",
+            lambda i: ("/api/category/", {"name": f"Bench category {i}", "description": "benchmark"})),
+        ("category.import", "POST", "/api/category/import", "admin",
+            lambda i: ("/api/category/import", [{"name": f"Imported category {i}-{row}"} for row in range(25)])),
+        ("category.update", "PUT", "/api/category/{id}", "admin",
+            lambda i: (f"/api/category/{next(categories)}", {"name": f"Updated category {i}"})),
+        ("user_bank_funds.create", "POST", "/api/user-bank-funds/{bank_funds_id}", "user",
+            lambda i: (f"/api/user-bank-funds/{next(funds)}", None)),
+        # Cinco fondos por request: comparar llamadas a DynamoDB con 5 × user_bank_funds.create
+        ("user_bank_funds.create.bulk", "POST", "/api/user-bank-funds/bulk", "user",
+            lambda i: ("/api/user-bank-funds/bulk", {"bank_funds_ids": [next(funds) for _ in range(5)]})),
+        # Tormenta de reintentos: todos los requests con la misma Idempotency-Key (uno escribe, el resto se repite)
+        ("user_bank_funds.create.retried", "POST", "/api/user-bank-funds/{bank_funds_id}", "user",
+            lambda i: (f"/api/user-bank-funds/{data['funds'][0]}", None, {"Idempotency-Key": "bench-retry"})),
+        ("user_bank_funds.list", "GET", "/api/user-bank-funds/", "user", lambda i: ("/api/user-bank-funds/", None)),
+        ("user_bank_funds.summary", "GET", "/api/user-bank-funds/summary", "user",
+            lambda i: ("/api/user-bank-funds/summary", None)),
+        ("user_bank_funds.detail", "GET", "/api/user-bank-funds/{id}", "user",
+            lambda i: (f"/api/user-bank-funds/{next(open_positions)}", None)),
+        ("user_bank_funds.delete", "DELETE", "/api/user-bank-funds/{user_bank_funds_id}", "user",
+            lambda i: (f"/api/user-bank-funds/{next(positions)}", None)),
+        ("user_bank_funds_audit.list", "GET", "/api/user-bank-funds-audit/", "user",
+            lambda i: ("/api/user-bank-funds-audit/", None)),
+        ("user_bank_funds_audit.export.ndjson", "GET", "/api/user-bank-funds-audit/export", "user",
+            lambda i: ("/api/user-bank-funds-audit/export?format=ndjson", None)),
+        ("user_bank_funds_audit.export.csv", "GET", "/api/user-bank-funds-audit/export", "user",
+            lambda i: ("/api/user-bank-funds-audit/export?format=csv", None)),
+        ("user_bank_funds_audit.detail", "GET", "/api/user-bank-funds-audit/{user_bank_funds_audit_id}", "user",
+            lambda i: (f"/api/user-bank-funds-audit/{next(audits)}", None)),
+        ("users.list.admin", "GET", "/api/users/", "admin", lambda i: ("/api/users/", None)),
+        ("users.list.user", "GET", "/api/users/", "user", lambda i: ("/api/users/", None)),
+        ("metrics", "GET", "/api/metrics/", "admin", lambda i: ("/api/metrics/", None)),
+    ]
+
+
+async def run_scenario(client, counter, sessions, scenario, total, concurrency):
+    name, method, template, session, build = scenario
+    headers = {}
+    if session:
+        headers = {"Authorization": f"Bearer {sessions[session]}", "X-Refresh-Token": "refresh"}
+
+    requests = [build(i) for i in range(total)]
+    latencies = []
+    status_codes = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(path, body, extra_headers=None):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=dict(headers, **(extra_headers or {})))
+            latencies.append(time.perf_counter() - start)
+            status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+
+    calls_before = counter.calls
+    start = time.perf_counter()
+    await asyncio.gather(*(one(*request) for request in requests))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "name": name,
+        "method": method,
+        "route": template,
+        "requests": total,
+        "concurrency": concurrency,
+        "status_codes": {str(code): count for code, count in sorted(status_codes.items())},
+        "errors": sum(count for code, count in status_codes.items() if code >= 500),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "req_per_s": round(total / elapsed, 1),
+        "dynamodb_calls_per_request": round((counter.calls - calls_before) / total, 2),
+    }
+
+
+def uncovered_routes(app, scenarios):
+    """Rutas de main_routes que ningún escenario ejercita"""
+    from fastapi.routing import APIRoute
+    covered = {(method, template) for _, method, template, _, _ in scenarios}
+    missing = []
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path.startswith("/api"):
+            for method in route.methods:
+                if (method, route.path) not in covered:
+                    missing.append(f"{method} {route.path}")
+    return sorted(missing)
+
+
+async def run(args):
+    # Los clientes boto3 se crean al importar la app: moto debe estar activo antes
+    import app.controllers.auth_controller as auth_controller
+    import app.controllers.auth_decorators as auth_decorators
+    from app.config import dynamodb, dynamodb_client
+    from app.main import app
+    from app.utils.catalog_cache import catalog_cache_stats, clear_catalog_cache
+    from app.utils.email_outbox import outbox
+
+    cognito = StubCognito()
+    auth_controller.cognito_client = cognito
+    auth_decorators.cognito_client = cognito
+
+    # create_table imprime en stdout: se desvía para no mezclarlo con el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        data = seed(args, cognito)
+    counter = DynamoCallCounter(dynamodb.meta.client, dynamodb_client)
+    scenarios = [s for s in build_scenarios(data) if not args.only or s[0] in args.only]
+    clear_catalog_cache()
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for scenario in scenarios:
+            # Calentamiento: imports perezosos, caché y conexiones
+            await run_scenario(client, counter, data["sessions"], scenario, min(args.warmup, args.requests), args.concurrency)
+            results.append(await run_scenario(client, counter, data["sessions"], scenario, args.requests, args.concurrency))
+
+    outbox.flush(timeout=10)
+
+    return {
+        "started_at": args.started_at,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "users": args.users,
+            "categories": args.categories,
+            "funds": args.funds,
+            "positions": args.positions,
+        },
+        "results": results,
+        "uncovered_routes": uncovered_routes(app, build_scenarios(data)),
+        "catalog_cache": catalog_cache_stats(),
+        "email_outbox": outbox.stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia y throughput por endpoint sobre DynamoDB simulado (moto)")
+    parser.add_argument("--requests", type=int, default=100, help="Requests medidos por escenario")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests en vuelo por escenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Requests de calentamiento por escenario")
+    parser.add_argument("--users", type=int, default=100, help="Usuarios sembrados")
+    parser.add_argument("--categories", type=int, default=20, help="Categorías sembradas")
+    parser.add_argument("--funds", type=int, default=100, help="Fondos sembrados")
+    parser.add_argument("--positions", type=int, default=None, help="Posiciones y auditorías del usuario de prueba")
+    parser.add_argument("--only", nargs="+", help="Ejecutar solo estos escenarios (por nombre)")
+    parser.add_argument("--output", help="Archivo donde escribir el JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    # El escenario de DELETE consume una posición por request
+    args.positions = args.positions or args.requests + args.warmup
+    args.started_at = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+    with mock_aws():
+        report = asyncio.run(run(args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+## Benchmark de mapeo de entidades benchmarks/entities.py
+"""
+Compara el mapeo de una página grande de items crudos de DynamoDB a entidades
+y de vuelta a dicts: el camino anterior (TypeDeserializer atributo por atributo
+y clases con __dict__ que leen el reloj dos veces) contra el actual
+(`deserialize_items` y `Entity.from_raw_items` con dataclasses con slots).
+Reporta tiempo y pico de memoria asignada (tracemalloc).
+
+Uso:
+    python -m benchmarks.entities --sizes 100 1000 10000 --repeat 10
+"""
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from app.schemas.user_bank_funds_audit import UserBankFundsAuditSchema
+from app.utils.dynamo_types import serialize
+from app.utils.time import get_current_time
+
+
+class LegacyAuditSchema:
+    """Copia de la forma anterior de los esquemas (sin slots, dos lecturas del reloj)"""
+
+    def __init__(self, data: dict):
+        self.id = data["id"]
+        self.parent_id = data["parent_id"]
+        self.user_id = data["user_id"]
+        self.bank_funds_id = data["bank_funds_id"]
+        self.currency = data["currency"]
+        self.amount = data["amount"]
+        self.status = data["status"]
+        self.created_at = data.get("created_at") or get_current_time()
+        self.updated_at = get_current_time()
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "status": self.status,
+            "user_id": self.user_id,
+            "bank_funds_id": self.bank_funds_id,
+            "currency": self.currency,
+            "amount": self.amount,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+def raw_page(size: int):
+    now = get_current_time()
+    return [serialize({
+        "id": str(uuid.uuid4()),
+        "parent_id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "bank_funds_id": str(uuid.uuid4()),
+        "status": "OPEN",
+        "currency": "COP",
+        "amount": Decimal("125000.50") + index,
+        "created_at": now,
+        "updated_at": now,
+    }) for index in range(size)]
+
+
+def legacy(raw_items):
+    deserializer = TypeDeserializer()
+    entities = [LegacyAuditSchema({k: deserializer.deserialize(v) for k, v in raw.items()}) for raw in raw_items]
+    return [entity.to_dict() for entity in entities]
+
+
+def current(raw_items):
+    return [entity.to_dict() for entity in UserBankFundsAuditSchema.from_raw_items(raw_items)]
+
+
+def measure(mapper, raw_items, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mapper(raw_items)
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = mapper(raw_items)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mapeo de items crudos a entidades")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Items por página")
+    parser.add_argument("--repeat", type=int, default=10, help="Repeticiones por medición")
+    parser.add_argument("--output", help="Archivo donde escribir el JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        raw_items = raw_page(size)
+        before = measure(legacy, raw_items, args.repeat)
+        after = measure(current, raw_items, args.repeat)
+        results.append({
+            "items": size,
+            "legacy": before,
+            "slotted": after,
+            "speedup": round(before["median_ms"] / after["median_ms"], 1) if after["median_ms"] else None,
+        })
+
+    output = json.dumps({"repeat": args.repeat, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+## Benchmark de memoria de la exportación de auditoría benchmarks/export.py
+"""
+Exporta historiales de auditoría de distintos largos con
+`export_user_bank_funds_audit_controller` (NDJSON o CSV en streaming) y, como
+referencia, arma la lista completa en memoria y la serializa de una vez (lo que
+hace el listado JSON). DynamoDB es un cliente falso que devuelve páginas en
+formato de atributos. Reporta el pico de memoria (tracemalloc) y el tamaño exportado:
+en streaming el pico depende del tamaño de página, no del largo del historial.
+
+Uso:
+    python -m benchmarks.export --rows 1000 10000 50000 --page-size 1000 --format ndjson
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+from decimal import Decimal
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+
+from app.documents.auth_models import SessionUserModel
+from app.utils.dynamo_types import serialize
+
+
+class HistoryClient:
+    """Cliente falso: `rows` registros del usuario en páginas de query"""
+
+    def __init__(self, rows: int, page_size: int):
+        self.rows = rows
+        self.page_size = page_size
+
+    def _item(self, index: int):
+        return serialize({
+            "id": f"audit-{index:08d}", "parent_id": f"position-{index:08d}", "user_id": "bench-user",
+            "bank_funds_id": f"fund-{index % 50}", "status": "OPEN" if index % 2 else "CLOSED",
+            "currency": "COP", "amount": Decimal("125000.50") + index,
+            "created_at": "2025-01-01T00:00:00+00:00", "updated_at": "2025-01-01T00:00:00+00:00",
+        })
+
+    def query(self, ExclusiveStartKey=None, **kwargs):
+        start = int(ExclusiveStartKey["offset"]["N"]) if ExclusiveStartKey else 0
+        page = [self._item(index) for index in range(start, min(start + self.page_size, self.rows))]
+        response = {"Items": page}
+        if start + self.page_size < self.rows:
+            response["LastEvaluatedKey"] = {"offset": {"N": str(start + self.page_size)}}
+        return response
+
+
+async def streamed(client, export_format: str):
+    import app.controllers.user_bank_funds_audit_controller as controller
+
+    controller.dynamodb_client = client
+    response = await controller.export_user_bank_funds_audit_controller(
+        SessionUserModel(user_id="bench-user", role="USER"), format=export_format
+    )
+    size = 0
+    async for chunk in response.body_iterator:
+        size += len(chunk)
+    return size
+
+
+async def in_memory(client):
+    from app.utils.dynamo_types import json_items
+    from app.utils.responses import ORJSONResponse
+
+    items = []
+    params = {}
+    while True:
+        response = client.query(**params)
+        items.extend(json_items(response["Items"]))
+        if "LastEvaluatedKey" not in response:
+            break
+        params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return len(ORJSONResponse(content={"data": items}).body)
+
+
+def measure(coroutine_factory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = asyncio.run(coroutine_factory())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"elapsed_ms": round(elapsed * 1000, 1), "peak_kib": round(peak / 1024, 1), "bytes": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria de la exportación de auditoría")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000], help="Largo del historial")
+    parser.add_argument("--page-size", type=int, default=1000, help="Items por página de scan")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson", help="Formato de la exportación")
+    parser.add_argument("--output", help="Archivo donde escribir el JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        client = HistoryClient(rows, args.page_size)
+        results.append({
+            "rows": rows,
+            "streamed": measure(lambda: streamed(client, args.format)),
+            "in_memory": measure(lambda: in_memory(client)),
+        })
+
+    output = json.dumps({"page_size": args.page_size, "format": args.format, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+## Benchmark del scan paralelo por segmentos benchmarks/parallel_scan.py
+"""
+Recorre una tabla falsa que simula la latencia de cada página de scan de
+DynamoDB (la llamada bloquea el hilo, como boto3) con 1, 2, 4, ... segmentos
+de app.utils.parallel_scan. Reporta el tiempo total, items/s y la aceleración
+frente al scan secuencial (1 segmento).
+
+Uso:
+    python -m benchmarks.parallel_scan --items 20000 --page-size 500 --latency 0.03 --segments 1 2 4 8 16
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.utils.parallel_scan import parallel_scan
+
+
+class LatencyTable:
+    """Tabla falsa: cada página tarda `latency` segundos y trae hasta `page_size` items"""
+
+    def __init__(self, count: int, page_size: int, latency: float):
+        self.items = [{"id": f"user-{i}", "name": f"User {i}"} for i in range(count)]
+        self.page_size = page_size
+        self.latency = latency
+
+    def scan(self, Segment=0, TotalSegments=1, ExclusiveStartKey=None, **kwargs):
+        time.sleep(self.latency)
+        segment_items = self.items[Segment::TotalSegments]
+        start = ExclusiveStartKey["offset"] if ExclusiveStartKey else 0
+        response = {"Items": segment_items[start:start + self.page_size]}
+        if start + self.page_size < len(segment_items):
+            response["LastEvaluatedKey"] = {"offset": start + self.page_size}
+        return response
+
+
+async def run(table, segments: int):
+    count = 0
+    start = time.perf_counter()
+    async for page in parallel_scan(table, segments=segments):
+        count += len(page)
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan paralelo por segmentos")
+    parser.add_argument("--items", type=int, default=20000, help="Items de la tabla")
+    parser.add_argument("--page-size", type=int, default=500, help="Items por página de scan")
+    parser.add_argument("--latency", type=float, default=0.03, help="Segundos por página de scan")
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Segmentos a medir")
+    parser.add_argument("--output", help="Archivo donde escribir el JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    table = LatencyTable(args.items, args.page_size, args.latency)
+    results = []
+    baseline = None
+    for segments in args.segments:
+        count, elapsed = asyncio.run(run(table, segments))
+        assert count == args.items
+        baseline = baseline or elapsed
+        results.append({
+            "segments": segments,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "items_per_s": round(count / elapsed, 1),
+            "speedup": round(baseline / elapsed, 2),
+        })
+
+    output = json.dumps({
+        "items": args.items,
+        "page_size": args.page_size,
+        "latency_s": args.latency,
+        "results": results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+## Benchmark de listados con el cliente de bajo nivel benchmarks/raw_reads.py
+"""
+Compara, para los listados de solo lectura (fondos, categorías y auditoría),
+el camino con el recurso `Table` (`paginate`: Decimal intermedios + ORJSONResponse)
+contra el camino con `dynamodb_client` (`paginate_raw`: formato de DynamoDB
+directo a valores JSON + ORJSONResponse). DynamoDB es moto en proceso: ambos
+caminos pagan lo mismo por moto, la diferencia es la conversión en la app.
+Reporta latencia (mediana y mínimo) y pico de memoria asignada (tracemalloc)
+de punta a punta y, aparte, solo de la conversión de una respuesta de scan ya
+recibida (sin moto): TypeDeserializer (lo que hace el recurso) vs json_items.
+
+Uso:
+    python -m benchmarks.raw_reads --items 2000 --limits 100 1000 --repeat 10
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+# La configuración se lee al importar app.config: el entorno va antes de cualquier import de app
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+os.environ.setdefault("REQUEST_TRACING", "false")
+os.environ.setdefault("PAGINATION_MAX_LIMIT", "10000")
+
+from moto import mock_aws
+
+
+def seed(count: int):
+    from app.dynamo_db import dynamo_db
+    import app.schemas.category as category
+    import app.schemas.bank_funds as bankFunds
+    import app.schemas.user_bank_funds_audit as userBankFundsAudit
+
+    # create_table imprime en stdout: se manda a stderr para no ensuciar el JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        dynamo_db()
+    now = "2025-01-01T00:00:00+00:00"
+    with category.categories_db.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                "id": f"category-{i:06d}", "name": f"Category {i}", "description": "benchmark",
+                "user_created": "bench-admin", "user_updated": "bench-admin", "created_at": now, "updated_at": now,
+            })
+    with bankFunds.bank_funds_db.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                "id": f"fund-{i:06d}", "name": f"Fund {i}", "category_id": f"category-{i:06d}",
+                "min_amount": Decimal("75000.50") + i, "currency": "COP",
+                "user_created": "bench-admin", "user_updated": "bench-admin", "created_at": now, "updated_at": now,
+            })
+    with userBankFundsAudit.user_bank_funds_audit_db.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                "id": f"audit-{i:06d}", "parent_id": f"position-{i:06d}", "user_id": "bench-user",
+                "bank_funds_id": f"fund-{i:06d}", "status": "OPEN" if i % 2 else "CLOSED", "currency": "COP",
+                "amount": Decimal("125000") + i, "created_at": now, "updated_at": now,
+                "sk": f"{now}#audit-{i:06d}",
+            })
+    return {
+        "categories": category.categories_db,
+        "bank_funds": bankFunds.bank_funds_db,
+        "user_bank_funds_audit": userBankFundsAudit.user_bank_funds_audit_db,
+    }
+
+
+async def resource_path(table, limit: int, **kwargs):
+    from app.utils.pagination import paginate
+    from app.utils.responses import ORJSONResponse
+
+    items, next_cursor = await paginate(table, limit=limit, **kwargs)
+    return ORJSONResponse(content={"data": items, "next_cursor": next_cursor}).body
+
+
+async def raw_path(table, limit: int, **kwargs):
+    from app.config import dynamodb_client
+    from app.utils.pagination import paginate_raw
+    from app.utils.responses import ORJSONResponse
+
+    items, next_cursor = await paginate_raw(table.name, dynamodb_client, limit=limit, **kwargs)
+    return ORJSONResponse(content={"data": items, "next_cursor": next_cursor}).body
+
+
+def convert_resource(raw_items):
+    from boto3.dynamodb.types import TypeDeserializer
+    from app.utils.responses import ORJSONResponse
+
+    deserializer = TypeDeserializer()
+    items = [{k: deserializer.deserialize(v) for k, v in item.items()} for item in raw_items]
+    return ORJSONResponse(content={"data": items}).body
+
+
+def convert_raw(raw_items):
+    from app.utils.dynamo_types import json_items
+    from app.utils.responses import ORJSONResponse
+
+    return ORJSONResponse(content={"data": json_items(raw_items)}).body
+
+
+async def measure(call, repeat: int):
+    """`call` es una función sin argumentos, síncrona o async, que devuelve el cuerpo de la respuesta"""
+    async def timed():
+        body = call()
+        return await body if inspect.isawaitable(body) else body
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = await timed()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    await timed()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+        "bytes": len(body),
+    }
+
+
+def compare(resource: dict, raw: dict):
+    return {
+        "resource": resource,
+        "raw_client": raw,
+        "speedup": round(resource["median_ms"] / raw["median_ms"], 2) if raw["median_ms"] else None,
+    }
+
+
+async def run(args, tables):
+    from app.config import dynamodb_client
+    from app.utils.dynamo_types import serialize
+
+    results = []
+    for name, table in tables.items():
+        kwargs = {"operation": "scan"}
+        if name == "user_bank_funds_audit":
+            kwargs = {
+                "operation": "query", "KeyConditionExpression": "user_id = :uid",
+                "ExpressionAttributeValues": {":uid": "bench-user"}, "ScanIndexForward": False,
+            }
+        for limit in args.limits:
+            resource = await measure(lambda: resource_path(table, limit, **kwargs), args.repeat)
+            raw = await measure(lambda: raw_path(table, limit, **kwargs), args.repeat)
+
+            # Solo la conversión de la misma respuesta de scan/query, sin moto
+            read_kwargs = dict(kwargs)
+            operation = read_kwargs.pop("operation")
+            if "ExpressionAttributeValues" in read_kwargs:
+                read_kwargs["ExpressionAttributeValues"] = serialize(read_kwargs["ExpressionAttributeValues"])
+            raw_items = getattr(dynamodb_client, operation)(TableName=table.name, Limit=limit, **read_kwargs)["Items"]
+            resource_conversion = await measure(lambda: convert_resource(raw_items), args.repeat)
+            raw_conversion = await measure(lambda: convert_raw(raw_items), args.repeat)
+
+            results.append({
+                "list": name,
+                "limit": limit,
+                "end_to_end": compare(resource, raw),
+                "conversion_only": compare(resource_conversion, raw_conversion),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Listados: recurso Table vs cliente de bajo nivel")
+    parser.add_argument("--items", type=int, default=2000, help="Items sembrados por tabla")
+    parser.add_argument("--limits", type=int, nargs="+", default=[100, 1000], help="Tamaños de página")
+    parser.add_argument("--repeat", type=int, default=10, help="Repeticiones por medición")
+    parser.add_argument("--output", help="Archivo donde escribir el JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    with mock_aws():
+        tables = seed(args.items)
+        results = asyncio.run(run(args, tables))
+
+    output = json.dumps({"items": args.items, "repeat": args.repeat, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
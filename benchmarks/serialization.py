@@ -0,0 +1,111 @@
+## Benchmark de serialización de respuestas benchmarks/serialization.py
+"""
+Compara el tiempo de armar la respuesta de un listado grande con
+`JSONResponse(content=jsonable_encoder(body))` (lo que hacían los controladores)
+contra `ORJSONResponse(content=body)` (app.utils.responses), sobre ítems con la
+forma que devuelve DynamoDB: montos Decimal, Enum y fechas ISO.
+
+Uso:
+    python -m benchmarks.serialization --sizes 100 1000 10000 --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.schemas.bank_funds import CurrencyEnum
+from app.schemas.user_bank_funds import UserBankFundsSchema
+from app.utils.responses import ORJSONResponse
+from app.utils.time import get_current_time
+
+
+def fund_item(index: int):
+    now = get_current_time()
+    return {
+        "id": str(uuid.uuid4()),
+        "name": f"FPV_BTG_PACTUAL_{index}",
+        "category_id": str(uuid.uuid4()),
+        "category": {"id": str(uuid.uuid4()), "name": "FPV", "description": "Fondo voluntario de pensión"},
+        "min_amount": Decimal(75000 + index),
+        "currency": CurrencyEnum.COL,
+        "user_created": str(uuid.uuid4()),
+        "user_updated": str(uuid.uuid4()),
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def audit_item(index: int):
+    now = get_current_time()
+    return {
+        "id": str(uuid.uuid4()),
+        "parent_id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "bank_funds_id": str(uuid.uuid4()),
+        "status": UserBankFundsSchema.StatusEnum.OPEN if index % 2 else UserBankFundsSchema.StatusEnum.CLOSED,
+        "currency": CurrencyEnum.COL,
+        "amount": Decimal("125000.50") + index,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def legacy(body):
+    return JSONResponse(content=jsonable_encoder(body), status_code=200)
+
+
+def current(body):
+    return ORJSONResponse(content=body, status_code=200)
+
+
+def measure(build, body, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = build(body)
+        samples.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "bytes": len(response.body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialización de listados grandes")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Ítems por respuesta")
+    parser.add_argument("--repeat", type=int, default=20, help="Repeticiones por medición")
+    parser.add_argument("--output", help="Archivo donde escribir el JSON (por defecto stdout)")
+    args = parser.parse_args()
+
+    results = []
+    for name, factory in (("bank_funds", fund_item), ("user_bank_funds_audit", audit_item)):
+        for size in args.sizes:
+            body = {"detail": "Items retrieved successfully", "data": [factory(i) for i in range(size)], "next_cursor": None}
+            # Ambas respuestas deben decodificar al mismo JSON
+            assert json.loads(legacy(body).body) == json.loads(current(body).body)
+            before = measure(legacy, body, args.repeat)
+            after = measure(current, body, args.repeat)
+            results.append({
+                "list": name,
+                "items": size,
+                "jsonable_encoder": before,
+                "orjson": after,
+                "speedup": round(before["median_ms"] / after["median_ms"], 1) if after["median_ms"] else None,
+            })
+
+    output = json.dumps({"repeat": args.repeat, "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
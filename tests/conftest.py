@@ -0,0 +1,15 @@
+import os
+import pytest
+
+# Los tests nunca envían correos reales: la cola usa el servidor SMTP en memoria
+os.environ.setdefault("EMAIL_BACKEND", "local")
+
+from app.utils.catalog_cache import clear_catalog_cache
+
+
+@pytest.fixture(autouse=True)
+def reset_catalog_cache():
+    # La caché del catálogo es global al proceso: se limpia entre tests
+    clear_catalog_cache()
+    yield
+    clear_catalog_cache()
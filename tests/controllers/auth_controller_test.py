@@ -1,4 +1,6 @@
+import json
 import pytest
+from botocore.exceptions import ClientError
 from unittest.mock import MagicMock, patch
 from fastapi import HTTPException, status
 from fastapi.responses import JSONResponse
@@ -33,44 +35,127 @@ def fake_login_data():
 ### --------------------------
 ### register_user tests
 ### --------------------------
-def test_register_user_success(fake_register_data):
-    with patch("app.controllers.auth_controller.users_db") as mock_db, \
+def transaction_canceled_error(*codes):
+    return ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "Transaction cancelled"},
+            "CancellationReasons": [{"Code": code} for code in codes or ("None", "ConditionalCheckFailed")],
+        },
+        "TransactWriteItems",
+    )
+
+
+async def test_register_user_success(fake_register_data):
+    with patch("app.schemas.users.users_db") as mock_db, \
+         patch("app.schemas.user_lookups.user_lookups_db") as mock_lookups, \
+         patch("app.controllers.auth_controller.dynamodb_client") as mock_dynamo, \
          patch("app.controllers.auth_controller.cognito_client") as mock_cognito, \
          patch("app.controllers.auth_controller.get_secret_hash", return_value="fakehash"):
 
-        # Simular que no existe usuario previo
-        mock_db.scan.return_value = {"Items": []}
+        mock_db.name = "Users"
+        mock_lookups.name = "UserLookups"
         # Simular cognito sign_up
         mock_cognito.sign_up.return_value = {"UserSub": "fake-user-id"}
 
-        response = register_user(fake_register_data)
+        response = await register_user(fake_register_data)
+        body = json.loads(response.body.decode())
 
-        assert response["status"] == status.HTTP_201_CREATED
-        assert response["items"]["user_id"] == "fake-user-id"
-        mock_db.put_item.assert_called_once()
+        assert response.status_code == status.HTTP_201_CREATED
+        assert body["items"]["user_id"] == "fake-user-id"
+        mock_db.scan.assert_not_called()
 
+        # 1) reserva condicional de email y NIT, 2) usuario + enlace de las reservas
+        reserve, save = [c.kwargs["TransactItems"] for c in mock_dynamo.transact_write_items.call_args_list]
+        assert [item["Put"]["Item"]["id"]["S"] for item in reserve] == ["email#john@example.com", "nit#123"]
+        assert all(item["Put"]["ConditionExpression"] == "attribute_not_exists(id)" for item in reserve)
+        assert save[0]["Put"]["TableName"] == "Users"
+        assert save[0]["Put"]["Item"]["id"]["S"] == "fake-user-id"
+        assert [item["Update"]["ExpressionAttributeValues"][":uid"]["S"] for item in save[1:]] == ["fake-user-id"] * 2
 
-def test_register_user_already_exists(fake_register_data):
-    with patch("app.controllers.auth_controller.users_db") as mock_db:
-        mock_db.scan.return_value = {"Items": [{"email": "john@example.com"}]}
+
+async def test_register_user_already_exists(fake_register_data):
+    with patch("app.schemas.user_lookups.user_lookups_db") as mock_lookups, \
+         patch("app.controllers.auth_controller.dynamodb_client") as mock_dynamo, \
+         patch("app.controllers.auth_controller.cognito_client") as mock_cognito:
+        mock_lookups.name = "UserLookups"
+        mock_dynamo.transact_write_items.side_effect = transaction_canceled_error()
 
         with pytest.raises(HTTPException) as exc:
-            register_user(fake_register_data)
+            await register_user(fake_register_data)
 
         assert exc.value.status_code == 400
         assert "NIT or Email already registered" in str(exc.value.detail)
+        mock_cognito.sign_up.assert_not_called()
+
+
+async def test_register_user_reservation_throttled_is_not_a_duplicate(fake_register_data):
+    with patch("app.schemas.user_lookups.user_lookups_db") as mock_lookups, \
+         patch("app.controllers.auth_controller.dynamodb_client") as mock_dynamo, \
+         patch("app.controllers.auth_controller.cognito_client") as mock_cognito:
+        mock_lookups.name = "UserLookups"
+        mock_dynamo.transact_write_items.side_effect = transaction_canceled_error("ThrottlingError", "None")
+
+        with pytest.raises(ClientError):
+            await register_user(fake_register_data)
+
+        mock_cognito.sign_up.assert_not_called()
+
+
+async def test_register_user_cognito_failure_releases_lookups(fake_register_data):
+    with patch("app.schemas.user_lookups.user_lookups_db") as mock_lookups, \
+         patch("app.controllers.auth_controller.dynamodb_client"), \
+         patch("app.controllers.auth_controller.cognito_client") as mock_cognito, \
+         patch("app.controllers.auth_controller.get_secret_hash", return_value="fakehash"):
+        mock_lookups.name = "UserLookups"
+        mock_cognito.exceptions.UsernameExistsException = type("UsernameExistsException", (Exception,), {})
+        mock_cognito.sign_up.side_effect = mock_cognito.exceptions.UsernameExistsException()
+
+        with pytest.raises(HTTPException) as exc:
+            await register_user(fake_register_data)
+
+        assert exc.value.status_code == 400
+        released = [c.kwargs["Key"]["id"] for c in mock_lookups.delete_item.call_args_list]
+        assert released == ["email#john@example.com", "nit#123"]
+
+
+async def test_register_user_save_failure_releases_lookups(fake_register_data):
+    with patch("app.schemas.users.users_db") as mock_db, \
+         patch("app.schemas.user_lookups.user_lookups_db") as mock_lookups, \
+         patch("app.controllers.auth_controller.dynamodb_client") as mock_dynamo, \
+         patch("app.controllers.auth_controller.cognito_client") as mock_cognito, \
+         patch("app.controllers.auth_controller.get_secret_hash", return_value="fakehash"):
+        mock_db.name = "Users"
+        mock_lookups.name = "UserLookups"
+        mock_cognito.sign_up.return_value = {"UserSub": "fake-user-id"}
+        # La reserva pasa; falla la transacción que guarda el usuario
+        mock_dynamo.transact_write_items.side_effect = [
+            {},
+            ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "Throttled"}}, "TransactWriteItems"),
+        ]
+
+        with pytest.raises(HTTPException) as exc:
+            await register_user(fake_register_data)
+
+        assert exc.value.status_code == 500
+        released = [c.kwargs["Key"]["id"] for c in mock_lookups.delete_item.call_args_list]
+        assert released == ["email#john@example.com", "nit#123"]
+        # El usuario de Cognito también se elimina: si no, el reintento chocaría con UsernameExistsException
+        mock_cognito.admin_delete_user.assert_called_once()
+        assert mock_cognito.admin_delete_user.call_args.kwargs["Username"] == "john@example.com"
 
 
 ### --------------------------
 ### login_user tests
 ### --------------------------
-def test_login_user_success(fake_login_data):
-    with patch("app.controllers.auth_controller.users_db") as mock_db, \
+async def test_login_user_success(fake_login_data):
+    with patch("app.schemas.users.users_db") as mock_db, \
+         patch("app.schemas.user_lookups.user_lookups_db") as mock_lookups, \
          patch("app.controllers.auth_controller.cognito_client") as mock_cognito, \
          patch("app.controllers.auth_controller.get_secret_hash", return_value="fakehash"):
 
         # Simular que el usuario existe y está verificado
-        mock_db.scan.return_value = {"Items": [{"email": "john@example.com", "verified": True}]}
+        mock_lookups.get_item.return_value = {"Item": {"id": "email#john@example.com", "user_id": "fake-sub"}}
+        mock_db.get_item.return_value = {"Item": {"id": "fake-sub", "email": "john@example.com", "verified": True}}
 
         mock_cognito.initiate_auth.return_value = {
             "AuthenticationResult": {
@@ -85,30 +170,37 @@ def test_login_user_success(fake_login_data):
             ]
         }
 
-        response = login_user(fake_login_data)
+        response = await login_user(fake_login_data)
 
         assert isinstance(response, JSONResponse)
         assert response.status_code == 200
         assert response.headers["Authorization"] == "Bearer fake-access"
         assert response.headers["X-Refresh-Token"] == "fake-refresh"
+        mock_lookups.get_item.assert_called_once_with(Key={"id": "email#john@example.com"})
+        mock_db.get_item.assert_called_once_with(Key={"id": "fake-sub"})
+        mock_db.scan.assert_not_called()
 
 
-def test_login_user_not_found(fake_login_data):
-    with patch("app.controllers.auth_controller.users_db") as mock_db:
-        mock_db.scan.return_value = {"Items": []}
+async def test_login_user_not_found(fake_login_data):
+    with patch("app.schemas.users.users_db") as mock_db, \
+         patch("app.schemas.user_lookups.user_lookups_db") as mock_lookups:
+        mock_lookups.get_item.return_value = {}
 
         with pytest.raises(HTTPException) as exc:
-            login_user(fake_login_data)
+            await login_user(fake_login_data)
 
         assert exc.value.status_code == 404
+        mock_db.get_item.assert_not_called()
 
 
-def test_login_user_not_verified(fake_login_data):
-    with patch("app.controllers.auth_controller.users_db") as mock_db:
-        mock_db.scan.return_value = {"Items": [{"email": "john@example.com", "verified": False}]}
+async def test_login_user_not_verified(fake_login_data):
+    with patch("app.schemas.users.users_db") as mock_db, \
+         patch("app.schemas.user_lookups.user_lookups_db") as mock_lookups:
+        mock_lookups.get_item.return_value = {"Item": {"id": "email#john@example.com", "user_id": "fake-sub"}}
+        mock_db.get_item.return_value = {"Item": {"email": "john@example.com", "verified": False}}
 
         with pytest.raises(HTTPException) as exc:
-            login_user(fake_login_data)
+            await login_user(fake_login_data)
 
         assert exc.value.status_code == 401
 
@@ -116,7 +208,7 @@ def test_login_user_not_verified(fake_login_data):
 ### --------------------------
 ### logout_user tests
 ### --------------------------
-def test_logout_user_success_client():
+async def test_logout_user_success_client():
     response = client.post("/api/auth/logout", headers={
         "Authorization": "Bearer fake-access",
         "X-Refresh-Token": "fake-refresh"
@@ -126,12 +218,12 @@ def test_logout_user_success_client():
 
 
 
-def test_logout_user_missing_tokens():
+async def test_logout_user_missing_tokens():
     with pytest.raises(HTTPException) as exc:
-        logout_user("", "fake-refresh")
+        await logout_user("", "fake-refresh")
     assert exc.value.status_code == 401
 
     with pytest.raises(HTTPException) as exc:
-        logout_user("Bearer fake-access", "")
+        await logout_user("Bearer fake-access", "")
     assert exc.value.status_code == 401
 
@@ -1,11 +1,17 @@
 # tests/test_auth_decorators.py
+import json
+import time
+import jwt
 import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
 from unittest.mock import patch, MagicMock
 from fastapi import HTTPException, status
 from fastapi.requests import Request
 
 from app.controllers.auth_decorators import validate_tokens, get_auth_payload, auth_required
+from app.config import Config
 from app.documents.auth_models import SessionUserModel
+from app.utils import jwks
 
 # Mock de usuario retornado por Cognito
 mock_user_attributes = [
@@ -23,14 +29,14 @@ def mock_request():
     return request
 
 @patch("app.controllers.auth_decorators.cognito_client")
-def test_validate_tokens_success(mock_cognito):
+async def test_validate_tokens_success(mock_cognito):
     mock_cognito.get_user.return_value = {"UserAttributes": mock_user_attributes}
     payload = validate_tokens("Bearer validtoken", "validrefreshtoken")
     assert payload["user_id"] == "user123"
     assert payload["role"] == "ADMIN"
 
 @patch("app.controllers.auth_decorators.cognito_client")
-def test_validate_tokens_refresh_token(mock_cognito):
+async def test_validate_tokens_refresh_token(mock_cognito):
     # Definir excepción real
     class NotAuthorizedException(Exception):
         pass
@@ -58,44 +64,157 @@ def test_validate_tokens_refresh_token(mock_cognito):
     assert payload["role"] == "ADMIN"
 
 
-def test_validate_tokens_missing_access():
+async def test_validate_tokens_missing_access():
     with pytest.raises(HTTPException) as exc:
         validate_tokens(None, "some_refresh")
     assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Token requerido" in exc.value.detail
 
-def test_validate_tokens_missing_refresh():
+async def test_validate_tokens_missing_refresh():
     with pytest.raises(HTTPException) as exc:
         validate_tokens("Bearer token", None)
     assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Refresh token requerido" in exc.value.detail
 
 @patch("app.controllers.auth_decorators.get_auth_payload")
-def test_auth_required_decorator_admin(mock_get_payload):
+async def test_auth_required_decorator_admin(mock_get_payload):
     mock_get_payload.return_value = {"user_id": "user123", "role": "ADMIN"}
     dependency = auth_required(require_admin=True)
     request = MagicMock()
-    user = dependency(request)
+    user = await dependency(request)
     assert isinstance(user, SessionUserModel)
     assert user.user_id == "user123"
     assert user.role == "ADMIN"
 
 @patch("app.controllers.auth_decorators.get_auth_payload")
-def test_auth_required_decorator_non_admin(mock_get_payload):
+async def test_auth_required_decorator_non_admin(mock_get_payload):
     mock_get_payload.return_value = {"user_id": "user123", "role": "USER"}
     dependency = auth_required(require_admin=True)
     request = MagicMock()
     with pytest.raises(HTTPException) as exc:
-        dependency(request)
+        await dependency(request)
     assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
     assert "Acceso denegado" in exc.value.detail
 
 @patch("app.controllers.auth_decorators.get_auth_payload")
-def test_auth_required_decorator_no_admin_required(mock_get_payload):
+async def test_auth_required_decorator_no_admin_required(mock_get_payload):
     mock_get_payload.return_value = {"user_id": "user123", "role": "USER"}
     dependency = auth_required(require_admin=False)
     request = MagicMock()
-    user = dependency(request)
+    user = await dependency(request)
     assert isinstance(user, SessionUserModel)
     assert user.user_id == "user123"
     assert user.role == "USER"
+
+
+# --------------------------
+# Verificación local (AUTH_MODE="jwt")
+# --------------------------
+class NotAuthorizedException(Exception):
+    pass
+
+
+@pytest.fixture
+def signing_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def jwt_mode(monkeypatch, tmp_path, signing_key):
+    public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(signing_key.public_key()))
+    public_jwk.update({"kid": "test-kid", "alg": "RS256", "use": "sig"})
+    jwks_file = tmp_path / "jwks.json"
+    jwks_file.write_text(json.dumps({"keys": [public_jwk]}))
+
+    monkeypatch.setattr(Config, "AUTH_MODE", "jwt")
+    monkeypatch.setattr(Config, "AWS_COGNITO_JWKS_FILE", str(jwks_file))
+    jwks.clear_jwks_cache()
+    yield
+    jwks.clear_jwks_cache()
+
+
+def make_token(signing_key, **overrides):
+    claims = {
+        "sub": "user123",
+        "custom:role": "ADMIN",
+        "iss": Config.AWS_COGNITO_ISSUER,
+        "client_id": Config.AWS_COGNITO_CLIENT_ID,
+        "token_use": "access",
+        "exp": int(time.time()) + 300,
+    }
+    claims.update(overrides)
+    claims = {k: v for k, v in claims.items() if v is not None}
+    return jwt.encode(claims, signing_key, algorithm="RS256", headers={"kid": "test-kid"})
+
+
+@patch("app.controllers.auth_decorators.cognito_client")
+async def test_validate_tokens_jwt_local(mock_cognito, jwt_mode, signing_key):
+    payload = validate_tokens(f"Bearer {make_token(signing_key)}", "validrefreshtoken")
+    assert payload == {"user_id": "user123", "role": "ADMIN"}
+    mock_cognito.get_user.assert_not_called()
+
+
+@patch("app.controllers.auth_decorators.cognito_client")
+async def test_validate_tokens_jwt_missing_role_falls_back(mock_cognito, jwt_mode, signing_key):
+    mock_cognito.get_user.return_value = {"UserAttributes": mock_user_attributes}
+    payload = validate_tokens(f"Bearer {make_token(signing_key, **{'custom:role': None})}", "validrefreshtoken")
+    assert payload == {"user_id": "user123", "role": "ADMIN"}
+    mock_cognito.get_user.assert_called_once()
+
+
+@patch("app.controllers.auth_decorators.cognito_client")
+async def test_validate_tokens_jwt_expired_refreshes(mock_cognito, jwt_mode, signing_key):
+    mock_cognito.exceptions.NotAuthorizedException = NotAuthorizedException
+    mock_cognito.initiate_auth.return_value = {"AuthenticationResult": {"AccessToken": make_token(signing_key)}}
+    expired = make_token(signing_key, exp=int(time.time()) - 10)
+    payload = validate_tokens(f"Bearer {expired}", "validrefreshtoken")
+    assert payload["user_id"] == "user123"
+    mock_cognito.initiate_auth.assert_called_once()
+    mock_cognito.get_user.assert_not_called()
+
+
+@patch("app.controllers.auth_decorators.cognito_client")
+async def test_validate_tokens_jwt_bad_signature(mock_cognito, jwt_mode):
+    mock_cognito.exceptions.NotAuthorizedException = NotAuthorizedException
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    with pytest.raises(HTTPException) as exc:
+        validate_tokens(f"Bearer {make_token(other_key)}", "validrefreshtoken")
+    assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
+    mock_cognito.get_user.assert_not_called()
+
+
+@patch("app.controllers.auth_decorators.cognito_client")
+async def test_validate_tokens_jwt_other_client(mock_cognito, jwt_mode, signing_key):
+    mock_cognito.exceptions.NotAuthorizedException = NotAuthorizedException
+    with pytest.raises(HTTPException) as exc:
+        validate_tokens(f"Bearer {make_token(signing_key, client_id='other')}", "validrefreshtoken")
+    assert exc.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@patch("app.controllers.auth_decorators.cognito_client")
+async def test_validate_tokens_jwt_jwks_outage_backs_off(mock_cognito, jwt_mode, signing_key, monkeypatch):
+    loads = []
+    real_load = jwks.load_jwks
+
+    def failing_load():
+        loads.append(1)
+        raise OSError("timed out")
+
+    # Sin llaves y con el JWKS caído: se valida con Cognito y no se reintenta la descarga en cada request
+    monkeypatch.setattr(jwks, "load_jwks", failing_load)
+    mock_cognito.get_user.return_value = {"UserAttributes": mock_user_attributes}
+    for _ in range(3):
+        assert validate_tokens(f"Bearer {make_token(signing_key)}", "validrefreshtoken")["user_id"] == "user123"
+    assert len(loads) == 1
+    assert mock_cognito.get_user.call_count == 3
+
+    # Con llaves cargadas, una recarga fallida (JWKS vencido) sigue usando las anteriores
+    jwks.clear_jwks_cache()
+    monkeypatch.setattr(jwks, "load_jwks", real_load)
+    validate_tokens(f"Bearer {make_token(signing_key)}", "validrefreshtoken")
+    monkeypatch.setattr(jwks, "load_jwks", failing_load)
+    monkeypatch.setattr(Config, "JWKS_CACHE_SECONDS", -1)
+    payload = validate_tokens(f"Bearer {make_token(signing_key)}", "validrefreshtoken")
+    assert payload == {"user_id": "user123", "role": "ADMIN"}
+    assert len(loads) == 2
+    assert mock_cognito.get_user.call_count == 3
@@ -1,13 +1,15 @@
 import pytest
 import json
+from botocore.exceptions import ClientError
 from decimal import Decimal
-from fastapi import status
+from fastapi import status, HTTPException
 from fastapi.responses import JSONResponse
 
 from app.controllers import bank_funds_controller as controller
 from app.controllers.bank_funds_controller import (
     create_bank_funds_controller,
     get_bank_funds_controller,
+    import_bank_funds_controller,
     update_bank_fund_controller,
 )
 from app.documents.bank_funds_models import CreateBankFundsModel, UpdateBankFundsModel
@@ -17,6 +19,8 @@ from app.documents.auth_models import SessionUserModel
 import app.schemas.category as category
 import app.schemas.bank_funds as bankFunds
 import app.controllers.bank_funds_controller as bank_ctrl
+from app.utils import batch_write, catalog_cache
+from app.utils.dynamo_types import deserialize, serialize
 
 
 class DummyDB:
@@ -24,8 +28,10 @@ class DummyDB:
     def __init__(self, name="DummyTable"):
         self.items = {}
         self.name = name
+        self.reads = 0
 
     def get_item(self, Key):
+        self.reads += 1
         if Key["id"] in self.items:
             return {"Item": self.items[Key["id"]]}
         return {}
@@ -34,8 +40,14 @@ class DummyDB:
         self.items[Item["id"]] = Item
         return {"ResponseMetadata": {"HTTPStatusCode": 200}}
 
-    def scan(self):
-        return {"Items": list(self.items.values())}
+    def scan(self, Limit=None, ExclusiveStartKey=None, **kwargs):
+        self.reads += 1
+        items = sorted(self.items.values(), key=lambda x: x["id"])
+        if ExclusiveStartKey:
+            items = [item for item in items if item["id"] > ExclusiveStartKey["id"]]
+        if Limit and len(items) > Limit:
+            return {"Items": items[:Limit], "LastEvaluatedKey": {"id": items[Limit - 1]["id"]}}
+        return {"Items": items}
 
     def update_item(self, **kwargs):
         key = kwargs["Key"]["id"]
@@ -65,18 +77,51 @@ class DummyDB:
 
 class DummyDynamoClient:
     """Mock para dynamodb_client.batch_get_item"""
+    def __init__(self, table):
+        self.calls = 0
+        self.table = table
+
     def batch_get_item(self, RequestItems):
+        self.calls += 1
         # Devuelve las categorías del DummyDB
         table_name = list(RequestItems.keys())[0]
         keys = RequestItems[table_name]["Keys"]
         items = []
         for key in keys:
             cat_id = key["id"]["S"]
-            item = category.categories_db.get_item(Key={"id": cat_id}).get("Item")
+            item = self.table.items.get(cat_id)
             if item:
                 items.append({k: {"S": str(v)} for k, v in item.items()})
         return {"Responses": {table_name: items}}
 
+    def batch_write_item(self, RequestItems):
+        self.calls += 1
+        for requests in RequestItems.values():
+            for request in requests:
+                item = deserialize(request["PutRequest"]["Item"])
+                self.table.items[item["id"]] = item
+        return {"UnprocessedItems": {}}
+
+    def put_item(self, TableName, Item, ConditionExpression=None):
+        self.calls += 1
+        item = deserialize(Item)
+        if ConditionExpression == "attribute_not_exists(id)" and item["id"] in self.table.items:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}}, "PutItem")
+        self.table.items[item["id"]] = item
+        return {}
+
+    def scan(self, TableName, **kwargs):
+        # Mismo scan de la tabla falsa, en formato de atributos de DynamoDB
+        self.calls += 1
+        for param in ("ExclusiveStartKey", "ExpressionAttributeValues"):
+            if param in kwargs:
+                kwargs[param] = deserialize(kwargs[param])
+        response = self.table.scan(**kwargs)
+        raw = {"Items": [serialize(item) for item in response.get("Items", [])]}
+        if response.get("LastEvaluatedKey"):
+            raw["LastEvaluatedKey"] = serialize(response["LastEvaluatedKey"])
+        return raw
+
 
 @pytest.fixture
 def mock_user():
@@ -93,18 +138,21 @@ def mock_db(monkeypatch):
     monkeypatch.setattr(category, "categories_db", dummy)
     monkeypatch.setattr(bankFunds, "bank_funds_db", dummy)
     # Parchar dynamodb_client
-    monkeypatch.setattr(bank_ctrl, "dynamodb_client", DummyDynamoClient())
+    dynamo_client = DummyDynamoClient(dummy)
+    monkeypatch.setattr(catalog_cache, "dynamodb_client", dynamo_client)
+    monkeypatch.setattr(batch_write, "dynamodb_client", dynamo_client)
+    dummy.dynamo_client = dynamo_client
     return dummy
 
 
-def test_create_bank_fund_success(mock_user, mock_db):
+async def test_create_bank_fund_success(mock_user, mock_db):
     data = CreateBankFundsModel(
         name="Fund A",
         category_id="cat-1",
         min_amount=1000,
         currency="USD",
     )
-    response: JSONResponse = create_bank_funds_controller(mock_user, data)
+    response: JSONResponse = await create_bank_funds_controller(mock_user, data)
     body = json.loads(response.body.decode())
     
     assert response.status_code == status.HTTP_201_CREATED
@@ -112,7 +160,12 @@ def test_create_bank_fund_success(mock_user, mock_db):
     assert any(item["name"] == "Fund A" for item in mock_db.items.values())
 
 
-def test_get_bank_funds_success(mock_user, mock_db):
+def fund_in(body, fund_id):
+    # La tabla falsa es compartida con las categorías y las páginas siguen el orden del scan
+    return next(item for item in body["data"] if item["id"] == fund_id)
+
+
+async def test_get_bank_funds_success(mock_user, mock_db):
     mock_db.items["fund-1"] = {
         "id": "fund-1",
         "name": "Fund A",
@@ -120,16 +173,16 @@ def test_get_bank_funds_success(mock_user, mock_db):
         "created_at": "2025-01-01T00:00:00",
     }
 
-    response: JSONResponse = get_bank_funds_controller()
+    response: JSONResponse = await get_bank_funds_controller(expand={"category"})
     body = json.loads(response.body.decode())
     
     assert response.status_code == status.HTTP_200_OK
     assert body["detail"] == "Bank fund retrieved successfully"
     assert len(body["data"]) >= 1
-    assert body["data"][0]["category_id"]["id"] == "cat-1"
+    assert fund_in(body, "fund-1")["category_id"]["id"] == "cat-1"
 
 
-def test_update_bank_fund_success(mock_user, mock_db):
+async def test_update_bank_fund_success(mock_user, mock_db):
     mock_db.items["fund-1"] = {
         "id": "fund-1",
         "name": "Old Fund",
@@ -143,10 +196,165 @@ def test_update_bank_fund_success(mock_user, mock_db):
         min_amount=2000,
         currency="USD",
     )
-    response: JSONResponse = update_bank_fund_controller(mock_user, "fund-1", data)
+    response: JSONResponse = await update_bank_fund_controller(mock_user, "fund-1", data)
     body = json.loads(response.body.decode())
     
     assert response.status_code == status.HTTP_200_OK
     assert body["detail"] == "Bank fund updated successfully"
     assert body["data"]["name"] == "Updated Fund"
     assert mock_db.items["fund-1"]["name"] == "Updated Fund"
+
+
+async def test_get_bank_funds_served_from_cache(mock_user, mock_db):
+    mock_db.items["fund-1"] = {"id": "fund-1", "name": "Fund A", "category_id": "cat-1", "created_at": "2025-01-01"}
+
+    await get_bank_funds_controller(expand={"category"})
+    reads, batch_calls = mock_db.reads, mock_db.dynamo_client.calls
+    body = json.loads((await get_bank_funds_controller(expand={"category"})).body.decode())
+
+    # La segunda lectura no toca DynamoDB y devuelve la categoría expandida
+    assert (mock_db.reads, mock_db.dynamo_client.calls) == (reads, batch_calls)
+    assert fund_in(body, "fund-1")["category_id"]["id"] == "cat-1"
+    assert catalog_cache.bank_funds_pages_cache.hits == 1
+
+
+async def test_update_bank_fund_refreshes_cache(mock_user, mock_db):
+    mock_db.items["fund-1"] = {"id": "fund-1", "name": "Old Fund", "category_id": "cat-1", "created_at": "2025-01-01"}
+    await get_bank_funds_controller()
+
+    await update_bank_fund_controller(mock_user, "fund-1", UpdateBankFundsModel(name="New Fund"))
+    body = json.loads((await get_bank_funds_controller()).body.decode())
+
+    assert fund_in(body, "fund-1")["name"] == "New Fund"
+    assert (await catalog_cache.get_bank_fund("fund-1"))["name"] == "New Fund"
+
+
+async def test_get_bank_fund_by_id_uses_key_read(mock_user, mock_db):
+    mock_db.items["fund-1"] = {"id": "fund-1", "name": "Fund A", "category_id": "cat-1", "created_at": "2025-01-01"}
+
+    body = json.loads((await get_bank_funds_controller("fund-1", expand={"category"})).body.decode())
+
+    assert body["data"][0]["id"] == "fund-1"
+    assert body["data"][0]["category_id"]["id"] == "cat-1"
+    # Un get_item para el fondo; la categoría va por batch_get_item
+    assert mock_db.reads == 1
+
+
+async def test_get_bank_fund_by_id_not_found(mock_user, mock_db):
+    with pytest.raises(HTTPException) as e:
+        await get_bank_funds_controller("missing")
+    assert e.value.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_get_bank_funds_by_ids(mock_user, mock_db):
+    mock_db.items["fund-1"] = {"id": "fund-1", "name": "Fund A", "category_id": "cat-1", "created_at": "2025-01-01"}
+    mock_db.items["fund-2"] = {"id": "fund-2", "name": "Fund B", "category_id": "cat-1", "created_at": "2025-01-02"}
+
+    body = json.loads((await get_bank_funds_controller(ids=["fund-1", "fund-2", "missing"], expand={"category"})).body.decode())
+
+    assert [item["id"] for item in body["data"]] == ["fund-2", "fund-1"]
+    assert mock_db.reads == 0
+    # Fondos y categorías en una llamada cada uno
+    assert mock_db.dynamo_client.calls == 2
+
+
+async def test_get_bank_funds_without_expand_keeps_category_id(mock_user, mock_db):
+    mock_db.items["fund-1"] = {"id": "fund-1", "name": "Fund A", "category_id": "cat-1", "created_at": "2025-01-01"}
+
+    body = json.loads((await get_bank_funds_controller()).body.decode())
+
+    assert fund_in(body, "fund-1")["category_id"] == "cat-1"
+    # Sin ?expand=category no se leen las categorías
+    assert mock_db.dynamo_client.calls == 1
+
+
+async def test_get_bank_funds_sparse_fields(mock_user, mock_db, monkeypatch):
+    mock_db.items["fund-1"] = {
+        "id": "fund-1", "name": "Fund A", "category_id": "cat-1", "min_amount": Decimal("75000"),
+        "created_at": "2025-01-01",
+    }
+    scans = []
+    scan = mock_db.dynamo_client.scan
+
+    def recording_scan(**kwargs):
+        scans.append(kwargs)
+        return scan(**kwargs)
+
+    monkeypatch.setattr(mock_db.dynamo_client, "scan", recording_scan)
+    body = json.loads((await get_bank_funds_controller(fields=("name", "min_amount"))).body.decode())
+
+    fund = fund_in(body, "fund-1")
+    assert fund == {"id": "fund-1", "name": "Fund A", "min_amount": 75000}
+    # Solo se leen los atributos pedidos y el id
+    assert sorted(scans[0]["ExpressionAttributeNames"].values()) == ["id", "min_amount", "name"]
+    assert scans[0]["ProjectionExpression"] == ", ".join(scans[0]["ExpressionAttributeNames"])
+
+
+async def test_get_bank_funds_stats(mock_user, mock_db, monkeypatch):
+    mock_db.items["fund-1"] = {"id": "fund-1", "name": "Fund A", "currency": "USD", "category_id": "cat-1", "created_at": "2025-01-01"}
+    mock_db.items["fund-2"] = {"id": "fund-2", "name": "Fund B", "currency": "COP", "category_id": "cat-1", "created_at": "2025-01-02"}
+    stats_table = DummyDB("BankFundsStats")
+    stats_table.items["fund-1"] = {"id": "fund-1", "open_subscriptions": Decimal("3"), "assets_under_management": Decimal("4500.5")}
+    stats_client = DummyDynamoClient(stats_table)
+    stats_client.batch_get_item = lambda RequestItems: {"Responses": {"BankFundsStats": [
+        serialize(stats_table.items[key["id"]["S"]]) for key in RequestItems["BankFundsStats"]["Keys"] if key["id"]["S"] in stats_table.items
+    ]}}
+    monkeypatch.setattr(controller, "dynamodb_client", stats_client)
+
+    body = json.loads((await controller.get_bank_funds_stats_controller()).body.decode())
+    funds = {item["id"]: item for item in body["data"]}
+
+    assert funds["fund-1"] == {"id": "fund-1", "name": "Fund A", "currency": "USD", "open_subscriptions": 3, "assets_under_management": 4500.5}
+    # Un fondo sin suscripciones aparece en cero
+    assert funds["fund-2"]["open_subscriptions"] == 0
+    # Una página del catálogo y una lectura en bloque de los contadores
+    assert mock_db.dynamo_client.calls == 1
+    assert mock_db.reads == 1
+
+
+async def test_import_bank_funds_csv(mock_user, mock_db):
+    mock_db.items["fund-live"] = {"id": "fund-live", "name": "Live", "category_id": "cat-1", "min_amount": Decimal("500"), "currency": "USD"}
+    await get_bank_funds_controller()
+    calls = mock_db.dynamo_client.calls
+    csv_body = (
+        "name,category_id,min_amount,currency,id\n"
+        + "".join(f"Fund {i},cat-1,{1000 + i},USD,\n" for i in range(30))
+        + "Orphan,cat-404,500,,\n"
+        + "No amount,cat-1,,,\n"
+        + "Fixed,cat-1,750,COP,fund-fixed\n"
+        + "Live again,cat-1,1,COP,fund-live\n"
+    ).encode()
+
+    response = await import_bank_funds_controller(mock_user, csv_body, "text/csv")
+    body = json.loads(response.body.decode())
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert body["summary"] == {"created": 31, "invalid": 3, "failed": 0}
+    assert body["data"][30] == {"row": 31, "status": "invalid", "errors": ["Category does not exist"]}
+    assert body["data"][31]["errors"] == ["min_amount: Field required"]
+    assert body["data"][32] == {"row": 33, "status": "created", "id": "fund-fixed"}
+    assert mock_db.items["fund-fixed"]["min_amount"] == Decimal("750")
+    # El fondo existente no se reemplaza (su moneda y monto siguen iguales)
+    assert body["data"][33] == {"row": 34, "status": "invalid", "id": "fund-live", "errors": ["Id already exists"]}
+    assert mock_db.items["fund-live"]["currency"] == "USD"
+    # Una lectura en lote de los ids indicados, una de las categorías, dos batch_write_item (25 + 5)
+    # y un put condicional para el fondo con id indicado
+    assert mock_db.dynamo_client.calls - calls == 1 + 1 + 2 + 1
+    # Las páginas en caché se descartan: el listado ve los fondos importados
+    listed = json.loads((await get_bank_funds_controller(limit=100)).body.decode())
+    assert "fund-fixed" in {item["id"] for item in listed["data"]}
+
+
+async def test_import_bank_funds_rejects_bad_bodies(mock_user, mock_db):
+    with pytest.raises(HTTPException) as e:
+        await import_bank_funds_controller(mock_user, b"{not json", "application/json")
+    assert e.value.status_code == status.HTTP_400_BAD_REQUEST
+
+    with pytest.raises(HTTPException) as e:
+        await import_bank_funds_controller(mock_user, b"<funds/>", "application/xml")
+    assert e.value.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    # Ninguna fila válida: 400 con el reporte
+    response = await import_bank_funds_controller(mock_user, json.dumps({"items": [{"name": "X"}]}).encode(), "application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert json.loads(response.body.decode())["summary"] == {"created": 0, "invalid": 1, "failed": 0}
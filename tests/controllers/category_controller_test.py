@@ -1,15 +1,19 @@
 import pytest
 import json
+from botocore.exceptions import ClientError
 from fastapi import status, HTTPException
 from fastapi.responses import JSONResponse
 
 from app.controllers.category_controller import (
     create_category_controller,
     get_categories_controller,
+    import_categories_controller,
     update_category_controller,
 )
 from app.documents.auth_models import SessionUserModel
 from app.documents.category_models import CreateCategoryModel, UpdateCategoryModel
+from app.utils import batch_write, catalog_cache
+from app.utils.dynamo_types import deserialize, serialize
 
 
 class DummyDB:
@@ -17,13 +21,25 @@ class DummyDB:
     def __init__(self):
         self.items = {}
         self.name = "Categories"
+        self.scans = 0
+
+    def get_item(self, Key):
+        if Key["id"] in self.items:
+            return {"Item": self.items[Key["id"]]}
+        return {}
 
     def put_item(self, Item):
         self.items[Item["id"]] = Item
         return {"ResponseMetadata": {"HTTPStatusCode": 200}}
 
-    def scan(self):
-        return {"Items": list(self.items.values())}
+    def scan(self, Limit=None, ExclusiveStartKey=None, **kwargs):
+        self.scans += 1
+        items = sorted(self.items.values(), key=lambda x: x["id"])
+        if ExclusiveStartKey:
+            items = [item for item in items if item["id"] > ExclusiveStartKey["id"]]
+        if Limit and len(items) > Limit:
+            return {"Items": items[:Limit], "LastEvaluatedKey": {"id": items[Limit - 1]["id"]}}
+        return {"Items": items}
 
     def update_item(self, **kwargs):
         key = kwargs["Key"]["id"]
@@ -39,6 +55,46 @@ class DummyDB:
         return {"Attributes": attrs}
 
 
+class DummyDynamoClient:
+    """Fake de dynamodb_client: scan sobre la tabla falsa en formato de atributos de DynamoDB"""
+    def __init__(self, table):
+        self.calls = 0
+        self.table = table
+
+    def batch_get_item(self, RequestItems):
+        self.calls += 1
+        (table_name, request), = RequestItems.items()
+        ids = [key["id"]["S"] for key in request["Keys"]]
+        return {"Responses": {table_name: [serialize(self.table.items[id]) for id in ids if id in self.table.items]}}
+
+    def batch_write_item(self, RequestItems):
+        self.calls += 1
+        for requests in RequestItems.values():
+            for request in requests:
+                item = deserialize(request["PutRequest"]["Item"])
+                self.table.items[item["id"]] = item
+        return {"UnprocessedItems": {}}
+
+    def put_item(self, TableName, Item, ConditionExpression=None):
+        self.calls += 1
+        item = deserialize(Item)
+        if ConditionExpression == "attribute_not_exists(id)" and item["id"] in self.table.items:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}}, "PutItem")
+        self.table.items[item["id"]] = item
+        return {}
+
+    def scan(self, TableName, **kwargs):
+        self.calls += 1
+        for param in ("ExclusiveStartKey", "ExpressionAttributeValues"):
+            if param in kwargs:
+                kwargs[param] = deserialize(kwargs[param])
+        response = self.table.scan(**kwargs)
+        raw = {"Items": [serialize(item) for item in response.get("Items", [])]}
+        if response.get("LastEvaluatedKey"):
+            raw["LastEvaluatedKey"] = serialize(response["LastEvaluatedKey"])
+        return raw
+
+
 @pytest.fixture
 def mock_user():
     return SessionUserModel(user_id="user-123", role="ADMIN")
@@ -49,12 +105,15 @@ def mock_db(monkeypatch):
     dummy = DummyDB()
     import app.schemas.category as cat
     monkeypatch.setattr(cat, "categories_db", dummy)
+    dynamo_client = DummyDynamoClient(dummy)
+    monkeypatch.setattr(catalog_cache, "dynamodb_client", dynamo_client)
+    monkeypatch.setattr(batch_write, "dynamodb_client", dynamo_client)
     return dummy
 
 
-def test_create_category_success(mock_user, mock_db):
+async def test_create_category_success(mock_user, mock_db):
     data = CreateCategoryModel(name="Category A", description="Test description")
-    response: JSONResponse = create_category_controller(mock_user, data)
+    response: JSONResponse = await create_category_controller(mock_user, data)
     body = json.loads(response.body.decode())
 
     assert response.status_code == status.HTTP_201_CREATED
@@ -63,39 +122,60 @@ def test_create_category_success(mock_user, mock_db):
     assert body["data"]["description"] == "Test description"
 
 
-def test_get_categories_success(mock_user, mock_db):
+async def test_get_categories_success(mock_user, mock_db):
     cat_id = "cat-1"
     mock_db.items[cat_id] = {"id": cat_id, "name": "Category A", "description": "desc", "created_at": "2025-01-01"}
 
-    response: JSONResponse = get_categories_controller()
+    response: JSONResponse = await get_categories_controller()
     body = json.loads(response.body.decode())
     assert response.status_code == status.HTTP_200_OK
     assert body["detail"] == "Category retrieved successfully"
     assert len(body["data"]) >= 1
 
 
-def test_get_category_by_id_found(mock_user, mock_db):
+async def test_get_categories_paginated(mock_user, mock_db):
+    for i in range(3):
+        mock_db.items[f"cat-{i}"] = {"id": f"cat-{i}", "name": f"Category {i}", "created_at": f"2025-01-0{i + 1}"}
+
+    first = json.loads((await get_categories_controller(limit=2)).body.decode())
+    assert len(first["data"]) == 2
+    assert first["next_cursor"]
+
+    second = json.loads((await get_categories_controller(limit=2, cursor=first["next_cursor"])).body.decode())
+    assert [item["id"] for item in second["data"]] == ["cat-2"]
+    assert second["next_cursor"] is None
+
+
+async def test_get_categories_invalid_cursor(mock_user, mock_db):
+    with pytest.raises(HTTPException) as e:
+        await get_categories_controller(cursor="not-a-cursor")
+    assert e.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+async def test_get_category_by_id_found(mock_user, mock_db):
     cat_id = "cat-123"
     mock_db.items[cat_id] = {"id": cat_id, "name": "Category X", "description": "desc", "created_at": "2025-01-02"}
 
-    response: JSONResponse = get_categories_controller(cat_id)
+    response: JSONResponse = await get_categories_controller(cat_id)
     body = json.loads(response.body.decode())
     assert response.status_code == status.HTTP_200_OK
     assert body["data"][0]["id"] == cat_id
+    # Lectura por llave, sin scan de la tabla
+    assert mock_db.scans == 0
 
 
-def test_get_category_by_id_not_found(mock_user, mock_db):
+async def test_get_category_by_id_not_found(mock_user, mock_db):
     with pytest.raises(HTTPException) as e:
-        get_categories_controller("does-not-exist")
+        await get_categories_controller("does-not-exist")
     assert e.value.status_code == status.HTTP_404_NOT_FOUND
 
 
-def test_update_category_success(mock_user, mock_db):
+async def test_update_category_success(mock_user, mock_db):
     cat_id = "cat-1"
     mock_db.items[cat_id] = {"id": cat_id, "name": "Old", "description": "Old desc"}
 
     data = UpdateCategoryModel(name="New Name", description="New desc")
-    response: JSONResponse = update_category_controller(mock_user, cat_id, data)
+    response: JSONResponse = await update_category_controller(mock_user, cat_id, data)
     body = json.loads(response.body.decode())
 
     assert response.status_code == status.HTTP_200_OK
@@ -104,13 +184,56 @@ def test_update_category_success(mock_user, mock_db):
     assert body["data"]["description"] == "New desc"
 
 
-def test_update_category_nothing_to_update(mock_user, mock_db):
+async def test_update_category_nothing_to_update(mock_user, mock_db):
     cat_id = "cat-2"
     mock_db.items[cat_id] = {"id": cat_id, "name": "Keep", "description": "Keep desc"}
 
     data = UpdateCategoryModel(name=None, description=None)
     with pytest.raises(HTTPException) as e:
-        update_category_controller(mock_user, cat_id, data)
+        await update_category_controller(mock_user, cat_id, data)
 
     assert e.value.status_code == status.HTTP_400_BAD_REQUEST
     assert e.value.detail == "Nothing to update"
+
+
+async def test_import_categories_json(mock_user, mock_db):
+    mock_db.items["cat-old"] = {"id": "cat-old", "name": "Old", "user_created": "admin-0", "created_at": "2024-01-01"}
+    rows = [
+        {"id": "cat-a", "name": "Category A"},
+        {"name": "Category B", "description": "desc"},
+        {"description": "sin nombre"},
+        {"id": "cat-a", "name": "Repetida"},
+        {"id": "cat-old", "name": "Reemplazo"},
+    ]
+    response = await import_categories_controller(mock_user, json.dumps(rows).encode(), "application/json")
+    body = json.loads(response.body.decode())
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert body["summary"] == {"created": 2, "invalid": 3, "failed": 0}
+    assert [entry["status"] for entry in body["data"]] == ["created", "created", "invalid", "invalid", "invalid"]
+    assert body["data"][3]["errors"] == ["Duplicate id in import"]
+    # Un id existente no se reemplaza
+    assert body["data"][4]["errors"] == ["Id already exists"]
+    assert mock_db.items["cat-old"]["name"] == "Old"
+    assert mock_db.items["cat-a"]["name"] == "Category A"
+    assert mock_db.items["cat-a"]["user_created"] == "user-123"
+    # Los items escritos quedan en la caché por id
+    hits = catalog_cache.categories_cache.hits
+    assert (await get_categories_controller("cat-a")).status_code == status.HTTP_200_OK
+    assert catalog_cache.categories_cache.hits == hits + 1
+
+
+async def test_import_categories_does_not_overwrite_concurrent_create(mock_user, mock_db, monkeypatch):
+    # La lectura previa no ve la categoría: se crea entre la validación y la escritura
+    async def nothing_found(ids):
+        mock_db.items["cat-race"] = {"id": "cat-race", "name": "Concurrente", "created_at": "2025-01-01"}
+        return {}
+
+    monkeypatch.setattr(catalog_cache, "get_categories", nothing_found)
+    rows = [{"id": "cat-race", "name": "Importada"}, {"name": "Otra"}]
+    response = await import_categories_controller(mock_user, json.dumps(rows).encode(), "application/json")
+    body = json.loads(response.body.decode())
+
+    assert body["summary"] == {"created": 1, "invalid": 1, "failed": 0}
+    assert body["data"][0] == {"row": 1, "status": "invalid", "id": "cat-race", "errors": ["Id already exists"]}
+    assert mock_db.items["cat-race"]["name"] == "Concurrente"
@@ -1,28 +1,65 @@
+import json
+from decimal import Decimal
+
 import pytest
 from fastapi import status, HTTPException
 from fastapi.responses import JSONResponse
 
+from app.config import Config
+from app.controllers import user_bank_funds_audit_controller as controller
 from app.controllers.user_bank_funds_audit_controller import (
+    export_user_bank_funds_audit_controller,
     get_user_bank_funds_audit_controller,
 )
 from app.documents.auth_models import SessionUserModel
+from app.utils.dynamo_types import deserialize, serialize
 
 
 class DummyAuditDB:
-    """Fake DB for user_bank_funds_audit."""
+    """Fake DB for user_bank_funds_audit (llave user_id + sk, índice por id)."""
     def __init__(self):
         self.items = []
 
-    def scan(self, **kwargs):
-        # simulamos filter con user_id
-        uid = kwargs["ExpressionAttributeValues"][":uid"]
-        filtered = [item for item in self.items if item["user_id"] == uid]
-        return {"Items": filtered}
+    name = "UserBankFundsHistory"
+
+    def query(self, **kwargs):
+        self.last_query = kwargs
+        values = kwargs["ExpressionAttributeValues"]
+        if kwargs.get("IndexName"):
+            return {"Items": [item for item in self.items if item["id"] == values[":id"]]}
+        # Historia del usuario ordenada por sk (created_at#id), acotada por fechas
+        items = [
+            dict(item, sk=item.get("sk") or f"{item['created_at']}#{item['id']}")
+            for item in self.items if item["user_id"] == values[":uid"]
+        ]
+        items = [
+            item for item in items
+            if item["sk"] >= values.get(":date_from", "") and item["sk"] <= values.get(":date_to", "\uffff")
+        ]
+        return {"Items": sorted(items, key=lambda item: item["sk"], reverse=not kwargs.get("ScanIndexForward", True))}
+
+
+class DummyDynamoClient:
+    """Fake de dynamodb_client: query sobre la tabla falsa en formato de atributos de DynamoDB"""
+    def __init__(self, table):
+        self.calls = 0
+        self.table = table
+
+    def query(self, TableName, **kwargs):
+        self.calls += 1
+        for param in ("ExclusiveStartKey", "ExpressionAttributeValues"):
+            if param in kwargs:
+                kwargs[param] = deserialize(kwargs[param])
+        response = self.table.query(**kwargs)
+        raw = {"Items": [serialize(item) for item in response.get("Items", [])]}
+        if response.get("LastEvaluatedKey"):
+            raw["LastEvaluatedKey"] = serialize(response["LastEvaluatedKey"])
+        return raw
 
 
 @pytest.fixture
 def mock_user():
-    return SessionUserModel(user_id="user-123")
+    return SessionUserModel(user_id="user-123", role="USER")
 
 
 @pytest.fixture
@@ -30,49 +67,216 @@ def mock_db(monkeypatch):
     dummy = DummyAuditDB()
     import app.schemas.user_bank_funds_audit as audit
     monkeypatch.setattr(audit, "user_bank_funds_audit_db", dummy)
+    import app.controllers.user_bank_funds_audit_controller as controller
+    dummy.client = DummyDynamoClient(dummy)
+    monkeypatch.setattr(controller, "dynamodb_client", dummy.client)
     return dummy
 
 
-def test_get_user_audits_success(mock_user, mock_db):
+async def test_get_user_audits_success(mock_user, mock_db):
     mock_db.items = [
         {"id": "a1", "user_id": "user-123", "created_at": "2025-01-01"},
         {"id": "a2", "user_id": "user-123", "created_at": "2025-01-02"},
         {"id": "a3", "user_id": "other", "created_at": "2025-01-03"},
     ]
-    response: JSONResponse = get_user_bank_funds_audit_controller(mock_user)
+    response: JSONResponse = await get_user_bank_funds_audit_controller(mock_user)
 
     assert response.status_code == status.HTTP_200_OK
-    body = response.json()
+    body = json.loads(response.body.decode())
     assert body["detail"] == "User bank funds audit retrieved successfully"
     assert len(body["data"]) == 2
     # check ordering desc
     assert body["data"][0]["created_at"] == "2025-01-02"
+    # Una sola query por la llave del usuario, más reciente primero
+    assert mock_db.last_query["KeyConditionExpression"] == "user_id = :uid"
+    assert mock_db.last_query["ScanIndexForward"] is False
+
+
+async def test_get_user_audits_date_range(mock_user, mock_db):
+    mock_db.items = [
+        {"id": f"a{day}", "user_id": "user-123", "created_at": f"2025-01-{day:02d}T12:00:00+00:00"}
+        for day in range(1, 6)
+    ]
+    response: JSONResponse = await get_user_bank_funds_audit_controller(
+        mock_user, date_from="2025-01-02T00:00:00+00:00", date_to="2025-01-04T12:00:00+00:00"
+    )
+    body = json.loads(response.body.decode())
+
+    assert mock_db.last_query["KeyConditionExpression"] == "user_id = :uid AND sk BETWEEN :date_from AND :date_to"
+    assert [item["id"] for item in body["data"]] == ["a4", "a3", "a2"]
+
+
+async def test_get_user_audits_paginated(mock_user, mock_db):
+    mock_db.query = lambda **kwargs: {
+        "Items": [{"id": "a1", "user_id": "user-123", "created_at": "2025-01-01"}],
+        "LastEvaluatedKey": {"user_id": "user-123", "sk": "2025-01-01#a1"},
+    }
+    response: JSONResponse = await get_user_bank_funds_audit_controller(mock_user, limit=1)
+    body = json.loads(response.body.decode())
+    assert len(body["data"]) == 1
+    assert body["next_cursor"]
 
 
-def test_get_user_audit_by_id_found(mock_user, mock_db):
+async def test_get_user_audit_by_id_found(mock_user, mock_db):
     mock_db.items = [
         {"id": "a1", "user_id": "user-123", "created_at": "2025-01-01"},
     ]
-    response: JSONResponse = get_user_bank_funds_audit_controller(mock_user, "a1")
+    response: JSONResponse = await get_user_bank_funds_audit_controller(mock_user, "a1")
 
     assert response.status_code == status.HTTP_200_OK
-    body = response.json()
+    body = json.loads(response.body.decode())
     assert body["data"][0]["id"] == "a1"
 
 
-def test_get_user_audit_by_id_not_found(mock_user, mock_db):
+async def test_get_user_audit_by_id_not_found(mock_user, mock_db):
     mock_db.items = [
         {"id": "a1", "user_id": "user-123", "created_at": "2025-01-01"},
     ]
     with pytest.raises(HTTPException) as e:
-        get_user_bank_funds_audit_controller(mock_user, "does-not-exist")
+        await get_user_bank_funds_audit_controller(mock_user, "does-not-exist")
 
     assert e.value.status_code == status.HTTP_404_NOT_FOUND
     assert e.value.detail == "User bank funds audit not found"
 
 
-def test_get_user_audits_empty(mock_user, mock_db):
+async def test_get_user_audits_empty(mock_user, mock_db):
     mock_db.items = []
-    response: JSONResponse = get_user_bank_funds_audit_controller(mock_user)
-    body = response.json()
+    response: JSONResponse = await get_user_bank_funds_audit_controller(mock_user)
+    body = json.loads(response.body.decode())
     assert body["data"] == []
+
+
+async def test_get_user_audit_by_id_other_user(mock_user, mock_db):
+    mock_db.items = [
+        {"id": "a3", "user_id": "other", "created_at": "2025-01-03"},
+    ]
+    with pytest.raises(HTTPException) as e:
+        await get_user_bank_funds_audit_controller(mock_user, "a3")
+
+    assert e.value.status_code == status.HTTP_404_NOT_FOUND
+
+
+async def test_get_user_audits_by_ids(mock_user, mock_db):
+    mock_db.items = [
+        {"id": "a1", "user_id": "user-123", "created_at": "2025-01-01"},
+        {"id": "a3", "user_id": "other", "created_at": "2025-01-03"},
+    ]
+    response: JSONResponse = await get_user_bank_funds_audit_controller(mock_user, ids=["a1", "a3", "missing"])
+    body = json.loads(response.body.decode())
+
+    # Solo los registros del usuario, leídos por el índice por id
+    assert [item["id"] for item in body["data"]] == ["a1"]
+    assert body["next_cursor"] is None
+    assert mock_db.last_query["IndexName"] == "id-index"
+
+
+async def read_stream(response):
+    return b"".join([chunk async for chunk in response.body_iterator]).decode()
+
+
+async def test_export_user_audits_ndjson(mock_user, mock_db):
+    mock_db.items = [
+        {"id": f"a{i}", "user_id": "user-123", "amount": Decimal("1000.5"), "created_at": f"2025-01-0{i}T09:00:00+00:00"}
+        for i in range(1, 6)
+    ] + [{"id": "x1", "user_id": "other", "created_at": "2025-01-01"}]
+
+    response = await export_user_bank_funds_audit_controller(mock_user, date_from="2025-01-01")
+    lines = [json.loads(line) for line in (await read_stream(response)).splitlines()]
+
+    assert response.media_type == "application/x-ndjson"
+    assert [line["id"] for line in lines] == ["a5", "a4", "a3", "a2", "a1"]
+    assert lines[0]["amount"] == 1000.5
+    assert mock_db.last_query["KeyConditionExpression"] == "user_id = :uid AND sk >= :date_from"
+
+
+async def test_export_user_audits_csv(mock_user, mock_db):
+    mock_db.items = [{"id": "a1", "user_id": "user-123", "status": "OPEN", "amount": Decimal("75000"), "created_at": "2025-01-01"}]
+
+    response = await export_user_bank_funds_audit_controller(mock_user, format="csv")
+    rows = (await read_stream(response)).splitlines()
+
+    assert response.media_type.startswith("text/csv")
+    assert rows[0].split(",")[:3] == ["user_id", "bank_funds_id", "amount"]
+    assert rows[1].startswith("user-123,,75000,")
+    assert len(rows) == 2
+
+
+async def test_export_user_audits_invalid_date(mock_user, mock_db):
+    with pytest.raises(HTTPException) as e:
+        await export_user_bank_funds_audit_controller(mock_user, date_from="yesterday")
+    assert e.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class DummyS3:
+    """Fake de s3_client: guarda los objetos y las partes del multipart"""
+    def __init__(self, fail_part=None):
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.fail_part = fail_part
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[Key] = Body
+
+    def create_multipart_upload(self, Bucket, Key, ContentType):
+        self.uploads["upload-1"] = []
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        if PartNumber == self.fail_part:
+            raise RuntimeError("S3 unavailable")
+        self.uploads[UploadId].append(Body)
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        assert [part["PartNumber"] for part in MultipartUpload["Parts"]] == list(range(1, len(self.uploads[UploadId]) + 1))
+        self.objects[Key] = b"".join(self.uploads.pop(UploadId))
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(UploadId)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}.s3/{Params['Key']}?expires={ExpiresIn}"
+
+
+@pytest.fixture
+def mock_s3(monkeypatch):
+    s3 = DummyS3()
+    monkeypatch.setattr(controller, "s3_client", s3)
+    monkeypatch.setattr(Config, "EXPORT_BUCKET", "exports-bucket")
+    # Partes chicas para que el historial de prueba ocupe varias
+    monkeypatch.setattr(Config, "EXPORT_PART_SIZE", 200)
+    return s3
+
+
+async def test_export_user_audits_to_s3(mock_user, mock_db, mock_s3):
+    mock_db.items = [
+        {"id": f"a{i}", "user_id": "user-123", "amount": Decimal("10"), "created_at": f"2025-01-{i:02d}T09:00:00+00:00"}
+        for i in range(1, 21)
+    ]
+
+    response = await export_user_bank_funds_audit_controller(mock_user)
+    body = json.loads(response.body.decode())
+
+    assert response.status_code == status.HTTP_200_OK
+    (key, content), = mock_s3.objects.items()
+    assert key.startswith("exports/user-123/") and key.endswith(".ndjson")
+    assert body["data"]["url"] == f"https://exports-bucket.s3/{key}?expires={Config.EXPORT_URL_EXPIRES_SECONDS}"
+    assert [json.loads(line)["id"] for line in content.decode().splitlines()] == [f"a{i}" for i in range(20, 0, -1)]
+
+
+async def test_export_user_audits_small_file_and_aborted_upload(mock_user, mock_db, mock_s3):
+    mock_db.items = [{"id": "a1", "user_id": "user-123", "created_at": "2025-01-01T09:00:00+00:00"}]
+    await export_user_bank_funds_audit_controller(mock_user, format="csv")
+    # Menos de una parte: un solo put_object, sin multipart
+    assert mock_s3.uploads == {}
+    assert len(mock_s3.objects) == 1
+
+    mock_db.items = [
+        {"id": f"a{i}", "user_id": "user-123", "created_at": f"2025-01-{i:02d}T09:00:00+00:00"}
+        for i in range(1, 21)
+    ]
+    mock_s3.fail_part = 1
+    with pytest.raises(RuntimeError):
+        await export_user_bank_funds_audit_controller(mock_user)
+    assert mock_s3.aborted == ["upload-1"]
@@ -1,5 +1,8 @@
+import json
 import pytest
 from decimal import Decimal
+from unittest.mock import MagicMock
+from botocore.exceptions import ClientError
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 
@@ -9,8 +12,9 @@ from app.documents.user_bank_funds_models import CreateUserBankFundsModel
 
 # DummyDB que soporta scan con filtro
 class DummyDB:
-    def __init__(self):
+    def __init__(self, name="DummyTable"):
         self.items = {}
+        self.name = name
 
     def put_item(self, Item):
         # Usar bank_fund_id si existe, sino id
@@ -29,6 +33,13 @@ class DummyDB:
             items = [item for item in items if item.get("user_id") == uid]
         return {"Items": items}
 
+    def query(self, IndexName=None, KeyConditionExpression=None, ScanIndexForward=True, ExclusiveStartKey=None):
+        self.last_query = {"IndexName": IndexName, "ScanIndexForward": ScanIndexForward}
+        _, uid = KeyConditionExpression.get_expression()["values"]
+        items = [item for item in self.items.values() if item.get("user_id") == uid]
+        items = sorted(items, key=lambda x: x.get("created_at", ""), reverse=not ScanIndexForward)
+        return {"Items": items}
+
     def delete_item(self, Key):
         key = Key.get("bank_fund_id") or Key.get("id")
         return self.items.pop(key, None)
@@ -59,38 +70,307 @@ def mock_db(monkeypatch):
 # Tests
 # ---------------------------
 
-def test_create_user_bank_fund(mock_user, mock_db):
-    data = CreateUserBankFundsModel(
-        user_id="user123",
-        bank_fund_id="fund-1",
-        name="My Fund",
-        amount=1000,
-        currency="USD"
-    )
-    
-    # Convertir el modelo a dict antes de pasarlo al controller si el controller usa boto3 real
-    data_dict = data.model_dump()  # Pydantic v2
-    # o data.dict() si estás usando Pydantic v1
-
-    # Patch al controller para que use nuestra dummy DB
-    response: JSONResponse = controller.create_user_bank_fund_controller(mock_user, data_dict)
-    
+@pytest.fixture
+def mock_subscription(monkeypatch, mock_db):
+    import app.schemas.users as users
+    from app.utils import catalog_cache
+
+    users.users_db.put_item({"id": "user123", "name": "Test User", "email": "test@example.com", "amount": Decimal("5000")})
+
+    async def get_bank_fund(id):
+        return {"id": id, "name": "Fund A", "min_amount": Decimal("1000"), "currency": "USD"} if id == "fund-1" else None
+
+    monkeypatch.setattr(catalog_cache, "get_bank_fund", get_bank_fund)
+    dynamo = MagicMock()
+    monkeypatch.setattr(controller, "dynamodb_client", dynamo)
+    emails = MagicMock()
+    monkeypatch.setattr(controller, "send_subscription_funds_email", emails.subscription)
+    monkeypatch.setattr(controller, "send_insufficient_funds_email", emails.insufficient)
+    return dynamo, emails
+
+
+async def test_create_user_bank_fund(mock_user, mock_subscription):
+    dynamo, emails = mock_subscription
+
+    response: JSONResponse = await controller.create_user_bank_fund_controller(mock_user, "fund-1")
+    body = json.loads(response.body.decode())
+
     assert response.status_code == 201
-    assert "User bank fund created successfully" in response.body.decode()
-    # Verificar que se guardó en dummy DB
-    assert any(item["name"] == "My Fund" for item in mock_db.items.values())
+    assert body["detail"] == "User bank funds created successfully"
+    assert body["data"]["bank_funds_id"] == "fund-1"
+    assert body["data"]["currency"] == "USD"
+
+    # Débito condicional, relación y auditoría en una sola llamada
+    dynamo.transact_write_items.assert_called_once()
+    debit, position, audit, stats = dynamo.transact_write_items.call_args.kwargs["TransactItems"]
+    assert debit["Update"]["UpdateExpression"] == "SET updated_at = :u ADD amount :neg, #pos :count, #inv0 :inv0"
+    assert debit["Update"]["ConditionExpression"] == "amount >= :min"
+    assert debit["Update"]["ExpressionAttributeValues"][":neg"] == {"N": "-1000"}
+    # Agregados del portafolio en la misma escritura
+    assert debit["Update"]["ExpressionAttributeNames"] == {"#pos": "open_positions", "#inv0": "invested_USD"}
+    assert debit["Update"]["ExpressionAttributeValues"][":inv0"] == {"N": "1000"}
+    assert position["Put"]["Item"]["id"]["S"] == body["data"]["id"]
+    assert audit["Put"]["Item"]["parent_id"]["S"] == body["data"]["id"]
+    # Llave de la historia: user_id + created_at#id
+    audit_item = audit["Put"]["Item"]
+    assert audit_item["sk"]["S"] == f"{audit_item['created_at']['S']}#{audit_item['id']['S']}"
+    # Contadores del fondo
+    assert stats["Update"]["Key"] == {"id": {"S": "fund-1"}}
+    assert stats["Update"]["UpdateExpression"] == "ADD #subs :subs, #aum :aum"
+    assert stats["Update"]["ExpressionAttributeValues"] == {":subs": {"N": "1"}, ":aum": {"N": "1000"}}
+    emails.subscription.assert_called_once()
+
+
+async def test_create_user_bank_fund_insufficient_balance_race(mock_user, mock_subscription):
+    dynamo, emails = mock_subscription
+    # El saldo leído alcanza, pero otra suscripción concurrente ya lo consumió
+    dynamo.transact_write_items.side_effect = ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "Transaction cancelled"},
+            "CancellationReasons": [{"Code": "ConditionalCheckFailed"}, {"Code": "None"}, {"Code": "None"}, {"Code": "None"}],
+        },
+        "TransactWriteItems",
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        await controller.create_user_bank_fund_controller(mock_user, "fund-1")
+
+    assert exc.value.status_code == 400
+    emails.insufficient.assert_called_once()
+    emails.subscription.assert_not_called()
+
 
+async def test_create_user_bank_fund_fund_not_found(mock_user, mock_subscription):
+    dynamo, _ = mock_subscription
+    with pytest.raises(HTTPException) as exc:
+        await controller.create_user_bank_fund_controller(mock_user, "missing")
+    assert exc.value.status_code == 404
+    dynamo.transact_write_items.assert_not_called()
 
-def test_get_user_bank_funds(mock_user, mock_db):
+
+async def test_get_user_bank_funds(mock_user, mock_db):
     mock_db.put_item({"id": "fund-1", "user_id": "user123", "name": "My Fund", "amount": Decimal("1000")})
-    response: JSONResponse = controller.get_user_bank_funds_controller(mock_user)
+    response: JSONResponse = await controller.get_user_bank_funds_controller(mock_user)
     body = response.body.decode()
     assert response.status_code == 200
     assert "My Fund" in body
 
-def test_delete_user_bank_fund(mock_user, mock_db):
-    mock_db.put_item({"id": "fund-1", "user_id": "user123", "name": "My Fund", "amount": Decimal("1000")})
-    response: JSONResponse = controller.delete_user_bank_fund_controller(mock_user, "fund-1")
+async def test_get_user_bank_funds_uses_user_index(mock_user, mock_db):
+    mock_db.put_item({"id": "ubf-1", "user_id": "user123", "created_at": "2025-01-01"})
+    mock_db.put_item({"id": "ubf-2", "user_id": "user123", "created_at": "2025-01-02"})
+    mock_db.put_item({"id": "ubf-3", "user_id": "other", "created_at": "2025-01-03"})
+    response: JSONResponse = await controller.get_user_bank_funds_controller(mock_user)
+    data = json.loads(response.body.decode())["data"]
+    assert [item["id"] for item in data] == ["ubf-2", "ubf-1"]
+    assert mock_db.last_query == {"IndexName": "user_id-created_at-index", "ScanIndexForward": False}
+
+async def test_get_user_bank_fund_by_id(mock_user, mock_db):
+    mock_db.put_item({"id": "ubf-1", "user_id": "user123", "created_at": "2025-01-01"})
+    mock_db.put_item({"id": "ubf-3", "user_id": "other", "created_at": "2025-01-03"})
+
+    response: JSONResponse = await controller.get_user_bank_funds_controller(mock_user, "ubf-1")
+    assert response.status_code == 200
+    assert json.loads(response.body.decode())["data"]["id"] == "ubf-1"
+
+    # La relación de otro usuario no se expone
+    with pytest.raises(HTTPException) as exc:
+        await controller.get_user_bank_funds_controller(mock_user, "ubf-3")
+    assert exc.value.status_code == 404
+
+@pytest.fixture
+def mock_cancellation(monkeypatch, mock_subscription, mock_db):
+    dynamo, emails = mock_subscription
+    monkeypatch.setattr(controller, "send_retired_funds_email", emails.retired)
+    mock_db.put_item({
+        "id": "ubf-1", "user_id": "user123", "bank_funds_id": "fund-1", "amount": Decimal("1500"),
+        "currency": "USD", "status": "OPEN", "created_at": "2025-01-01",
+    })
+    return dynamo, emails
+
+
+async def test_delete_user_bank_fund(mock_user, mock_db, mock_cancellation):
+    dynamo, emails = mock_cancellation
+
+    response: JSONResponse = await controller.delete_user_bank_fund_controller(mock_user, "ubf-1")
+    body = json.loads(response.body.decode())
+
     assert response.status_code == 200
-    assert "User bank fund deleted successfully" in response.body.decode()
-    assert "fund-1" not in mock_db.items
+    assert body["detail"] == "User bank funds deleted successfully"
+    assert body["data"]["status"] == "CLOSED"
+
+    # Reintegro, cierre condicional y auditoría en una sola transacción
+    dynamo.transact_write_items.assert_called_once()
+    refund, close, audit, stats = dynamo.transact_write_items.call_args.kwargs["TransactItems"]
+    assert refund["Update"]["UpdateExpression"] == "SET updated_at = :u ADD amount :refund, #inv :neg, #pos :minus_one"
+    # Se devuelve el monto de la posición, no el mínimo actual del fondo
+    assert refund["Update"]["ExpressionAttributeValues"][":refund"] == {"N": "1500"}
+    assert refund["Update"]["ExpressionAttributeValues"][":neg"] == {"N": "-1500"}
+    assert refund["Update"]["ExpressionAttributeNames"] == {"#inv": "invested_USD", "#pos": "open_positions"}
+    assert close["Update"]["ConditionExpression"] == "#s = :open"
+    assert audit["Put"]["Item"]["status"] == {"S": "CLOSED"}
+    assert audit["Put"]["Item"]["parent_id"] == {"S": "ubf-1"}
+    assert stats["Update"]["ExpressionAttributeValues"] == {":subs": {"N": "-1"}, ":aum": {"N": "-1500"}}
+    emails.retired.assert_called_once()
+    # El correo informa el mismo reintegro
+    assert emails.retired.call_args.kwargs["refund_amount"] == Decimal("1500")
+    assert emails.retired.call_args.kwargs["currency"] == "USD"
+
+
+async def test_delete_user_bank_fund_already_closed(mock_user, mock_db, mock_cancellation):
+    dynamo, emails = mock_cancellation
+    # Otra cancelación concurrente cerró la posición entre la lectura y la transacción
+    dynamo.transact_write_items.side_effect = ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "Transaction cancelled"},
+            "CancellationReasons": [{"Code": "None"}, {"Code": "ConditionalCheckFailed"}, {"Code": "None"}, {"Code": "None"}],
+        },
+        "TransactWriteItems",
+    )
+    with pytest.raises(HTTPException) as exc:
+        await controller.delete_user_bank_fund_controller(mock_user, "ubf-1")
+    assert exc.value.status_code == 400
+    emails.retired.assert_not_called()
+
+    # Cerrada en la lectura: no se intenta la transacción
+    dynamo.transact_write_items.reset_mock()
+    mock_db.items["ubf-1"]["status"] = "CLOSED"
+    with pytest.raises(HTTPException):
+        await controller.delete_user_bank_fund_controller(mock_user, "ubf-1")
+    dynamo.transact_write_items.assert_not_called()
+
+
+async def test_delete_user_bank_fund_other_user(mock_user, mock_db, mock_cancellation):
+    dynamo, _ = mock_cancellation
+    mock_db.items["ubf-1"]["user_id"] = "other"
+    with pytest.raises(HTTPException) as exc:
+        await controller.delete_user_bank_fund_controller(mock_user, "ubf-1")
+    assert exc.value.status_code == 404
+    dynamo.transact_write_items.assert_not_called()
+
+
+async def test_get_user_bank_funds_summary(mock_user, monkeypatch):
+    import app.schemas.users as users
+
+    class SummaryDB:
+        name = "Users"
+
+        def get_item(self, Key, **kwargs):
+            self.kwargs = kwargs
+            return {"Item": {
+                "amount": Decimal("3500"), "currency": "COP", "open_positions": Decimal("2"),
+                "invested_USD": Decimal("1000"), "invested_COP": Decimal("500.5"), "invested_EUR": Decimal("0"),
+            }}
+
+    db = SummaryDB()
+    monkeypatch.setattr(users, "users_db", db)
+
+    response: JSONResponse = await controller.get_user_bank_funds_summary_controller(mock_user)
+    body = json.loads(response.body.decode())
+
+    assert body["data"] == {
+        "available_balance": 3500,
+        "currency": "COP",
+        "open_positions": 2,
+        "invested": {"USD": 1000, "COP": 500.5},
+    }
+    # Una sola lectura por llave, solo de los agregados
+    assert "invested_USD" in db.kwargs["ExpressionAttributeNames"].values()
+
+
+@pytest.fixture
+def mock_bulk(monkeypatch, mock_subscription):
+    from app.utils import catalog_cache
+
+    dynamo, emails = mock_subscription
+    funds = {
+        f"fund-{i}": {"id": f"fund-{i}", "name": f"Fund {i}", "min_amount": Decimal("100"), "currency": "USD" if i % 2 else "COP"}
+        for i in range(1, 41)
+    }
+    batch_reads = []
+
+    async def get_bank_funds(ids):
+        batch_reads.append(list(ids))
+        return {id: dict(funds[id]) for id in ids if id in funds}
+
+    monkeypatch.setattr(catalog_cache, "get_bank_funds", get_bank_funds)
+    monkeypatch.setattr(controller, "send_bulk_subscription_email", emails.bulk)
+    monkeypatch.setattr(controller, "send_bulk_insufficient_funds_email", emails.bulk_insufficient)
+    return dynamo, emails, batch_reads
+
+
+async def test_create_user_bank_funds_bulk(mock_user, mock_bulk):
+    dynamo, emails, batch_reads = mock_bulk
+
+    response: JSONResponse = await controller.create_user_bank_funds_bulk_controller(mock_user, ["fund-1", "fund-2", "fund-1"])
+    body = json.loads(response.body.decode())
+
+    assert response.status_code == 201
+    assert [item["bank_funds_id"] for item in body["data"]] == ["fund-1", "fund-2"]
+    # Fondos en una sola lectura en bloque (sin repetidos)
+    assert batch_reads == [["fund-1", "fund-2"]]
+
+    # Un débito por el total con los agregados por moneda, y 3 operaciones por posición
+    dynamo.transact_write_items.assert_called_once()
+    items = dynamo.transact_write_items.call_args.kwargs["TransactItems"]
+    assert len(items) == 1 + 3 * 2
+    debit = items[0]["Update"]
+    assert debit["ExpressionAttributeValues"][":min"] == {"N": "200"}
+    assert debit["ExpressionAttributeValues"][":count"] == {"N": "2"}
+    assert sorted(debit["ExpressionAttributeNames"].values()) == ["invested_COP", "invested_USD", "open_positions"]
+    emails.bulk.assert_called_once()
+    emails.subscription.assert_not_called()
+
+
+async def test_create_user_bank_funds_bulk_single_transaction(mock_user, mock_bulk):
+    dynamo, emails, _ = mock_bulk
+
+    ids = [f"fund-{i}" for i in range(1, 34)]
+    body = json.loads((await controller.create_user_bank_funds_bulk_controller(mock_user, ids)).body.decode())
+
+    assert len(body["data"]) == 33
+    # Todos los fondos en una transacción, dentro del límite de 100 operaciones
+    dynamo.transact_write_items.assert_called_once()
+    assert len(dynamo.transact_write_items.call_args.kwargs["TransactItems"]) == 1 + 3 * 33 <= 100
+    emails.bulk.assert_called_once()
+
+    with pytest.raises(HTTPException) as exc:
+        await controller.create_user_bank_funds_bulk_controller(mock_user, [f"fund-{i}" for i in range(1, 35)])
+    assert exc.value.status_code == 400
+    dynamo.transact_write_items.assert_called_once()
+
+
+async def test_create_user_bank_funds_bulk_balance_race(mock_user, mock_bulk):
+    dynamo, emails, _ = mock_bulk
+    # Un débito concurrente consumió el saldo: la transacción no escribe nada
+    dynamo.transact_write_items.side_effect = ClientError(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "Transaction cancelled"},
+            "CancellationReasons": [{"Code": "ConditionalCheckFailed"}],
+        },
+        "TransactWriteItems",
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        await controller.create_user_bank_funds_bulk_controller(mock_user, ["fund-1", "fund-2"])
+    assert exc.value.status_code == 400
+    emails.bulk.assert_not_called()
+    emails.bulk_insufficient.assert_called_once()
+
+
+async def test_create_user_bank_funds_bulk_insufficient_and_missing(mock_user, mock_bulk):
+    import app.schemas.users as users
+
+    dynamo, emails, _ = mock_bulk
+    users.users_db.put_item({"id": "user123", "name": "Test User", "email": "test@example.com", "amount": Decimal("150")})
+
+    # El mínimo total (200) supera el saldo: ninguna escritura y un solo correo
+    with pytest.raises(HTTPException) as exc:
+        await controller.create_user_bank_funds_bulk_controller(mock_user, ["fund-1", "fund-2"])
+    assert exc.value.status_code == 400
+    emails.bulk_insufficient.assert_called_once()
+    dynamo.transact_write_items.assert_not_called()
+
+    with pytest.raises(HTTPException) as exc:
+        await controller.create_user_bank_funds_bulk_controller(mock_user, ["fund-1", "missing"])
+    assert exc.value.status_code == 404
+    assert "missing" in exc.value.detail
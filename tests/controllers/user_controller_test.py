@@ -1,4 +1,5 @@
 # tests/test_users_controller.py
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 from fastapi import HTTPException, status
@@ -17,30 +18,50 @@ def mock_scan():
     with patch("app.schemas.users.users_db.scan") as mock_scan_func:
         yield mock_scan_func
 
-def test_get_all_users_no_session(mock_scan):
+@pytest.fixture
+def mock_get_item():
+    with patch("app.schemas.users.users_db.get_item") as mock_get_item_func:
+        yield mock_get_item_func
+
+async def test_get_all_users_no_session(mock_scan):
     # Escenario: sin sesión, devuelve todos los usuarios
     mock_scan.return_value = {"Items": mock_users}
-    response = get_all_users_controller()
+    response = await get_all_users_controller()
     assert response.status_code == status.HTTP_200_OK
     assert response.body
     data = response.body.decode()
     assert "Alice" in data and "Bob" in data
 
-def test_get_all_users_with_valid_session(mock_scan):
+async def test_get_all_users_paginated(mock_scan):
+    # Escenario: el scan devuelve LastEvaluatedKey -> se expone next_cursor
+    mock_scan.return_value = {"Items": mock_users[:1], "LastEvaluatedKey": {"id": "user1"}}
+    response = await get_all_users_controller(limit=1)
+    body = json.loads(response.body.decode())
+    assert mock_scan.call_args.kwargs["Limit"] == 1
+    assert body["next_cursor"]
+
+    mock_scan.return_value = {"Items": mock_users[1:]}
+    response = await get_all_users_controller(limit=1, cursor=body["next_cursor"])
+    body = json.loads(response.body.decode())
+    assert mock_scan.call_args.kwargs["ExclusiveStartKey"] == {"id": "user1"}
+    assert body["next_cursor"] is None
+
+async def test_get_all_users_with_valid_session(mock_scan, mock_get_item):
     # Escenario: con sesión válida, devuelve solo ese usuario
-    mock_scan.return_value = {"Items": mock_users}
-    session = SessionUserModel(user_id="user1")
-    response = get_all_users_controller(user_session=session)
+    mock_get_item.return_value = {"Item": mock_users[0]}
+    session = SessionUserModel(user_id="user1", role="USER")
+    response = await get_all_users_controller(user_session=session)
     assert response.status_code == status.HTTP_200_OK
     data = response.body.decode()
     assert "Alice" in data
     assert "Bob" not in data
+    mock_scan.assert_not_called()
 
-def test_get_all_users_with_invalid_session(mock_scan):
+async def test_get_all_users_with_invalid_session(mock_get_item):
     # Escenario: sesión no existente -> lanza HTTPException
-    mock_scan.return_value = {"Items": mock_users}
-    session = SessionUserModel(user_id="user3")
+    mock_get_item.return_value = {}
+    session = SessionUserModel(user_id="user3", role="USER")
     with pytest.raises(HTTPException) as exc:
-        get_all_users_controller(user_session=session)
+        await get_all_users_controller(user_session=session)
     assert exc.value.status_code == 404
     assert exc.value.detail == "User not found"
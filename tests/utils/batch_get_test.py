@@ -0,0 +1,47 @@
+import pytest
+from fastapi import HTTPException
+
+from app.config import Config
+from app.utils import batch_get
+from app.utils.dynamo_types import serialize
+
+
+class ThrottledDynamoClient:
+    """batch_get_item falso que deja sin leer la primera llave durante `rounds` llamadas"""
+
+    def __init__(self, rounds: int):
+        self.calls = 0
+        self.rounds = rounds
+
+    def batch_get_item(self, RequestItems):
+        self.calls += 1
+        (table_name, request), = RequestItems.items()
+        keys = request["Keys"]
+        unprocessed = keys[:1] if self.calls <= self.rounds else []
+        response = {"Responses": {table_name: [serialize({"id": key["id"]["S"]}) for key in keys[len(unprocessed):]]}}
+        if unprocessed:
+            response["UnprocessedKeys"] = {table_name: {"Keys": unprocessed}}
+        return response
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(Config, "BATCH_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(Config, "BATCH_MAX_RETRIES", 2)
+
+
+async def test_unprocessed_keys_are_retried():
+    client = ThrottledDynamoClient(rounds=2)
+    found = await batch_get.batch_get_items("BankFunds", ["f1", "f2", "f3"], client=client)
+
+    assert sorted(found) == ["f1", "f2", "f3"]
+    assert client.calls == 3
+
+
+async def test_gives_up_after_max_retries():
+    client = ThrottledDynamoClient(rounds=100)
+    with pytest.raises(HTTPException) as e:
+        await batch_get.batch_get_items("BankFunds", ["f1", "f2"], client=client)
+
+    assert e.value.status_code == 503
+    assert client.calls == 3
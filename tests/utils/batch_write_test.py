@@ -0,0 +1,106 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from app.config import Config
+from app.utils import batch_write
+from app.utils.dynamo_types import deserialize
+
+
+class DummyDynamoClient:
+    """batch_write_item falso que deja sin procesar los primeros `unprocessed` items de cada llamada"""
+
+    def __init__(self, unprocessed=0, rounds=1):
+        self.items = {}
+        self.calls = []
+        self.unprocessed = unprocessed
+        self.rounds = rounds
+
+    def batch_write_item(self, RequestItems):
+        (table_name, requests), = RequestItems.items()
+        self.calls.append(len(requests))
+        skipped = requests[:self.unprocessed] if len(self.calls) <= self.rounds else []
+        for request in requests[len(skipped):]:
+            item = deserialize(request["PutRequest"]["Item"])
+            self.items[item["id"]] = item
+        return {"UnprocessedItems": {table_name: skipped} if skipped else {}}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(Config, "BATCH_BACKOFF_SECONDS", 0)
+
+
+async def test_writes_in_chunks_of_25():
+    client = DummyDynamoClient()
+    failed = await batch_write.batch_write_items("BankFunds", [{"id": f"f{i}", "name": "F"} for i in range(60)], client=client)
+
+    assert failed == []
+    assert client.calls == [25, 25, 10]
+    assert len(client.items) == 60
+
+
+async def test_unprocessed_items_are_retried():
+    client = DummyDynamoClient(unprocessed=5, rounds=2)
+    failed = await batch_write.batch_write_items("BankFunds", [{"id": f"f{i}"} for i in range(10)], client=client)
+
+    assert failed == []
+    # 10, luego los 5 sin procesar (otra vez sin procesar) y el último reintento
+    assert client.calls == [10, 5, 5]
+    assert len(client.items) == 10
+
+
+async def test_returns_ids_left_after_retries(monkeypatch):
+    monkeypatch.setattr(Config, "BATCH_MAX_RETRIES", 2)
+    client = DummyDynamoClient(unprocessed=3, rounds=100)
+    failed = await batch_write.batch_write_items("BankFunds", [{"id": f"f{i}"} for i in range(10)], client=client)
+
+    assert failed == ["f0", "f1", "f2"]
+    assert client.calls == [10, 3, 3]
+    assert len(client.items) == 7
+
+
+async def test_client_error_fails_only_that_chunk():
+    client = DummyDynamoClient()
+    write = client.batch_write_item
+
+    def batch_write_item(RequestItems):
+        if len(client.calls) == 1:
+            client.calls.append(0)
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "Throttled"}}, "BatchWriteItem")
+        return write(RequestItems)
+
+    client.batch_write_item = batch_write_item
+    failed = await batch_write.batch_write_items("BankFunds", [{"id": f"f{i}"} for i in range(60)], client=client)
+
+    # El segundo bloque falla completo; el primero y el tercero quedan escritos
+    assert failed == [f"f{i}" for i in range(25, 50)]
+    assert len(client.items) == 35
+
+
+class ConditionalPutClient:
+    """put_item falso: respeta attribute_not_exists(id) y falla con throttling para los ids de `throttled`"""
+
+    def __init__(self, items=(), throttled=()):
+        self.items = {item_id: {"id": item_id} for item_id in items}
+        self.throttled = set(throttled)
+
+    def put_item(self, TableName, Item, ConditionExpression):
+        item = deserialize(Item)
+        if item["id"] in self.throttled:
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "Throttled"}}, "PutItem")
+        if item["id"] in self.items:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "Exists"}}, "PutItem")
+        self.items[item["id"]] = item
+        return {}
+
+
+async def test_put_items_if_absent_does_not_replace():
+    client = ConditionalPutClient(items=["f1"], throttled=["f2"])
+    existing, failed = await batch_write.put_items_if_absent(
+        "BankFunds", [{"id": "f0", "name": "A"}, {"id": "f1", "name": "B"}, {"id": "f2", "name": "C"}], client=client
+    )
+
+    assert existing == ["f1"]
+    assert failed == ["f2"]
+    assert client.items["f0"]["name"] == "A"
+    assert client.items["f1"] == {"id": "f1"}
@@ -0,0 +1,32 @@
+from unittest.mock import patch
+
+from app.utils.cache import TTLCache
+
+
+def test_cache_hit_and_miss():
+    cache = TTLCache("test", maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.stats()["hit_ratio"] == 0.5
+
+
+def test_cache_expires_entries():
+    cache = TTLCache("test", maxsize=10, ttl=5)
+    with patch("app.utils.cache.time.monotonic", return_value=100):
+        cache.set("a", 1)
+    with patch("app.utils.cache.time.monotonic", return_value=106):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache("test", maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
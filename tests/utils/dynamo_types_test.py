@@ -0,0 +1,51 @@
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from app.schemas.bank_funds import BankFundsSchema
+from app.schemas.category import CategorySchema
+from app.schemas.user_bank_funds import UserBankFundsSchema
+from app.schemas.user_bank_funds_audit import UserBankFundsAuditSchema
+from app.utils.dynamo_types import deserialize, deserialize_items, serialize
+
+
+RAW_ITEM = {
+    "id": {"S": "f1"},
+    "min_amount": {"N": "75000.50"},
+    "active": {"BOOL": True},
+    "deleted_at": {"NULL": True},
+    "category": {"M": {"name": {"S": "FPV"}, "order": {"N": "1"}}},
+    "tags": {"L": [{"S": "a"}, {"N": "2"}]},
+    "codes": {"SS": ["x", "y"]},
+}
+
+
+def test_deserialize_matches_type_deserializer():
+    deserializer = TypeDeserializer()
+    expected = {k: deserializer.deserialize(v) for k, v in RAW_ITEM.items()}
+    assert deserialize(RAW_ITEM) == expected
+    assert deserialize_items([RAW_ITEM, RAW_ITEM]) == [expected, expected]
+
+
+def test_schemas_are_slotted_with_a_single_timestamp():
+    category = CategorySchema("u1", "FPV", None)
+    assert not hasattr(category, "__dict__")
+    assert category.description == ""
+    assert category.created_at == category.updated_at
+
+    audit = UserBankFundsAuditSchema(parent=UserBankFundsSchema("u1", "f1", Decimal("10"), currency="USD"))
+    assert audit.created_at == audit.updated_at
+    assert audit.to_dict()["currency"] == "USD"
+
+
+def test_bulk_mapper_round_trip():
+    funds = [BankFundsSchema(f"Fund {i}", "c1", 1000 + i, user_created="u1") for i in range(3)]
+    raw_items = BankFundsSchema.to_raw_items(funds)
+    assert raw_items[0]["min_amount"] == {"N": "1000"}
+    assert raw_items[0]["currency"] == {"S": "COP"}
+
+    mapped = BankFundsSchema.from_raw_items(raw_items)
+    assert [fund.id for fund in mapped] == [fund.id for fund in funds]
+    assert mapped[2].min_amount == Decimal("1002")
+    assert mapped[0].to_dict() == {k: getattr(v, "value", v) for k, v in funds[0].to_dict().items()}
+    assert serialize(mapped[1].to_dict()) == raw_items[1]
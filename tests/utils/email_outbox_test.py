@@ -0,0 +1,175 @@
+import json
+import smtplib
+import time
+
+from app.utils.email_outbox import EmailOutbox, LocalSMTPServer
+
+
+def make_outbox(tmp_path, server, **kwargs):
+    return EmailOutbox(
+        smtp_factory=server,
+        retry_backoff=0,
+        dead_letter_file=str(tmp_path / "dead_letter.jsonl"),
+        **kwargs,
+    )
+
+
+def test_outbox_reuses_connection(tmp_path):
+    server = LocalSMTPServer()
+    outbox = make_outbox(tmp_path, server, batch_size=2)
+
+    for i in range(5):
+        assert outbox.enqueue(f"user{i}@example.com", "Asunto", {"Html": "Hola"})
+    assert outbox.flush(timeout=5)
+
+    assert [msg["To"] for msg in server.messages] == [f"user{i}@example.com" for i in range(5)]
+    assert (server.connections, server.logins) == (1, 1)
+    stats = outbox.stats()
+    assert stats["sent"] == 5
+    assert stats["queue_depth"] == 0
+
+
+def test_outbox_retries_after_disconnect(tmp_path):
+    server = LocalSMTPServer()
+    server.fail_next = 1
+    outbox = make_outbox(tmp_path, server, max_retries=2)
+
+    outbox.enqueue("user@example.com", "Asunto", {"Text": "Hola"})
+    assert outbox.flush(timeout=5)
+
+    assert len(server.messages) == 1
+    assert server.connections == 2
+    assert outbox.stats()["retries"] == 1
+
+
+def test_outbox_dead_letters_after_max_retries(tmp_path):
+    server = LocalSMTPServer()
+    server.fail_next = 3
+    outbox = make_outbox(tmp_path, server, max_retries=2)
+
+    outbox.enqueue("user@example.com", "Asunto", {"Text": "Hola"})
+    assert outbox.flush(timeout=5)
+
+    assert server.messages == []
+    records = [json.loads(line) for line in (tmp_path / "dead_letter.jsonl").read_text().splitlines()]
+    assert records[0]["recipient"] == "user@example.com"
+    assert records[0]["attempts"] == 3
+    assert outbox.stats()["dead_lettered"] == 1
+
+
+def test_outbox_full_queue_goes_to_dead_letter(tmp_path):
+    server = LocalSMTPServer()
+    outbox = make_outbox(tmp_path, server, maxsize=1)
+    outbox._ensure_worker = lambda: None  # sin hilo de envío la cola no se vacía
+
+    assert outbox.enqueue("a@example.com", "Asunto", {"Text": "1"})
+    assert not outbox.enqueue("b@example.com", "Asunto", {"Text": "2"})
+    assert outbox.stats()["dead_lettered"] == 1
+
+
+class DummySQS:
+    """send_message_batch falso que rechaza los Id indicados"""
+
+    def __init__(self, reject=()):
+        self.batches = []
+        self.reject = set(reject)
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.batches.append([json.loads(entry["MessageBody"]) for entry in Entries])
+        return {"Failed": [{"Id": entry["Id"], "Code": "InternalError"} for entry in Entries if entry["Id"] in self.reject]}
+
+
+def test_outbox_hands_off_to_sqs_without_worker(tmp_path):
+    server = LocalSMTPServer()
+    outbox = make_outbox(tmp_path, server, background=False)
+    for i in range(12):
+        outbox.enqueue(f"user{i}@example.com", "Asunto", {"Text": "Hola"})
+
+    # Sin hilo nada se envía por SMTP; la cola pasa a SQS en lotes de 10
+    sqs = DummySQS(reject={"5"})
+    assert outbox.hand_off("https://sqs/emails", sqs) == 12
+    assert [len(batch) for batch in sqs.batches] == [10, 2]
+    assert sqs.batches[0][0]["recipient"] == "user0@example.com"
+    # El rechazado se entrega por SMTP como respaldo
+    assert [msg["To"] for msg in server.messages] == ["user5@example.com"]
+    assert outbox.stats()["handed_off"] == 11
+    assert outbox.stats()["queue_depth"] == 0
+    assert outbox.flush(timeout=0)
+
+
+def test_mailer_reports_failed_records(tmp_path, monkeypatch):
+    from app import handler
+
+    server = LocalSMTPServer()
+    monkeypatch.setattr(handler, "outbox", make_outbox(tmp_path, server, max_retries=0, background=False))
+    server.fail_next = 1
+    records = [
+        {"messageId": f"m{i}", "body": json.dumps({"recipient": f"user{i}@example.com", "subject": "Asunto", "body": {"Text": "Hola"}})}
+        for i in range(3)
+    ]
+
+    result = handler.mailer({"Records": records}, None)
+
+    # El fallido vuelve a SQS (reintento y dead-letter queue), no al archivo local
+    assert result == {"batchItemFailures": [{"itemIdentifier": "m0"}]}
+    assert [msg["To"] for msg in server.messages] == ["user1@example.com", "user2@example.com"]
+    assert not (tmp_path / "dead_letter.jsonl").exists()
+
+
+class FailingSMTP:
+    """smtp_factory que tarda `delay` segundos en cada conexión y luego falla"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.connections = 0
+
+    def __call__(self, host=None, port=None, timeout=None):
+        self.connections += 1
+        time.sleep(self.delay)
+        raise smtplib.SMTPConnectError(421, "Service not available")
+
+
+class LambdaContext:
+    """Contexto de Lambda con `budget` segundos desde su creación"""
+
+    def __init__(self, budget: float):
+        self.deadline = time.monotonic() + budget
+
+    def get_remaining_time_in_millis(self):
+        return int((self.deadline - time.monotonic()) * 1000)
+
+
+def sqs_records(count):
+    return [
+        {"messageId": f"m{i}", "body": json.dumps({"recipient": f"user{i}@example.com", "subject": "Asunto", "body": {"Text": "Hola"}})}
+        for i in range(count)
+    ]
+
+
+def test_mailer_does_not_retry_in_process(tmp_path, monkeypatch):
+    from app import handler
+
+    smtp = FailingSMTP()
+    outbox = make_outbox(tmp_path, smtp, max_retries=3, background=False)
+    monkeypatch.setattr(handler, "outbox", outbox)
+
+    result = handler.mailer({"Records": sqs_records(3)}, LambdaContext(60))
+
+    # Un intento por mensaje: los reintentos quedan a cargo de SQS
+    assert result == {"batchItemFailures": [{"itemIdentifier": f"m{i}"} for i in range(3)]}
+    assert smtp.connections == 3
+    assert outbox.retries == 0
+
+
+def test_mailer_stops_before_the_invocation_times_out(tmp_path, monkeypatch):
+    from app import handler
+
+    smtp = FailingSMTP(delay=0.2)
+    monkeypatch.setattr(handler, "outbox", make_outbox(tmp_path, smtp, background=False))
+    monkeypatch.setattr(handler.Config, "EMAIL_MAILER_RESERVE_SECONDS", 0.5)
+
+    # El SMTP lento se come el tiempo: tras dos envíos ya no alcanza para otro
+    result = handler.mailer({"Records": sqs_records(10)}, LambdaContext(0.85))
+
+    assert smtp.connections == 2
+    assert result == {"batchItemFailures": [{"itemIdentifier": f"m{i}"} for i in range(10)]}
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import Config
+from app.utils.export import date_range_key_condition, upload_export
+
+
+def test_date_range_key_condition_date_only_includes_whole_day():
+    condition, values = date_range_key_condition("2025-01-01", "2025-01-31")
+    assert condition == "sk BETWEEN :date_from AND :date_to"
+    assert values[":date_from"].startswith("2025-01-01T00:00:00")
+    # El inicio del día siguiente: ninguna llave "2025-02-01T00:00:00...#id" queda dentro
+    assert values[":date_to"].startswith("2025-02-01T00:00:00")
+    assert f"{values[':date_to']}#a1" > values[":date_to"]
+
+
+def test_date_range_key_condition_datetime_is_inclusive_and_uses_app_time_zone():
+    condition, values = date_range_key_condition(date_to="2025-01-31T12:30:00+00:00")
+    assert condition == "sk <= :date_to"
+    bound, suffix = values[":date_to"][:-1], values[":date_to"][-1]
+    assert datetime.fromisoformat(bound) == datetime(2025, 1, 31, 12, 30, tzinfo=timezone.utc)
+    assert datetime.fromisoformat(bound).utcoffset() == datetime.fromisoformat(bound).astimezone(Config.TIME_ZONE).utcoffset()
+    # Los registros creados exactamente en el límite quedan incluidos
+    assert f"{bound}#a1" <= values[":date_to"]
+
+
+def test_date_range_key_condition_without_bounds_and_inverted_range():
+    assert date_range_key_condition() == (None, {})
+    assert date_range_key_condition("2025-01-01")[0] == "sk >= :date_from"
+    with pytest.raises(HTTPException):
+        date_range_key_condition("2025-02-01", "2025-01-01")
+
+
+class DummyS3:
+    def __init__(self):
+        self.calls = []
+        self.parts = []
+
+    def create_multipart_upload(self, **kwargs):
+        self.calls.append("create")
+        return {"UploadId": "u1"}
+
+    def upload_part(self, PartNumber, Body, **kwargs):
+        self.calls.append("part")
+        self.parts.append((PartNumber, Body))
+        return {"ETag": f"e{PartNumber}"}
+
+    def complete_multipart_upload(self, MultipartUpload, **kwargs):
+        self.calls.append("complete")
+        self.completed = MultipartUpload["Parts"]
+
+
+async def test_upload_export_splits_chunks_into_parts(monkeypatch):
+    monkeypatch.setattr(Config, "EXPORT_PART_SIZE", 10)
+
+    async def chunks():
+        for chunk in (b"abcd", b"efgh", b"ijkl", b"mnop", b"q"):
+            yield chunk
+
+    s3 = DummyS3()
+    await upload_export(chunks(), "bucket", "key", "application/x-ndjson", s3)
+
+    # Las partes se cortan al llegar al tamaño mínimo; la última puede ser más chica
+    assert s3.parts == [(1, b"abcdefghijkl"), (2, b"mnopq")]
+    assert s3.completed == [{"ETag": "e1", "PartNumber": 1}, {"ETag": "e2", "PartNumber": 2}]
+    assert s3.calls == ["create", "part", "part", "complete"]
@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException, status
+
+from app.utils.fieldsets import parse_expand, parse_fields, projection, select
+
+
+def test_parse_fields():
+    assert parse_fields(None, ("id", "name")) is None
+    assert parse_fields("name, name,id", ("id", "name")) == ("name", "id")
+
+
+def test_parse_fields_unknown():
+    with pytest.raises(HTTPException) as exc:
+        parse_fields("name,password", ("id", "name"))
+    assert exc.value.status_code == status.HTTP_400_BAD_REQUEST
+    assert "password" in exc.value.detail
+
+
+def test_parse_expand():
+    assert parse_expand(None, ("category",)) == frozenset()
+    assert parse_expand("category", ("category",)) == {"category"}
+    with pytest.raises(HTTPException):
+        parse_expand("owner", ("category",))
+
+
+def test_projection_uses_aliases_and_required_keys():
+    assert projection(None) == {}
+    assert projection(("name", "status")) == {
+        "ProjectionExpression": "#p0, #p1, #p2",
+        "ExpressionAttributeNames": {"#p0": "id", "#p1": "name", "#p2": "status"},
+    }
+
+
+def test_select_keeps_id_and_fields():
+    items = [{"id": "1", "name": "Fund", "created_at": "2025-01-01"}]
+    assert select(items, ("name",)) == [{"id": "1", "name": "Fund"}]
+    assert select(items, None) is items
@@ -0,0 +1,144 @@
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+
+from app.utils import idempotency
+from app.utils.dynamo_types import serialize
+from app.utils.responses import ORJSONResponse
+
+
+class DummyIdempotencyDB:
+    """Tabla falsa con la condición del put de `_acquire` (existe, vigente y no colgado)"""
+
+    def __init__(self, return_old=True):
+        self.items = {}
+        self.return_old = return_old
+        self.gets = 0
+
+    def put_item(self, Item, ExpressionAttributeValues, **kwargs):
+        now = ExpressionAttributeValues[":now"]
+        old = self.items.get(Item["id"])
+        if old and old["expires_at"] >= now and not (old["state"] == "IN_PROGRESS" and old["locked_until"] < now):
+            response = {"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}}
+            if self.return_old:
+                response["Item"] = serialize(old)
+            raise ClientError(response, "PutItem")
+        self.items[Item["id"]] = dict(Item)
+
+    def get_item(self, Key, ConsistentRead=False):
+        self.gets += 1
+        return {"Item": self.items[Key["id"]]} if Key["id"] in self.items else {}
+
+    def update_item(self, Key, ExpressionAttributeValues, **kwargs):
+        item = self.items[Key["id"]]
+        item.pop("locked_until", None)
+        item.update(
+            state=ExpressionAttributeValues[":completed"],
+            status_code=ExpressionAttributeValues[":code"],
+            body=ExpressionAttributeValues[":body"],
+            media_type=ExpressionAttributeValues[":media"],
+        )
+
+    def delete_item(self, Key):
+        self.items.pop(Key["id"], None)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    dummy = DummyIdempotencyDB()
+    monkeypatch.setattr(idempotency.idempotencyKeys, "idempotency_keys_db", dummy)
+    return dummy
+
+
+class Operation:
+    """Operación contada: cada ejecución representa las escrituras y el correo"""
+
+    def __init__(self, error: HTTPException = None):
+        self.runs = 0
+        self.error = error
+
+    async def __call__(self):
+        self.runs += 1
+        if self.error:
+            raise self.error
+        return ORJSONResponse(content={"detail": "created", "data": {"run": self.runs}}, status_code=201)
+
+
+async def test_replay_returns_stored_response_without_running_again(db):
+    operation = Operation()
+    first = await idempotency.idempotent("key-1", "user-1", "POST /user-bank-funds/fund-1", operation)
+    replay = await idempotency.idempotent("key-1", "user-1", "POST /user-bank-funds/fund-1", operation)
+
+    assert operation.runs == 1
+    assert replay.status_code == first.status_code == 201
+    assert replay.body == first.body
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    # El registro anterior llega en el error del put condicional: sin lectura extra
+    assert db.gets == 0
+
+
+async def test_replay_reads_record_when_put_does_not_return_it(db):
+    db.return_old = False
+    operation = Operation()
+    await idempotency.idempotent("key-1", "user-1", "POST /x", operation)
+    replay = await idempotency.idempotent("key-1", "user-1", "POST /x", operation)
+
+    assert operation.runs == 1
+    assert json.loads(replay.body)["data"] == {"run": 1}
+    assert db.gets == 1
+
+
+async def test_client_errors_are_stored_and_server_errors_release_the_key(db):
+    operation = Operation(HTTPException(status_code=400, detail="No tiene saldo disponible"))
+    with pytest.raises(HTTPException):
+        await idempotency.idempotent("key-1", "user-1", "POST /x", operation)
+    replay = await idempotency.idempotent("key-1", "user-1", "POST /x", operation)
+    assert operation.runs == 1
+    assert replay.status_code == 400
+    assert json.loads(replay.body) == {"detail": "No tiene saldo disponible"}
+
+    failing = Operation(RuntimeError("DynamoDB unavailable"))
+    with pytest.raises(RuntimeError):
+        await idempotency.idempotent("key-2", "user-1", "POST /x", failing)
+    # La llave queda libre para reintentar
+    assert "user-1#key-2" not in db.items
+
+
+async def test_key_conflicts(db):
+    operation = Operation()
+    await idempotency.idempotent("key-1", "user-1", "POST /user-bank-funds/fund-1", operation)
+
+    # La misma llave en otro request
+    with pytest.raises(HTTPException) as e:
+        await idempotency.idempotent("key-1", "user-1", "DELETE /user-bank-funds/ubf-1", operation)
+    assert e.value.status_code == 422
+
+    # Un request con la misma llave todavía en curso
+    db.items["user-1#key-2"] = {"id": "user-1#key-2", "state": "IN_PROGRESS", "scope": "POST /x", "locked_until": 2**40, "expires_at": 2**40}
+    with pytest.raises(HTTPException) as e:
+        await idempotency.idempotent("key-2", "user-1", "POST /x", operation)
+    assert e.value.status_code == 409
+
+    # Las llaves son por usuario
+    await idempotency.idempotent("key-1", "user-2", "POST /user-bank-funds/fund-1", operation)
+    assert operation.runs == 2
+
+
+async def test_stale_lock_and_expired_record_are_taken_over(db):
+    operation = Operation()
+    db.items["user-1#key-1"] = {"id": "user-1#key-1", "state": "IN_PROGRESS", "scope": "POST /x", "locked_until": 0, "expires_at": 2**40}
+    db.items["user-1#key-2"] = {"id": "user-1#key-2", "state": "COMPLETED", "scope": "POST /x", "expires_at": 0, "status_code": 201, "body": "{}"}
+
+    await idempotency.idempotent("key-1", "user-1", "POST /x", operation)
+    await idempotency.idempotent("key-2", "user-1", "POST /x", operation)
+    assert operation.runs == 2
+
+
+async def test_without_key_runs_directly(db):
+    operation = Operation()
+    await idempotency.idempotent(None, "user-1", "POST /x", operation)
+    await idempotency.idempotent(None, "user-1", "POST /x", operation)
+    assert operation.runs == 2
+    assert db.items == {}
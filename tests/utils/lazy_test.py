@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock, patch
+
+from app.utils.lazy import LazyProxy, LazyResource, lazy_import
+
+
+def test_proxy_builds_once_on_first_use():
+    factory = MagicMock(return_value=MagicMock(value=1))
+    proxy = LazyProxy(factory)
+
+    assert not proxy.initialized
+    factory.assert_not_called()
+    assert proxy.value == 1
+    assert proxy.value == 1
+    factory.assert_called_once()
+    assert proxy.initialized
+
+
+def test_table_name_does_not_build_resource():
+    resource = MagicMock()
+    lazy_resource = LazyResource(lambda: resource)
+    table = lazy_resource.Table("Users")
+
+    assert table.name == "Users"
+    assert not lazy_resource.initialized
+
+    table.get_item(Key={"id": "1"})
+    resource.Table.assert_called_once_with("Users")
+    resource.Table.return_value.get_item.assert_called_once_with(Key={"id": "1"})
+
+
+def test_patched_attributes_take_precedence():
+    instance = MagicMock()
+    proxy = LazyProxy(lambda: instance)
+
+    with patch.object(proxy, "scan") as scan:
+        proxy.scan()
+        scan.assert_called_once()
+    instance.scan.assert_not_called()
+
+    proxy.scan()
+    instance.scan.assert_called_once()
+
+
+def test_lazy_import_defers_module_import():
+    with patch("app.utils.lazy.importlib.import_module") as import_module:
+        module = lazy_import("boto3.dynamodb.conditions")
+        import_module.assert_not_called()
+
+        module.Key("user_id")
+        import_module.assert_called_once_with("boto3.dynamodb.conditions")
+        import_module.return_value.Key.assert_called_once_with("user_id")
@@ -0,0 +1,64 @@
+import httpx
+from fastapi import FastAPI
+
+from app.utils import metrics
+from app.utils.metrics import Histogram, MetricsMiddleware, emf_record, render_prometheus
+from app.utils.request_tracing import RequestCalls
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "test", labels=("route",), buckets=(0.1, 1.0))
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 3.0)
+
+    lines = histogram.render()
+    assert 'latency_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_count{route="/a"} 3' in lines
+
+
+async def test_middleware_uses_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, mode="prometheus")
+
+    @app.get("/items/{id}")
+    async def get_item(id: str):
+        return {"id": id}
+
+    before = metrics.request_latency.count(("/items/{id}", "GET", "200"))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/missing")
+
+    assert metrics.request_latency.count(("/items/{id}", "GET", "200")) == before + 2
+    assert metrics.request_latency.count(("unmatched", "GET", "404")) >= 1
+    assert metrics.requests_in_flight.value(("GET",)) == 0
+
+
+def test_render_prometheus_includes_cache_and_backend_metrics():
+    calls = RequestCalls()
+    calls.record("dynamodb", "GetItem", 0.01, 0.5)
+    metrics.record_request("/api/bank-funds/", "GET", 200, 0.02, calls)
+
+    text = render_prometheus()
+    assert 'backend_calls_total{service="dynamodb",operation="GetItem"}' in text
+    assert 'dynamodb_consumed_capacity_total{operation="GetItem"}' in text
+    assert 'cache_hit_ratio{cache="bank_funds"}' in text
+    assert "email_outbox_queue_depth" in text
+
+
+def test_emf_record():
+    calls = RequestCalls()
+    calls.record("dynamodb", "Query", 0.01, 2.0)
+    record = emf_record("/api/user-bank-funds/", "GET", 200, 0.0125, calls)
+
+    definition = record["_aws"]["CloudWatchMetrics"][0]
+    assert {"Name": "Latency", "Unit": "Milliseconds"} in definition["Metrics"]
+    assert ["Route", "Method"] in definition["Dimensions"]
+    assert record["Route"] == "/api/user-bank-funds/"
+    assert record["Latency"] == 12.5
+    assert record["DynamodbCalls"] == 1
+    assert record["ConsumedCapacity"] == 2.0
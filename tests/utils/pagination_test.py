@@ -0,0 +1,58 @@
+import boto3
+import pytest
+from botocore.stub import Stubber
+from fastapi import HTTPException, status
+
+from app.utils.pagination import decode_cursor, encode_cursor, paginate_raw
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({"id": "fund-1"}, "BankFunds")
+    assert decode_cursor(cursor, "BankFunds") == {"id": "fund-1"}
+
+
+def test_cursor_empty_key():
+    assert encode_cursor(None, "BankFunds") is None
+    assert decode_cursor(None, "BankFunds") is None
+
+
+def test_cursor_tampered_payload():
+    cursor = encode_cursor({"id": "fund-1"}, "BankFunds")
+    other = encode_cursor({"id": "fund-2"}, "BankFunds")
+    forged = other.split(".")[0] + "." + cursor.split(".")[1]
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(forged, "BankFunds")
+    assert exc.value.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_cursor_other_scope():
+    cursor = encode_cursor({"id": "user-1"}, "Users")
+    with pytest.raises(HTTPException):
+        decode_cursor(cursor, "BankFunds")
+
+
+async def test_paginate_raw_returns_json_ready_items():
+    client = boto3.client("dynamodb", region_name="us-east-2", aws_access_key_id="x", aws_secret_access_key="x")
+    cursor = encode_cursor({"id": "a0"}, "UserBankFundsAudit")
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "scan",
+            {
+                "Items": [{"id": {"S": "a1"}, "amount": {"N": "75000"}, "fee": {"N": "12.345"}, "open": {"BOOL": True}}],
+                "LastEvaluatedKey": {"id": {"S": "a1"}},
+            },
+            {
+                "TableName": "UserBankFundsAudit",
+                "Limit": 1,
+                "ExclusiveStartKey": {"id": {"S": "a0"}},
+                "FilterExpression": "user_id = :uid",
+                "ExpressionAttributeValues": {":uid": {"S": "user-1"}},
+            },
+        )
+        items, next_cursor = await paginate_raw(
+            "UserBankFundsAudit", client, limit=1, cursor=cursor,
+            FilterExpression="user_id = :uid", ExpressionAttributeValues={":uid": "user-1"},
+        )
+
+    assert items == [{"id": "a1", "amount": 75000, "fee": 12.35, "open": True}]
+    assert decode_cursor(next_cursor, "UserBankFundsAudit") == {"id": "a1"}
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.config import Config
+from app.utils.backfill_bank_funds_stats import backfill_bank_funds_stats
+from app.utils.parallel_scan import parallel_scan
+
+
+class SegmentedTable:
+    """Tabla falsa: reparte los items por segmento y pagina de a `page_size`"""
+
+    def __init__(self, count: int, page_size: int = 10, latency: float = 0.0, fail_segment: int = None):
+        self.items = [{"id": f"item-{i}"} for i in range(count)]
+        self.page_size = page_size
+        self.latency = latency
+        self.fail_segment = fail_segment
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def scan(self, Segment, TotalSegments, ExclusiveStartKey=None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if Segment == self.fail_segment:
+                raise RuntimeError("scan failed")
+            segment_items = self.items[Segment::TotalSegments]
+            start = ExclusiveStartKey["offset"] if ExclusiveStartKey else 0
+            page = segment_items[start:start + self.page_size]
+            response = {"Items": page}
+            if start + self.page_size < len(segment_items):
+                response["LastEvaluatedKey"] = {"offset": start + self.page_size}
+            return response
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+async def collect(table, **kwargs):
+    return [item async for page in parallel_scan(table, **kwargs) for item in page]
+
+
+async def test_parallel_scan_reads_every_item_once():
+    table = SegmentedTable(95, latency=0.005)
+    items = await collect(table, segments=4)
+
+    assert sorted(item["id"] for item in items) == sorted(item["id"] for item in table.items)
+    assert table.peak > 1
+
+
+async def test_parallel_scan_backpressure():
+    table = SegmentedTable(200, page_size=5)
+    consumed = 0
+    async for _ in parallel_scan(table, segments=2, queue_size=1):
+        consumed += 1
+        await asyncio.sleep(0.01)
+        # Como máximo una página en cola y una en espera por worker
+        assert table.calls - consumed <= 1 + 2
+
+    assert consumed == 40
+
+
+async def test_parallel_scan_stops_when_consumer_stops():
+    table = SegmentedTable(1000, page_size=5)
+    async with asyncio.timeout(5):
+        scan = parallel_scan(table, segments=4, queue_size=1)
+        async for _ in scan:
+            break
+        await scan.aclose()
+
+    assert table.calls < 20
+
+
+async def test_parallel_scan_propagates_errors():
+    table = SegmentedTable(50, fail_segment=1)
+    with pytest.raises(RuntimeError):
+        await collect(table, segments=3)
+
+
+async def test_backfill_reads_the_table_with_parallel_scan():
+    table = SegmentedTable(30, page_size=4)
+    for index, item in enumerate(table.items):
+        item.update(bank_funds_id=f"fund-{index % 3}", amount=10)
+    segments_seen = set()
+    scan = table.scan
+
+    def tracking_scan(**kwargs):
+        segments_seen.add((kwargs["Segment"], kwargs["TotalSegments"]))
+        return scan(**kwargs)
+
+    table.scan = tracking_scan
+    stats_db = MagicMock()
+    with patch("app.schemas.user_bank_funds.user_bank_funds_db", table), \
+         patch("app.schemas.bank_funds_stats.bank_funds_stats_db", stats_db):
+        result = await backfill_bank_funds_stats()
+
+    assert segments_seen == {(segment, Config.SCAN_SEGMENTS) for segment in range(Config.SCAN_SEGMENTS)}
+    assert result == {"updated": 3}
+    values = {c.kwargs["Key"]["id"]: c.kwargs["ExpressionAttributeValues"][":subs"] for c in stats_db.update_item.call_args_list}
+    assert values == {"fund-0": 10, "fund-1": 10, "fund-2": 10}
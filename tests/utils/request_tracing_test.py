@@ -0,0 +1,83 @@
+import boto3
+import httpx
+from botocore.stub import Stubber
+from fastapi import FastAPI
+
+from app.utils.async_io import aio
+from app.utils.request_tracing import (
+    RequestCalls,
+    RequestTracingMiddleware,
+    current_calls,
+    instrument_client,
+    track,
+)
+
+
+def test_request_calls_totals_and_server_timing():
+    calls = RequestCalls()
+    calls.record("dynamodb", "GetItem", 0.002, 0.5)
+    calls.record("dynamodb", "GetItem", 0.003, 0.5)
+    calls.record("dynamodb", "Query", 0.010, 2.0)
+
+    assert calls.totals()["dynamodb"]["count"] == 3
+    header = calls.server_timing(0.020)
+    assert header.startswith("app;dur=20.00")
+    assert 'dynamodb;dur=15.00;desc="3 calls, 3 CU"' in header
+    assert 'dynamodb.GetItem;dur=5.00;desc="2 calls, 1 CU"' in header
+
+
+def test_instrumented_client_records_calls_and_capacity():
+    client = instrument_client(boto3.client(
+        "dynamodb", region_name="us-east-2", aws_access_key_id="x", aws_secret_access_key="x"
+    ))
+    calls = RequestCalls()
+    token = current_calls.set(calls)
+    try:
+        with Stubber(client) as stubber:
+            stubber.add_response(
+                "get_item",
+                {"Item": {"id": {"S": "1"}}, "ConsumedCapacity": {"TableName": "Users", "CapacityUnits": 0.5}},
+                {"TableName": "Users", "Key": {"id": {"S": "1"}}, "ReturnConsumedCapacity": "TOTAL"},
+            )
+            client.get_item(TableName="Users", Key={"id": {"S": "1"}})
+    finally:
+        current_calls.reset(token)
+
+    assert calls.to_dict()["dynamodb.GetItem"]["count"] == 1
+    assert calls.to_dict()["dynamodb.GetItem"]["consumed_capacity"] == 0.5
+
+
+def test_instrumented_client_outside_request_is_untouched():
+    client = instrument_client(boto3.client(
+        "dynamodb", region_name="us-east-2", aws_access_key_id="x", aws_secret_access_key="x"
+    ))
+    with Stubber(client) as stubber:
+        # Sin request en curso no se agrega ReturnConsumedCapacity
+        stubber.add_response("get_item", {}, {"TableName": "Users", "Key": {"id": {"S": "1"}}})
+        client.get_item(TableName="Users", Key={"id": {"S": "1"}})
+
+
+async def test_middleware_adds_server_timing_header():
+    client = instrument_client(boto3.client(
+        "dynamodb", region_name="us-east-2", aws_access_key_id="x", aws_secret_access_key="x"
+    ))
+    app = FastAPI()
+    app.add_middleware(RequestTracingMiddleware)
+
+    @app.get("/item")
+    async def get_item():
+        # La llamada corre en el pool de I/O y se atribuye a este request
+        await aio(client).get_item(TableName="Users", Key={"id": {"S": "1"}})
+        with track("smtp", "Enqueue"):
+            pass
+        return {}
+
+    with Stubber(client) as stubber:
+        stubber.add_response("get_item", {"ConsumedCapacity": {"TableName": "Users", "CapacityUnits": 1.0}})
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+            response = await http.get("/item")
+
+    header = response.headers["server-timing"]
+    assert 'dynamodb.GetItem;dur=' in header
+    assert 'desc="1 calls, 1 CU"' in header
+    assert 'smtp.Enqueue;dur=' in header
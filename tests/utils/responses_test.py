@@ -0,0 +1,50 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+
+from app.schemas.bank_funds import CurrencyEnum
+from app.schemas.user_bank_funds import UserBankFundsSchema
+from app.utils.responses import ORJSONResponse, money
+
+
+def test_money_precision_policy():
+    assert money(Decimal("500000")) == 500000
+    assert isinstance(money(Decimal("500000.00")), int)
+    assert money(Decimal("75000.005")) == 75000.01
+    assert money(Decimal("0.1")) == 0.1
+
+
+def test_response_serializes_dynamodb_types():
+    response = ORJSONResponse(content={
+        "data": [{
+            "min_amount": Decimal("75000"),
+            "amount": Decimal("1234.567"),
+            "currency": CurrencyEnum.COL,
+            "status": UserBankFundsSchema.StatusEnum.OPEN,
+            "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc),
+            "tags": {"a"},
+        }],
+    }, status_code=201)
+
+    assert isinstance(response, JSONResponse)
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/json"
+    assert json.loads(response.body) == {
+        "data": [{
+            "min_amount": 75000,
+            "amount": 1234.57,
+            "currency": "COP",
+            "status": "OPEN",
+            "created_at": "2025-01-01T00:00:00+00:00",
+            "tags": ["a"],
+        }],
+    }
+
+
+def test_response_serializes_schemas():
+    schema = UserBankFundsSchema(user_id="u1", bank_funds_id="f1", amount=Decimal("10.5"))
+    body = json.loads(ORJSONResponse(content={"data": schema}).body)
+    assert body["data"]["amount"] == 10.5
+    assert body["data"]["status"] == schema.status.value